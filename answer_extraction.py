@@ -0,0 +1,228 @@
+import logging
+import os
+import re
+from number_parser import parse_number
+from normalization import normalize_email, extract_possible_email, looks_like_email, spoken_digits, normalize_phone
+from gpt_integration import extract_answer_from_gpt
+
+logger = logging.getLogger(__name__)
+
+# Rule results at or above this confidence are used as-is; anything lower goes to the LLM
+ANSWER_CONFIDENCE_THRESHOLD = float(os.getenv("ANSWER_CONFIDENCE_THRESHOLD", "0.75"))
+
+try:
+    import pycountry  # optional: full ISO 3166 country list
+    COUNTRIES = [c.name for c in pycountry.countries]
+except Exception:
+    COUNTRIES = [
+        "India", "United States", "United Kingdom", "Canada", "Australia", "New Zealand",
+        "Germany", "France", "Italy", "Spain", "Netherlands", "Ireland", "Singapore",
+        "United Arab Emirates", "Saudi Arabia", "Qatar", "Japan", "China", "South Korea",
+        "Nepal", "Bangladesh", "Sri Lanka", "Pakistan", "Malaysia", "Indonesia",
+        "South Africa", "Brazil", "Mexico", "Russia", "Switzerland", "Sweden", "Norway",
+    ]
+
+STATES = [
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat",
+    "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh",
+    "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab",
+    "Rajasthan", "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh",
+    "Uttarakhand", "West Bengal", "Andaman and Nicobar Islands", "Chandigarh",
+    "Dadra and Nagar Haveli and Daman and Diu", "Delhi", "Jammu and Kashmir", "Ladakh",
+    "Lakshadweep", "Puducherry",
+]
+COUNTRY_INDEX = {c.lower(): c for c in COUNTRIES}
+COUNTRY_INDEX.update({"usa": "United States", "us": "United States", "america": "United States",
+                      "uk": "United Kingdom", "england": "United Kingdom", "uae": "United Arab Emirates"})
+STATE_INDEX = {s.lower(): s for s in STATES}
+STATE_INDEX.update({"new delhi": "Delhi", "orissa": "Odisha", "pondicherry": "Puducherry",
+                    "up": "Uttar Pradesh", "mp": "Madhya Pradesh", "tn": "Tamil Nadu"})
+
+# Spoken lead-ins such as "my name is", "it's", "i live in"
+ANSWER_PREFIX = re.compile(
+    r"^(?:(?:ok(?:ay)?|so|well|um+|uh+|yeah|sure)[, ]+)*"
+    r"(?:(?:my|the|our)\s+[\w\s]{0,30}?\s+(?:is|are)|i\s+am|i'm|it\s+is|it's|this\s+is|"
+    r"call\s+me|i\s+live\s+in|i'm\s+from|i\s+am\s+from|i\s+stay\s+in)\s+",
+    re.IGNORECASE,
+)
+TRAILING_FILLER = re.compile(r"[\s,.!?]*(?:thank\s*you|thanks|please)?[\s,.!?]*$", re.IGNORECASE)
+YES_WORDS = frozenset("yes yeah yep yup sure ok okay agree accept correct true of course definitely".split())
+NO_WORDS = frozenset("no nope nah not don't dont disagree decline false never".split())
+NAME_WORD = re.compile(r"^[a-z][a-z.'-]*$", re.IGNORECASE)
+DIGITS = re.compile(r"\d+")
+LONG_TEXT_KEYS = ("address", "message", "comment", "description", "note", "feedback", "about", "bio", "reason")
+
+
+# 🧾 One rule-based answer with how sure the rule is (0..1) and which rule produced it
+class Extraction:
+    __slots__ = ("value", "confidence", "rule")
+
+    def __init__(self, value, confidence, rule):
+        self.value = value
+        self.confidence = confidence
+        self.rule = rule
+
+    def __repr__(self):
+        return f"Extraction({self.value!r}, {self.confidence}, {self.rule!r})"
+
+
+def strip_answer_prefix(text: str) -> str:
+    text = ANSWER_PREFIX.sub("", text.strip())
+    return TRAILING_FILLER.sub("", text).strip()
+
+
+# 🏷️ Which rule applies, from the words in the field's name and its input type
+def classify_field(field_name: str, field_type: str = "text") -> str:
+    words = re.findall(r"[a-z]+", re.sub(r"([a-z])([A-Z])", r"\1 \2", field_name).lower())
+    key = " ".join(words)
+
+    def has(*names):
+        return any(w.startswith(names) for w in words)
+
+    if field_type == "email" or has("email"):
+        return "email"
+    if field_type == "tel" or has("phone", "mobile"):
+        return "phone"
+    if has("pin", "zip", "postal", "postcode"):
+        return "postal_code"
+    if has("country", "nationality"):
+        return "country"
+    if has("state", "province"):
+        return "state"
+    if any(w.endswith("name") for w in words) and not has("user", "company", "organi", "business"):
+        return "name"
+    if field_type in ("number", "range") or has("age", "quantity", "count", "number", "amount", "years"):
+        return "number"
+    if field_type == "checkbox" or key.startswith(("is ", "has ", "agree", "consent", "subscribe", "accept")):
+        return "yes_no"
+    if field_type == "textarea" or has(*LONG_TEXT_KEYS):
+        return "long_text"
+    return "text"
+
+
+def extract_email(text):
+    candidate = normalize_email(extract_possible_email(strip_answer_prefix(text)))
+    return Extraction(candidate, 0.95 if looks_like_email(candidate) else 0.0, "email")
+
+
+def extract_phone(text):
+    phone = normalize_phone(text)
+    return Extraction(phone, 0.95, "phone") if phone else Extraction(spoken_digits(text), 0.0, "phone")
+
+
+def extract_postal_code(text):
+    digits = spoken_digits(text)
+    # Indian PIN (6 digits) or US ZIP (5, or 5+4)
+    if len(digits) in (5, 6, 9):
+        return Extraction(digits, 0.95, "postal_code")
+    return Extraction(digits, 0.2, "postal_code")
+
+
+def extract_number(text):
+    answer = strip_answer_prefix(text)
+    digits = DIGITS.findall(answer)
+    if len(digits) == 1:
+        return Extraction(digits[0], 0.95, "number")
+    value = parse_number(answer.lower())
+    if value is not None:
+        return Extraction(str(value), 0.9, "number")
+    return Extraction(answer, 0.2, "number")
+
+
+def extract_yes_no(text):
+    words = set(re.findall(r"[a-z']+", text.lower()))
+    yes, no = bool(words & YES_WORDS), bool(words & NO_WORDS)
+    if yes != no:
+        return Extraction("yes" if yes else "no", 0.95, "yes_no")
+    return Extraction(text.strip(), 0.1, "yes_no")
+
+
+def _lookup(text, index, rule):
+    answer = strip_answer_prefix(text).lower()
+    if answer in index:
+        return Extraction(index[answer], 0.95, rule)
+    # Longest known name mentioned anywhere in the utterance
+    padded = f" {re.sub(r'[^a-z ]', ' ', text.lower())} "
+    hits = [name for name in index if f" {name} " in padded]
+    if hits:
+        return Extraction(index[max(hits, key=len)], 0.85, rule)
+    return Extraction(strip_answer_prefix(text), 0.3, rule)
+
+
+def extract_country(text):
+    return _lookup(text, COUNTRY_INDEX, "country")
+
+
+def extract_state(text):
+    return _lookup(text, STATE_INDEX, "state")
+
+
+def extract_name(text):
+    answer = strip_answer_prefix(text)
+    words = answer.split()
+    if 1 <= len(words) <= 4 and all(NAME_WORD.match(w) for w in words):
+        return Extraction(" ".join(w[:1].upper() + w[1:] for w in words), 0.9, "name")
+    return Extraction(answer, 0.3, "name")
+
+
+def extract_long_text(text):
+    answer = strip_answer_prefix(text)
+    return Extraction(answer, 0.8 if answer else 0.0, "long_text")
+
+
+def extract_text(text):
+    answer = strip_answer_prefix(text)
+    # A short reply is almost always just the value; longer ones need the LLM to pick it out
+    confident = answer and len(answer.split()) <= 3
+    return Extraction(answer, 0.8 if confident else 0.4, "text")
+
+
+RULES = {
+    "email": extract_email,
+    "phone": extract_phone,
+    "postal_code": extract_postal_code,
+    "number": extract_number,
+    "yes_no": extract_yes_no,
+    "country": extract_country,
+    "state": extract_state,
+    "name": extract_name,
+    "long_text": extract_long_text,
+    "text": extract_text,
+}
+
+
+# 🧠 Deterministic answer extraction with an LLM fallback below the confidence threshold.
+# Counters show how many answers were settled without a GPT round trip.
+class AnswerExtractor:
+    def __init__(self, threshold: float = ANSWER_CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+        self.rule_hits = 0
+        self.llm_calls = 0
+        self.by_rule = {}
+
+    def extract_rule_based(self, field_name: str, transcript: str, field_type: str = "text") -> Extraction:
+        return RULES[classify_field(field_name, field_type)](transcript)
+
+    async def extract(self, field_name: str, transcript: str, field_type: str = "text") -> str:
+        result = self.extract_rule_based(field_name, transcript, field_type)
+        counts = self.by_rule.setdefault(result.rule, [0, 0])
+        if result.value and result.confidence >= self.threshold:
+            self.rule_hits += 1
+            counts[0] += 1
+            return result.value
+        self.llm_calls += 1
+        counts[1] += 1
+        logger.info("Low-confidence %s (%.2f) for %s; asking the LLM", result.rule, result.confidence, field_name)
+        return await extract_answer_from_gpt(field_name, transcript)
+
+    def stats(self):
+        total = self.rule_hits + self.llm_calls
+        return {
+            "rule_hits": self.rule_hits,
+            "llm_calls": self.llm_calls,
+            "llm_avoided_ratio": round(self.rule_hits / total, 3) if total else 0.0,
+            "by_rule": {rule: {"rule_hits": h, "llm_calls": l} for rule, (h, l) in self.by_rule.items()},
+        }
+
+
+answer_extractor = AnswerExtractor()
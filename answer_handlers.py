@@ -0,0 +1,146 @@
+from answer_extraction import answer_extractor, extract_email, extract_phone
+from normalization import spoken_digits, parse_spoken_time, parse_spoken_date
+from option_index import get_option_index
+
+FILL = "fill"
+RETRY = "retry"
+WAIT = "wait"
+
+
+# 📨 What a handler decided for one transcript: fill the field with `value`,
+# ask again with `value` as the message, or wait for more speech
+class Outcome:
+    __slots__ = ("kind", "value")
+
+    def __init__(self, kind, value=None):
+        self.kind = kind
+        self.value = value
+
+    def __repr__(self):
+        return f"Outcome({self.kind!r}, {self.value!r})"
+
+
+WAITING = Outcome(WAIT)
+
+
+# 🧾 The field being answered (built from the session per transcript)
+class FieldSpec:
+    __slots__ = ("name", "type", "options")
+
+    def __init__(self, name, type="text", options=None):
+        self.name = name
+        self.type = type
+        self.options = options or []
+
+
+# 🗣️ Per-connection speech carried across utterances (e.g. an email or phone number
+# spoken in pieces); cleared whenever a field is filled
+class AnswerState:
+    __slots__ = ("transcript", "digits")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.transcript = ""
+        self.digits = ""
+
+
+# Handlers are `async def handler(field, final, state) -> Outcome`, keyed by field type.
+ANSWER_HANDLERS = {}
+# Field-name hints for inputs whose type attribute says nothing (e.g. type="text" name="email")
+NAME_HINTS = (("email", "email"), ("phone", "tel"), ("mobile", "tel"))
+# Types that don't say what the answer is; the field name decides for these
+GENERIC_TYPES = {"", "text"}
+
+
+def register_handler(*field_types):
+    def decorator(handler):
+        for field_type in field_types:
+            ANSWER_HANDLERS[field_type] = handler
+        return handler
+    return decorator
+
+
+# 🔎 Handler for a field: by specific type, then by name hint, then free text
+def get_handler(field_name: str, field_type: str = "text"):
+    if field_type not in GENERIC_TYPES:
+        handler = ANSWER_HANDLERS.get(field_type)
+        if handler is not None:
+            return handler
+    key = (field_name or "").lower()
+    for hint, hinted_type in NAME_HINTS:
+        if hint in key:
+            return ANSWER_HANDLERS[hinted_type]
+    return ANSWER_HANDLERS["text"]
+
+
+@register_handler("checkbox")
+async def handle_checkbox(field, final, state):
+    if not field.options:
+        return await handle_text(field, final, state)
+    matched = get_option_index(field.options).match_many(final)
+    if matched:
+        return Outcome(FILL, ",".join(matched))
+    return Outcome(RETRY, f"Please say one or more of: {', '.join(field.options)}")
+
+
+@register_handler("radio", "select-one")
+async def handle_choice(field, final, state):
+    if not field.options:
+        return await handle_text(field, final, state)
+    matched = get_option_index(field.options).match(final)
+    print(f"Matched spoken option: {matched}")
+    if matched:
+        return Outcome(FILL, matched)
+    return Outcome(RETRY, f"Please say one of: {', '.join(field.options)}")
+
+
+@register_handler("time")
+async def handle_time(field, final, state):
+    value = parse_spoken_time(final)
+    if value:
+        return Outcome(FILL, value)
+    return Outcome(RETRY, "Please say a time (e.g., 3 pm, 14:30, 7 in the morning)")
+
+
+@register_handler("date")
+async def handle_date(field, final, state):
+    value = parse_spoken_date(final)
+    print(f"Parsed date: {value}")
+    if value:
+        return Outcome(FILL, value)  # Format: YYYY-MM-DD
+    return Outcome(RETRY, "Please say a date, for example: 4th July, tomorrow, or July 4 2024.")
+
+
+# 📧 Tries the latest utterance, then everything said since the last filled field,
+# through the extractor's email rule
+@register_handler("email")
+async def handle_email(field, final, state):
+    for text in (final, state.transcript):
+        result = extract_email(text)
+        if result.confidence >= answer_extractor.threshold:
+            print("Final Email is:", result.value)
+            return Outcome(FILL, result.value)
+    print("Waiting for complete email...")
+    return WAITING
+
+
+# 📞 Collects digits across utterances until a full number has been heard
+@register_handler("tel")
+async def handle_phone(field, final, state):
+    state.digits += spoken_digits(final)
+    print(f"Buffered phone digits: {state.digits}")
+    result = extract_phone(state.digits)
+    if result.confidence < answer_extractor.threshold:
+        print("Waiting for complete phone number...")
+        return WAITING
+    return Outcome(FILL, result.value)
+
+
+# ✍️ Everything else: rule-based extraction, GPT only when the rules are unsure
+@register_handler("text")
+async def handle_text(field, final, state):
+    answer = await answer_extractor.extract(field.name, final, field.type)
+    print(f"Answer for '{field.name}':", answer)
+    return Outcome(FILL, answer)
@@ -0,0 +1,72 @@
+import re
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # Int16 PCM
+
+LEADING_SILENCE = re.compile(rb"(?:\x00\x00)*")
+
+
+# 🎞️ Fixed-size ring buffer for one connection's PCM audio.
+# Storage is preallocated once and every byte is written twice (at i and i + capacity),
+# so any window of up to `capacity` bytes is contiguous and can be handed out as a
+# zero-copy memoryview. Appends never reallocate; once full, the oldest audio is overwritten.
+class AudioRingBuffer:
+    def __init__(self, capacity: int):
+        capacity -= capacity % SAMPLE_WIDTH
+        self.capacity = capacity
+        self._data = bytearray(capacity * 2)
+        self._view = memoryview(self._data)
+        self._write = 0  # next write position in [0, capacity)
+        self._length = 0
+
+    @classmethod
+    def for_seconds(cls, seconds: float, sample_rate: int = SAMPLE_RATE):
+        return cls(int(seconds * sample_rate) * SAMPLE_WIDTH)
+
+    def __len__(self):
+        return self._length
+
+    # ➕ Copies `data` in; cost depends only on len(data), never on what is buffered
+    def append(self, data):
+        data = memoryview(data).cast("B")
+        n = len(data)
+        if n >= self.capacity:
+            data = data[n - self.capacity:]
+            n = self.capacity
+        first = min(n, self.capacity - self._write)
+        for offset in (0, self.capacity):
+            start = self._write + offset
+            self._view[start:start + first] = data[:first]
+        rest = n - first
+        if rest:
+            for offset in (0, self.capacity):
+                self._view[offset:offset + rest] = data[first:]
+        self._write = (self._write + n) % self.capacity
+        self._length = min(self._length + n, self.capacity)
+
+    # 🪟 Zero-copy window [start, end) over the buffered audio (oldest byte = 0)
+    def view(self, start: int = 0, end: int = None):
+        end = self._length if end is None else min(end, self._length)
+        start = max(0, min(start, end))
+        origin = (self._write - self._length) % self.capacity
+        return self._view[origin + start:origin + end]
+
+    # 🪟 Zero-copy view of the most recent `nbytes` bytes
+    def tail(self, nbytes: int):
+        return self.view(max(0, self._length - nbytes))
+
+    def clear(self):
+        self._write = 0
+        self._length = 0
+
+
+# 🧹 Offset of the first non-silent sample (skips leading all-zero Int16 samples)
+def leading_silence_bytes(audio) -> int:
+    return LEADING_SILENCE.match(audio).end()
+
+
+# 📦 Zero-copy fixed-size chunks of a bytes-like object, e.g. for STT streaming requests
+def iter_chunks(audio, chunk_size: int):
+    view = memoryview(audio)
+    for i in range(0, len(view), chunk_size):
+        yield view[i:i + chunk_size]
@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
+import os
+
+SAMPLE_RATE = 16000
+PCM_CODEC = "pcm16"
+OPUS_CODEC = "opus"
+# Largest Opus frame (120 ms) at 16 kHz, in samples
+OPUS_MAX_FRAME_SAMPLES = SAMPLE_RATE * 120 // 1000
+AUDIO_DECODE_WORKERS = int(os.getenv("AUDIO_DECODE_WORKERS", "4"))
+
+try:
+    import opuslib  # optional: needs the system libopus
+except Exception:
+    opuslib = None
+
+# Shared pool so decoding never runs on the event loop
+decode_pool = ThreadPoolExecutor(max_workers=AUDIO_DECODE_WORKERS, thread_name_prefix="audio-decode")
+
+
+# 🧾 Codecs this server can accept on /stt, most preferred first
+def supported_codecs():
+    return [OPUS_CODEC, PCM_CODEC] if opuslib is not None else [PCM_CODEC]
+
+
+# 📨 Codecs offered by a {"type": "hello", "codecs": [...]} control message, or None
+# when the text isn't a well-formed hello (bad JSON, not an object, other type)
+def parse_hello(text):
+    try:
+        hello = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(hello, dict) or hello.get("type") != "hello":
+        return None
+    codecs = hello.get("codecs")
+    return [c for c in codecs if isinstance(c, str)] if isinstance(codecs, list) else []
+
+
+# 🤝 Picks the first server-preferred codec the client offered; PCM is always the fallback
+def negotiate_codec(client_codecs):
+    offered = {str(c).lower() for c in client_codecs or []}
+    for codec in supported_codecs():
+        if codec in offered:
+            return codec
+    return PCM_CODEC
+
+
+# 🔁 Raw 16 kHz Int16 frames pass straight through
+class PCMDecoder:
+    codec = PCM_CODEC
+
+    async def decode(self, frame: bytes) -> bytes:
+        return frame
+
+
+# 🎼 Decodes one Opus packet per WebSocket message into 16 kHz mono Int16 PCM.
+# Decoder state is per connection; packets are decoded in order on the shared pool.
+class OpusDecoder:
+    codec = OPUS_CODEC
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self._decoder = opuslib.Decoder(sample_rate, 1)
+
+    def _decode(self, packet: bytes) -> bytes:
+        return self._decoder.decode(bytes(packet), OPUS_MAX_FRAME_SAMPLES)
+
+    async def decode(self, packet: bytes) -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(decode_pool, self._decode, packet)
+
+
+def build_decoder(codec: str):
+    if codec == OPUS_CODEC and opuslib is not None:
+        return OpusDecoder()
+    return PCMDecoder()
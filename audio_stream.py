@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Max frames waiting for the consumer on one socket
+AUDIO_QUEUE_MAX_FRAMES = int(os.getenv("AUDIO_QUEUE_MAX_FRAMES", "64"))
+# What to do when the consumer falls behind: "merge" coalesces queued frames into one
+# (no audio lost), "drop_oldest" discards the oldest frame
+AUDIO_QUEUE_POLICY = os.getenv("AUDIO_QUEUE_POLICY", "merge")
+# Upper bound for one merged frame (default 10 s of 16 kHz Int16 PCM); beyond it the
+# oldest audio is dropped, so a consumer stuck in STT/GPT can't grow memory
+AUDIO_MERGE_MAX_BYTES = int(os.getenv("AUDIO_MERGE_MAX_BYTES", str(16000 * 2 * 10)))
+
+
+# 📊 Per-connection counters, logged when the socket closes
+class AudioStreamMetrics:
+    __slots__ = (
+        "session_id", "started_at", "frames_received", "bytes_received", "wire_bytes_received",
+        "frames_dropped", "frames_merged", "bytes_dropped", "max_queue_depth", "stt_requests",
+    )
+
+    def __init__(self, session_id=""):
+        self.session_id = session_id
+        self.started_at = time.monotonic()
+        self.frames_received = 0
+        self.bytes_received = 0       # decoded PCM bytes
+        self.wire_bytes_received = 0  # bytes as sent by the client (compressed for Opus)
+        self.frames_dropped = 0
+        self.frames_merged = 0
+        self.bytes_dropped = 0
+        self.max_queue_depth = 0
+        self.stt_requests = 0
+
+    def as_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__ if slot != "started_at"}
+        data["duration_s"] = round(time.monotonic() - self.started_at, 2)
+        return data
+
+
+# 📥 Non-blocking enqueue with backpressure. A slow consumer never makes the
+# receive loop wait; instead queued frames are merged (keeping at most max_merge_bytes,
+# newest audio wins) or the oldest is dropped.
+def enqueue_frame(audio_queue: asyncio.Queue, frame: bytes, metrics: AudioStreamMetrics,
+                  policy: str = AUDIO_QUEUE_POLICY, max_merge_bytes: int = AUDIO_MERGE_MAX_BYTES):
+    metrics.frames_received += 1
+    metrics.bytes_received += len(frame)
+    if audio_queue.full():
+        if policy == "drop_oldest":
+            audio_queue.get_nowait()
+            metrics.frames_dropped += 1
+        else:
+            pending = [audio_queue.get_nowait() for _ in range(audio_queue.qsize())]
+            metrics.frames_merged += len(pending)
+            frame = b"".join(pending) + frame
+            excess = len(frame) - max_merge_bytes
+            if excess > 0:
+                excess += excess % 2  # whole Int16 samples
+                frame = frame[excess:]
+                metrics.bytes_dropped += excess
+    audio_queue.put_nowait(frame)
+    metrics.max_queue_depth = max(metrics.max_queue_depth, audio_queue.qsize())
+
+
+# 🧯 Logs a consumer task that died with an exception instead of failing silently
+def log_task_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Audio consumer task failed: %r", task.exception())
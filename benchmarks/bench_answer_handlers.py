@@ -0,0 +1,52 @@
+"""Microbenchmark: cost of each /stt answer handler on a typical utterance.
+
+The free-text handler is skipped (it may call the LLM). Run from the repository root:
+
+    python benchmarks/bench_answer_handlers.py [iterations]
+"""
+import asyncio
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_handlers import AnswerState, FieldSpec, get_handler  # noqa: E402
+
+COUNTRIES = [f"Country {i}" for i in range(240)] + ["India", "United Kingdom"]
+CASES = [
+    (FieldSpec("gender", "radio", ["Male", "Female", "Prefer not to say"]), "I am female"),
+    (FieldSpec("country", "select-one", COUNTRIES), "united kingdom"),
+    (FieldSpec("hobbies", "checkbox", ["Reading", "Sports", "Music", "Travel"]), "reading and music"),
+    (FieldSpec("appointment_time", "time"), "seven thirty in the evening"),
+    (FieldSpec("email", "email"), "rahul dot sharma at gmail dot com"),
+    (FieldSpec("phone", "tel"), "nine eight seven six five four three two one zero"),
+]
+
+
+async def bench(iterations):
+    results = []
+    for field, utterance in CASES:
+        handler = get_handler(field.name, field.type)
+        state = AnswerState()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            state.reset()
+            outcome = await handler(field, utterance, state)
+        results.append((handler.__name__, field.type, (time.perf_counter() - start) / iterations * 1e6, outcome))
+    return results
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    # Handlers print diagnostics; keep the output to the results
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = asyncio.run(bench(iterations))
+    print(f"per-utterance cost, {iterations} iterations")
+    for name, field_type, per_call, outcome in results:
+        print(f"{name:<16} {field_type:<11} {per_call:8.2f} us   -> {outcome!r}")
+
+
+if __name__ == "__main__":
+    main()
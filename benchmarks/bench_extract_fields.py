@@ -0,0 +1,71 @@
+"""Benchmark: parser.extract_fields_from_html on large synthetic forms.
+
+Prints time per form and per input for growing form sizes, with each available
+HTML parser; near-constant us/input means linear scaling. Run from the repository root:
+
+    python benchmarks/bench_extract_fields.py [max_inputs]
+"""
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parser as form_parser  # noqa: E402
+
+
+# 🧪 Mixed form: labelled text inputs, selects, textareas, checkbox and radio groups
+def synthetic_form(n_inputs, seed=0):
+    rng = random.Random(seed)
+    groups = max(1, n_inputs // 20)
+    parts = ['<form action="/submit" method="post">']
+    for i in range(n_inputs):
+        kind = rng.choice(("text", "email", "tel", "date", "select", "textarea", "checkbox", "radio"))
+        if kind == "select":
+            options = "".join(f"<option>Option {j}</option>" for j in range(10))
+            parts.append(f'<label for="f{i}">Select {i}</label><select id="f{i}" name="f{i}">{options}</select>')
+        elif kind == "textarea":
+            parts.append(f'<label for="f{i}">Notes {i}</label><textarea id="f{i}" name="f{i}"></textarea>')
+        elif kind in ("checkbox", "radio"):
+            group = rng.randrange(groups)
+            parts.append(f'<div><label for="f{i}">Choice {i}</label>'
+                         f'<input type="{kind}" id="f{i}" name="{kind}{group}" value="v{i}"></div>')
+        else:
+            parts.append(f'<div class="row"><label for="f{i}">Field {i}</label>'
+                         f'<input type="{kind}" id="f{i}" name="f{i}" required></div>')
+    parts.append('<button type="submit">Send</button></form>')
+    return "".join(parts)
+
+
+def main():
+    max_inputs = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    logging.disable(logging.CRITICAL)
+    parsers = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        parsers.append("lxml")
+    except ImportError:
+        pass
+    sizes = []
+    n = 250
+    while n <= max_inputs:
+        sizes.append(n)
+        n *= 2
+    for parser_name in parsers:
+        form_parser.HTML_PARSER = parser_name
+        print(f"parser={parser_name}")
+        for size in sizes:
+            html = synthetic_form(size)
+            runs = max(1, 2000 // size)
+            start = time.perf_counter()
+            for _ in range(runs):
+                fields = form_parser.extract_fields_from_html(html)
+            elapsed = (time.perf_counter() - start) / runs
+            print(f"  {size:>6} inputs  {len(fields):>6} fields  {elapsed * 1000:9.2f} ms"
+                  f"  {elapsed / size * 1e6:7.2f} us/input")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Microbenchmark: per-utterance cost of the compiled normalizers vs the previous ones.
+
+Run from the repository root:
+
+    python benchmarks/bench_normalization.py [iterations]
+"""
+from datetime import datetime
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from number_parser import parse_ordinal  # noqa: E402
+import normalization  # noqa: E402
+
+EMAILS = [
+    "rahul dot sharma at gmail dot com",
+    "my email id is priya underscore k at yahoo dot com",
+    "john dash doe at the gmail dot com",
+    "abc123 gmail.com",
+]
+TIMES = ["7 pm", "7:30 pm", "15:30", "noon", "14 hours", "9 in the morning", "1530"]
+ORDINAL_TEXTS = ["twenty fifth of july", "the first of march 2024", "thirty-first december"]
+
+
+# ---- previous implementations, kept verbatim for comparison -----------------
+
+def legacy_normalize_email(text):
+    text = text.lower()
+    replacements = {
+        " at ": "@", " at tha ": "@", " dot ": ".", " underscore ": "_", " dash ": "-",
+        " space ": "", " attherate ": "@", " gmail logo": "@gmail.com",
+        " at the gmail dot com": "@gmail.com", " at the gmail": "@gmail.com",
+    }
+    for k, v in replacements.items():
+        text = text.replace(k, v)
+    text = text.replace(" ", "")
+    if text.endswith("gmail.com") and "@" not in text:
+        text = text[:-9] + "@gmail.com"
+    if text.endswith("yahoo.com") and "@" not in text:
+        text = text[:-9] + "@yahoo.com"
+    if text.endswith("outlook.com") and "@" not in text:
+        text = text[:-11] + "@outlook.com"
+    return re.sub(r"@thegmail\\.com", "@gmail.com", text)
+
+
+def legacy_extract_possible_email(text):
+    text = text.lower().strip()
+    text = re.sub(r"^(my\s*)?(email(\s*(address|id))?\s*is\s*)", "", text).strip()
+    for filler in [" enter ", " the rate ", " attherate ", " at the ", " at "]:
+        text = text.replace(filler, " @ ")
+    text = text.replace(" dot ", ".").replace(" underscore ", "_").replace(" dash ", "-").replace(" space ", "")
+    text = " ".join(text.split()).replace(" ", "")
+    match = re.search(r"([a-z0-9_.+-]+)@([a-z0-9-]+\.[a-z0-9-.]+)", text)
+    if match:
+        return match.group(0)
+    match2 = re.search(r"([a-z0-9_.+-]+)gmail\.com", text)
+    if match2:
+        return match2.group(1) + "@gmail.com"
+    return text
+
+
+def legacy_parse_spoken_time(text):
+    text = text.lower().strip()
+    text = text.replace("in the morning", "am").replace("in the evening", "pm").replace("at night", "pm").replace("noon", "12:00 pm")
+    text = re.sub(r"(\d{1,2})\s*hours?", r"\1:00", text)
+    text = re.sub(r"(\d{1,2})\s*([ap]m)", r"\1:00 \2", text)
+    for pat in ["%I %p", "%I:%M %p", "%H:%M", "%I", "%H", "%I%p", "%H%M"]:
+        try:
+            return datetime.strptime(text, pat).strftime("%H:%M")
+        except Exception:
+            pass
+    match = re.search(r'(\d{1,2})[:. ]?(\d{2})?\s*([ap]m)?', text)
+    if match:
+        hour = int(match.group(1))
+        minute = int(match.group(2)) if match.group(2) else 0
+        ampm = match.group(3)
+        if ampm == "pm" and hour < 12:
+            hour += 12
+        if ampm == "am" and hour == 12:
+            hour = 0
+        return f"{hour:02}:{minute:02}"
+    return ""
+
+
+def legacy_replace_ordinals(text):
+    new_words = []
+    for word in text.lower().replace('-', ' ').split():
+        try:
+            new_words.append(str(parse_ordinal(word)))
+        except Exception:
+            new_words.append(word)
+    return ' '.join(new_words)
+
+
+# ---- harness ------------------------------------------------------------------
+
+def bench(name, legacy, compiled, inputs, iterations):
+    def run(fn):
+        return min(timeit.repeat(lambda: [fn(t) for t in inputs], number=iterations, repeat=3))
+
+    old = run(legacy) / (iterations * len(inputs)) * 1e6
+    new = run(compiled) / (iterations * len(inputs)) * 1e6
+    print(f"{name:<24} legacy {old:8.2f} us   compiled {new:8.2f} us   x{old / new:5.1f}")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"per-utterance cost, best of 3 x {iterations} iterations")
+    bench("normalize_email", legacy_normalize_email, normalization.normalize_email, EMAILS, iterations)
+    bench("extract_possible_email", legacy_extract_possible_email, normalization.extract_possible_email,
+          EMAILS, iterations)
+    bench("parse_spoken_time", legacy_parse_spoken_time, normalization.parse_spoken_time, TIMES, iterations)
+    bench("ordinals -> digits", legacy_replace_ordinals, normalization.spoken_numbers_to_digits, ORDINAL_TEXTS,
+          max(1, iterations // 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+from playwright.async_api import async_playwright
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Max browser contexts handed out at once (caps Chromium memory under load)
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "4"))
+# Relaunch Chromium after this many pages to keep leaks/fragmentation bounded
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "200"))
+
+
+# 🌐 Process-wide warm Chromium shared by form extraction and submission.
+# Each caller gets its own isolated browser context (cookies, storage, cache),
+# so requests never see each other's state while avoiding a cold launch per call.
+class BrowserPool:
+    def __init__(self, max_contexts: int = BROWSER_POOL_SIZE, max_pages: int = BROWSER_MAX_PAGES):
+        self.max_contexts = max_contexts
+        self.max_pages = max_pages
+        self._playwright = None
+        self._browser = None
+        self._pages_served = 0
+        self._active = {}  # browser -> number of open contexts
+        self._retired = set()  # recycled browsers waiting for their last context to close
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        self._lock = asyncio.Lock()
+
+    # 🚀 Start Playwright and launch Chromium (called once at app startup)
+    async def start(self):
+        async with self._lock:
+            await self._ensure_started()
+
+    # 🛑 Close every browser and stop Playwright (called at app shutdown)
+    async def stop(self):
+        async with self._lock:
+            for browser in [self._browser, *self._retired]:
+                if browser is not None:
+                    try:
+                        await browser.close()
+                    except Exception as e:
+                        logger.warning("Error closing browser: %s", e)
+            self._browser = None
+            self._retired.clear()
+            self._active.clear()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _ensure_started(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        if self._browser is None:
+            await self._launch()
+
+    async def _launch(self):
+        self._browser = await self._playwright.chromium.launch()
+        self._active[self._browser] = 0
+        self._pages_served = 0
+        logger.info("Chromium launched for browser pool (max contexts=%s)", self.max_contexts)
+
+    # 🩺 Health check: relaunch a crashed/disconnected browser, recycle after N pages
+    async def _acquire_browser(self):
+        async with self._lock:
+            await self._ensure_started()
+            if not self._browser.is_connected():
+                logger.warning("Pooled Chromium disconnected; relaunching")
+                self._active.pop(self._browser, None)
+                await self._launch()
+            elif self._pages_served >= self.max_pages:
+                logger.info("Recycling pooled Chromium after %s pages", self._pages_served)
+                old = self._browser
+                await self._launch()
+                if self._active.get(old, 0) == 0:
+                    await self._close_browser(old)
+                else:
+                    self._retired.add(old)
+            browser = self._browser
+            self._pages_served += 1
+            self._active[browser] += 1
+            return browser
+
+    async def _release_browser(self, browser):
+        async with self._lock:
+            if browser not in self._active:
+                return
+            self._active[browser] -= 1
+            if browser in self._retired and self._active[browser] == 0:
+                self._retired.discard(browser)
+                await self._close_browser(browser)
+
+    async def _close_browser(self, browser):
+        self._active.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.warning("Error closing recycled browser: %s", e)
+
+    # 📄 Hand out a fresh page inside an isolated context; closed on exit
+    @asynccontextmanager
+    async def page(self, **context_options):
+        async with self._semaphore:
+            browser = await self._acquire_browser()
+            context = None
+            try:
+                context = await browser.new_context(**context_options)
+                page = await context.new_page()
+                yield page
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        logger.warning("Error closing browser context: %s", e)
+                await self._release_browser(browser)
+
+
+browser_pool = BrowserPool()
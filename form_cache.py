@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import requests
+from db import SessionLocal
+from models import FormSchemaEntry
+
+logger = logging.getLogger(__name__)
+
+FORM_CACHE_MAX_ENTRIES = int(os.getenv("FORM_CACHE_MAX_ENTRIES", "256"))
+# Seconds a cached schema is trusted without any revalidation
+FORM_CACHE_TTL = float(os.getenv("FORM_CACHE_TTL", "3600"))
+# Mirror entries into SQLite (form_logs.db) so they survive restarts
+FORM_CACHE_PERSIST = os.getenv("FORM_CACHE_PERSIST", "1") == "1"
+HEAD_TIMEOUT = 3.0
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+# 🔗 Normalizes a URL for cache keys: lowercase scheme/host, drop default port,
+# fragment and trailing slash, and sort query parameters
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+# #️⃣ Content hash of the extracted form HTML (whitespace-insensitive)
+def hash_form_html(form_html: str) -> str:
+    collapsed = re.sub(r"\s+", " ", form_html or "").strip()
+    return hashlib.sha256(collapsed.encode("utf-8")).hexdigest()
+
+
+# 📡 Fetches ETag/Last-Modified for a URL with a cheap HEAD request
+def fetch_validators(url: str):
+    try:
+        resp = requests.head(url, timeout=HEAD_TIMEOUT, allow_redirects=True)
+        return resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    except Exception as e:
+        logger.info("HEAD %s failed: %s", url, e)
+        return None, None
+
+
+# 🗃️ Form-schema cache: normalized URL -> {form_hash, fields, questions, validators}.
+# In-memory LRU with TTL, optionally backed by the form_schema_cache SQLite table
+# (SQLite calls run in a worker thread, never on the event loop).
+class FormCache:
+    def __init__(self, max_entries: int = FORM_CACHE_MAX_ENTRIES, ttl: float = FORM_CACHE_TTL,
+                 persist: bool = FORM_CACHE_PERSIST):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist = persist
+        self._entries = OrderedDict()
+
+    async def get(self, url: str):
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+            return entry
+        if self.persist:
+            entry = await asyncio.to_thread(self._load, url)
+            if entry is not None:
+                self._remember(url, entry)
+        return entry
+
+    def is_fresh(self, entry) -> bool:
+        return time.time() - entry["checked_at"] < self.ttl
+
+    async def put(self, url, form_hash, fields, questions, etag=None, last_modified=None):
+        entry = {
+            "form_hash": form_hash,
+            "fields": fields,
+            "questions": questions,
+            "etag": etag,
+            "last_modified": last_modified,
+            "checked_at": time.time(),
+        }
+        self._remember(url, entry)
+        if self.persist:
+            await asyncio.to_thread(self._save, url, entry)
+        return entry
+
+    # 🔁 Marks an entry as freshly validated without touching its content
+    async def touch(self, url, entry):
+        entry["checked_at"] = time.time()
+        self._remember(url, entry)
+        if self.persist:
+            await asyncio.to_thread(self._save, url, entry)
+
+    # 📡 Conditional HEAD: True if the server says the page is unchanged (304 or same ETag)
+    async def revalidate(self, url, entry) -> bool:
+        if not entry.get("etag") and not entry.get("last_modified"):
+            return False
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            resp = await asyncio.to_thread(
+                requests.head, url, headers=headers, timeout=HEAD_TIMEOUT, allow_redirects=True
+            )
+        except Exception as e:
+            logger.info("Revalidation HEAD for %s failed: %s", url, e)
+            return False
+        unchanged = resp.status_code == 304 or (
+            entry.get("etag") is not None and resp.headers.get("ETag") == entry["etag"]
+        )
+        if unchanged:
+            await self.touch(url, entry)
+        return unchanged
+
+    def _remember(self, url, entry):
+        self._entries[url] = entry
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, url):
+        db = SessionLocal()
+        try:
+            row = db.get(FormSchemaEntry, url)
+            if row is None:
+                return None
+            return {
+                "form_hash": row.form_hash,
+                "fields": json.loads(row.fields_json),
+                "questions": json.loads(row.questions_json),
+                "etag": row.etag,
+                "last_modified": row.last_modified,
+                "checked_at": row.checked_at,
+            }
+        except Exception as e:
+            logger.warning("Form cache load failed for %s: %s", url, e)
+            return None
+        finally:
+            db.close()
+
+    def _save(self, url, entry):
+        db = SessionLocal()
+        try:
+            db.merge(FormSchemaEntry(
+                url=url,
+                form_hash=entry["form_hash"],
+                etag=entry["etag"],
+                last_modified=entry["last_modified"],
+                fields_json=json.dumps(entry["fields"]),
+                questions_json=json.dumps(entry["questions"]),
+                checked_at=entry["checked_at"],
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning("Form cache save failed for %s: %s", url, e)
+        finally:
+            db.close()
+
+
+form_cache = FormCache()
@@ -0,0 +1,344 @@
+import aiohttp
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from http.cookies import CookieError, SimpleCookie
+from urllib.parse import urlsplit, urlunsplit
+from yarl import URL
+from parser import static_form_from_html, form_submission_meta, choice_key
+
+logger = logging.getLogger(__name__)
+
+# "auto": plain server-rendered forms go straight over HTTP, scripted ones through
+# the browser; "browser": always fill and submit in Playwright
+SUBMIT_MODE = os.getenv("SUBMIT_MODE", "auto")
+SUBMIT_HTTP_TIMEOUT = float(os.getenv("SUBMIT_HTTP_TIMEOUT", "15"))
+# Keep-alive HTTP connections shared by all direct submissions
+SUBMIT_HTTP_POOL_SIZE = int(os.getenv("SUBMIT_HTTP_POOL_SIZE", "32"))
+# Analysis-time snapshots older than this are re-fetched (CSRF tokens and cookies expire)
+SUBMIT_SNAPSHOT_TTL = float(os.getenv("SUBMIT_SNAPSHOT_TTL", "900"))
+# Spoken answers that tick a lone checkbox (same list as FILL_FORM_JS)
+CHECKED_ANSWERS = {"true", "yes", "1", "on"}
+
+# Upper bound on waiting for the page to react to submission (navigation or a POST response)
+SUBMIT_WAIT_TIMEOUT = float(os.getenv("SUBMIT_WAIT_TIMEOUT", "10"))
+# After that signal, how long to let in-flight requests settle
+SUBMIT_SETTLE_TIMEOUT = float(os.getenv("SUBMIT_SETTLE_TIMEOUT", "3"))
+
+# 🧩 Locates the target form (same rule as analysis: most controls, shadow roots
+# included) and fills every entry in one call. Values go through the native
+# setters plus input/change events so framework-controlled inputs see them.
+# Returns {filled: [names], missing: [names]}.
+FILL_FORM_JS = """
+(entries) => {
+    const forms = [];
+    const walk = (root) => {
+        for (const el of root.querySelectorAll('*')) {
+            if (el.tagName === 'FORM') forms.push(el);
+            if (el.shadowRoot) walk(el.shadowRoot);
+        }
+    };
+    walk(document);
+    let form = null, best = -1;
+    for (const f of forms) {
+        const n = f.querySelectorAll('input, select, textarea').length;
+        if (n > best) { best = n; form = f; }
+    }
+    const scope = form || document;
+    window.__formAssistantForm = form;
+
+    // Compare case- and whitespace-insensitively (analysis joins label text without spaces)
+    const norm = (s) => String(s || '').replace(/\\s+/g, '').toLowerCase();
+    const labelOf = (el) => norm(el.labels && el.labels.length ? el.labels[0].textContent : '');
+    const fire = (el) => {
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+    };
+    const setValue = (el, value) => {
+        const proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+        Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+        fire(el);
+    };
+    const check = (el, on) => {
+        if (el.checked !== on) el.click();
+        if (el.checked !== on) { el.checked = on; fire(el); }
+    };
+    const matches = (el, wanted) => wanted.has(norm(el.value)) || wanted.has(labelOf(el));
+    const byId = (id) => id ? scope.querySelector('#' + CSS.escape(id)) : null;
+
+    const filled = [], missing = [];
+    for (const {name, value, tag, type, id} of entries) {
+        let group = Array.from(scope.querySelectorAll('[name="' + CSS.escape(name) + '"]'));
+        if (!group.length) {
+            const el = byId(id) || byId(name);
+            group = el ? [el] : [];
+        }
+        const el = group[0];
+        if (!el) { missing.push(name); continue; }
+        const kind = el.tagName === 'SELECT' ? 'select' : (el.getAttribute('type') || type || 'text').toLowerCase();
+        const text = String(value);
+        if (kind === 'select') {
+            const wanted = new Set(text.split(',').map(norm));
+            let hit = false;
+            for (const option of el.options) {
+                const on = wanted.has(norm(option.value)) || wanted.has(norm(option.text));
+                if (on && (el.multiple || !hit)) { option.selected = true; hit = true; }
+                else if (el.multiple) option.selected = false;
+            }
+            if (!hit) { missing.push(name); continue; }
+            fire(el);
+        } else if (kind === 'radio') {
+            const wanted = new Set([norm(text)]);
+            const target = group.find(r => matches(r, wanted));
+            if (!target) { missing.push(name); continue; }
+            check(target, true);
+        } else if (kind === 'checkbox') {
+            if (group.length > 1) {
+                const wanted = new Set(text.split(',').map(norm));
+                let hit = false;
+                for (const cb of group) {
+                    const on = matches(cb, wanted);
+                    hit = hit || on;
+                    check(cb, on);
+                }
+                if (!hit) { missing.push(name); continue; }
+            } else {
+                check(el, ['true', 'yes', '1', 'on'].includes(norm(text)) || matches(el, new Set([norm(text)])));
+            }
+        } else if (kind === 'file' || kind === 'submit' || kind === 'button') {
+            missing.push(name);
+            continue;
+        } else {
+            setValue(el, text);
+        }
+        filled.push(name);
+    }
+    return {filled, missing};
+}
+"""
+
+# 🚀 Submits the form found by FILL_FORM_JS the way a user would (submit event,
+# constraint validation, the real submit button as submitter). Deferred with
+# setTimeout so this evaluate returns before any navigation tears down the page.
+SUBMIT_FORM_JS = """
+() => {
+    const form = window.__formAssistantForm || document.querySelector('form');
+    if (!form) return false;
+    const submitter = form.querySelector('[type="submit"], button:not([type])');
+    setTimeout(() => {
+        if (form.requestSubmit) form.requestSubmit(submitter || undefined);
+        else if (submitter) submitter.click();
+        else form.submit();
+    }, 0);
+    return true;
+}
+"""
+
+
+# 🗂️ One entry per submitted field, enriched with the analysis-time schema (tag/type/id)
+def build_fill_entries(form_data, fields=None):
+    schema = {f.get("name"): f for f in fields or [] if f.get("name")}
+    entries = []
+    for name, value in form_data.items():
+        field = schema.get(name, {})
+        entries.append({
+            "name": name,
+            "value": "" if value is None else str(value),
+            "tag": field.get("tag", ""),
+            "type": field.get("type", ""),
+            "id": field.get("id", ""),
+        })
+    return entries
+
+
+# ⏳ Resolves when the page reacts to the submission: a main-frame navigation or a
+# non-GET response (AJAX forms), then briefly waits for the network to go idle.
+async def wait_for_submission(page, trigger, timeout=SUBMIT_WAIT_TIMEOUT):
+    navigated = asyncio.ensure_future(page.wait_for_event(
+        "framenavigated", predicate=lambda frame: frame == page.main_frame, timeout=timeout * 1000
+    ))
+    responded = asyncio.ensure_future(page.wait_for_event(
+        "response", predicate=lambda resp: resp.request.method != "GET", timeout=timeout * 1000
+    ))
+    waiters = (navigated, responded)
+    try:
+        await trigger()
+        done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        reacted = any(not w.exception() for w in done)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+    if reacted:
+        with contextlib.suppress(Exception):
+            await page.wait_for_load_state("networkidle", timeout=SUBMIT_SETTLE_TIMEOUT * 1000)
+    return reacted
+
+
+# 📝 Fill everything in one evaluate, submit, and wait for a real signal
+async def fill_and_submit(page, form_data, fields=None):
+    result = await page.evaluate(FILL_FORM_JS, build_fill_entries(form_data, fields))
+    for name in result["missing"]:
+        logger.warning(f"Could not fill field: {name}")
+
+    async def submit():
+        if not await page.evaluate(SUBMIT_FORM_JS):
+            raise RuntimeError("No form found to submit")
+
+    reacted = await wait_for_submission(page, submit)
+    if not reacted:
+        logger.info("No navigation or POST response within %ss of submitting", SUBMIT_WAIT_TIMEOUT)
+    return result
+
+
+# 📦 The (name, value) pairs a browser would send: the form's defaults (hidden
+# inputs, prefilled and pre-checked controls) overridden by the answers, with
+# option labels mapped back to their submitted values, plus the submit button.
+def build_direct_payload(snapshot, form_data):
+    pairs = [(name, value) for name, value in snapshot["defaults"] if name not in form_data]
+    for name, value in form_data.items():
+        text = "" if value is None else str(value)
+        choice = snapshot["choices"].get(name)
+        if choice is None:
+            pairs.append((name, text))
+            continue
+        options = choice["options"]
+        if choice["kind"] == "checkbox" and not choice["multiple"]:
+            key = choice_key(text)
+            if key in options:
+                pairs.append((name, options[key]))
+            elif key in CHECKED_ANSWERS:
+                pairs.append((name, next(iter(options.values()), "on")))
+            continue
+        for part in text.split(",") if choice["multiple"] else [text]:
+            key = choice_key(part)
+            if key:
+                pairs.append((name, options.get(key, part.strip())))
+    if snapshot["submitter"]:
+        pairs.append(tuple(snapshot["submitter"]))
+    return pairs
+
+
+def response_cookies(resp):
+    cookies = {}
+    for r in (*resp.history, resp):
+        cookies.update({key: morsel.value for key, morsel in r.cookies.items()})
+    return cookies
+
+
+# 🍪 Per-submission jar holding the analysis-time cookies as host-only cookies of the
+# page that set them, so aiohttp decides which request (and redirect hop) gets them
+def snapshot_cookie_jar(snapshot, fallback_url):
+    jar = aiohttp.CookieJar(unsafe=True)  # unsafe: also keep cookies of IP-addressed hosts
+    cookies = SimpleCookie()
+    for name, value in (snapshot.get("cookies") or {}).items():
+        try:
+            cookies[name] = value
+        except CookieError:
+            logger.info("Skipping unusable cookie %r from the form snapshot", name)
+            continue
+        cookies[name]["path"] = "/"
+    if cookies:
+        jar.update_cookies(cookies, response_url=URL(snapshot.get("page_url") or fallback_url))
+    return jar
+
+
+# 📨 Browserless submission for server-rendered forms: one request to the form's
+# action with the method/enctype and cookies captured at analysis time. Shares one
+# aiohttp connection pool; the pooled session's cookie jar is disabled so users never
+# share cookies, and each submission gets a short-lived session with its own jar.
+class DirectSubmitter:
+    def __init__(self, timeout: float = SUBMIT_HTTP_TIMEOUT, pool_size: int = SUBMIT_HTTP_POOL_SIZE):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = None
+        self._loop = None
+
+    # 🔌 Lazily (re)creates the pooled session for the running event loop
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                cookie_jar=aiohttp.DummyCookieJar(),
+                headers={"User-Agent": "Mozilla/5.0 (compatible; FormAssistant/1.0)"},
+            )
+            self._loop = loop
+        return self._session
+
+    # 🍪 Short-lived session on the pooled connector, carrying one submission's cookies
+    def _request_session(self, cookie_jar):
+        pooled = self._bind_loop()
+        return aiohttp.ClientSession(
+            connector=pooled.connector,
+            connector_owner=False,
+            timeout=pooled.timeout,
+            cookie_jar=cookie_jar,
+            headers=pooled.headers,
+        )
+
+    # 🔄 Fresh form metadata and cookies when analysis didn't leave a usable snapshot
+    async def snapshot(self, url):
+        async with self._bind_loop().get(url) as resp:
+            if resp.status != 200 or "html" not in resp.headers.get("Content-Type", ""):
+                return None
+            html = await resp.text()
+            page_url, cookies = str(resp.url), response_cookies(resp)
+        form_html = static_form_from_html(html)
+        return form_submission_meta(form_html, page_url, cookies) if form_html else None
+
+    # 🚀 Returns {"final_url", "status"} once the site accepted the submission, or None
+    # when the form must go through the browser (scripted form, rejected request,
+    # unreachable host). Server errors raise: the request may already have been processed.
+    async def submit(self, target_url, form_data, snapshot=None):
+        try:
+            if snapshot is None or time.time() - snapshot.get("captured_at", 0) > SUBMIT_SNAPSHOT_TTL:
+                snapshot = await self.snapshot(target_url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.info("Could not fetch %s for direct submission (%s); using the browser", target_url, e)
+            return None
+        if not snapshot or not snapshot["direct"]:
+            reason = snapshot["reason"] if snapshot else "form not in static HTML"
+            logger.info("Direct submission unavailable for %s (%s); using the browser", target_url, reason)
+            return None
+
+        pairs = build_direct_payload(snapshot, form_data)
+        headers = {"Referer": target_url}
+        session = self._request_session(snapshot_cookie_jar(snapshot, target_url))
+        if snapshot["method"] == "get":
+            # Browsers replace the action's query string with the form data
+            action = urlunsplit(urlsplit(snapshot["action"])._replace(query="", fragment=""))
+            request = session.get(action, params=pairs, headers=headers)
+        elif snapshot["enctype"] == "multipart/form-data":
+            body = aiohttp.MultipartWriter("form-data")
+            for name, value in pairs:
+                body.append(value).set_content_disposition("form-data", name=name)
+            request = session.post(snapshot["action"], data=body, headers=headers)
+        else:
+            request = session.post(snapshot["action"], data=aiohttp.FormData(pairs), headers=headers)
+        try:
+            async with session, request as resp:
+                await resp.read()
+                status, final_url = resp.status, str(resp.url)
+        except aiohttp.ClientConnectorError as e:
+            logger.info("Direct submission to %s failed to connect (%s); using the browser", snapshot["action"], e)
+            return None
+        if status >= 500:
+            raise RuntimeError(f"Server responded with HTTP {status}")
+        if status >= 400:
+            logger.info("Direct submission to %s got HTTP %d; retrying in the browser", snapshot["action"], status)
+            return None
+        logger.info("Submitted %s directly over HTTP (%s, HTTP %d)", target_url, snapshot["method"].upper(), status)
+        return {"final_url": final_url, "status": status}
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+direct_submitter = DirectSubmitter()
@@ -2,98 +2,214 @@ import openai
 import os
 from dotenv import load_dotenv
 from fastapi import HTTPException
-import re
+import json
+import asyncio
+from question_cache import question_cache
+from llm_client import llm_client
 
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-# 🎤 This function uses GPT to generate natural, friendly questions for each form field.
-def generate_questions(fields):
-    questions = []
-
-    for field in fields:
-        label = field.get("label") or field.get("name", "")
-        name = field.get("name", "")
-        ftype = field.get("type", "")
-        tag = field.get("tag", "")
-        options = field.get("options", [])
-
-        if not name or not label:
-            continue
-        
-        prompt = (
-                f"You're a friendly voice assistant. Write a casual, natural-sounding question "
-                f"to ask the user for this form field:\n"
-                f"- Label: \"{label}\"\n"
-                f"- Type: \"{ftype or tag}\"\n"
-            )
-        if options:
-            clean_options = [opt.strip() for opt in options if opt and "select" not in opt.lower()]
-            if clean_options:
-                prompt += f'- Options: {", ".join(clean_options)}\n'
-                prompt += (
-                    'Include all the options clearly and naturally in the question.\n'
-                )
+# Bump whenever the question prompts change so cached templates are regenerated
+PROMPT_VERSION = "1"
+
+# Strategy for question generation: "batch" (one JSON request per chunk of fields)
+# or "per_field" (one request per field, the original behaviour)
+QUESTION_MODE = os.getenv("QUESTION_MODE", "batch")
+# Fields per batched request and max batched requests in flight (async mode)
+QUESTION_BATCH_SIZE = int(os.getenv("QUESTION_BATCH_SIZE", "25"))
+QUESTION_CONCURRENCY = int(os.getenv("QUESTION_CONCURRENCY", "4"))
+
+QUESTION_STYLE_RULES = (
+    "Avoid robotic phrases like 'please enter'. "
+    "Do not use filler phrases like 'when you get a chance', 'if you can', or 'so I can help you'. "
+    "Sound like a clear, polite form assistant — efficient but friendly. "
+    "No question mark at the end. No numbering.\n"
+)
+
+
+# 🏷️ Returns (label, type, cleaned options) for fields that need a question, else None
+def describe_field(field):
+    label = field.get("label") or field.get("name", "")
+    name = field.get("name", "")
+    if not name or not label:
+        return None
+    ftype = field.get("type", "") or field.get("tag", "")
+    options = field.get("options", []) or []
+    clean_options = [opt.strip() for opt in options if opt and "select" not in opt.lower()]
+    return label, ftype, clean_options
 
+
+# ✍️ Builds the single-field prompt used by the per-field mode
+def build_question_prompt(label, ftype, clean_options):
+    prompt = (
+            f"You're a friendly voice assistant. Write a casual, natural-sounding question "
+            f"to ask the user for this form field:\n"
+            f"- Label: \"{label}\"\n"
+            f"- Type: \"{ftype}\"\n"
+        )
+    if clean_options:
+        prompt += f'- Options: {", ".join(clean_options)}\n'
         prompt += (
-           "Avoid robotic phrases like 'please enter'. "
-            "Do not use filler phrases like 'when you get a chance', 'if you can', or 'so I can help you'. "
-            "Sound like a clear, polite form assistant — efficient but friendly. "
-            "No question mark at the end. No numbering.\n"
+            'Include all the options clearly and naturally in the question.\n'
         )
+    prompt += QUESTION_STYLE_RULES
+    return prompt
+
+
+# ✍️ Builds one prompt asking for every field's question as a JSON object
+def build_batch_prompt(described):
+    prompt = (
+        "You're a friendly voice assistant. For each form field below, write a casual, "
+        "natural-sounding question to ask the user. When a field lists options, include all "
+        "of them clearly and naturally in its question.\n"
+    )
+    prompt += QUESTION_STYLE_RULES
+    prompt += "Fields:\n"
+    for i, (label, ftype, clean_options) in enumerate(described):
+        line = f'{i}. Label: "{label}"; Type: "{ftype}"'
+        if clean_options:
+            line += f'; Options: {", ".join(clean_options)}'
+        prompt += line + "\n"
+    prompt += (
+        'Respond with JSON only, in the form '
+        '{"questions": [{"id": <field number>, "question": "<question text>"}]}'
+    )
+    return prompt
+
+
+def _batch_request(described):
+    return dict(
+        model="gpt-4.1-mini",
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": build_batch_prompt(described)}
+        ],
+        temperature=0.4,
+        max_tokens=60 * len(described) + 20,
+        response_format={"type": "json_object"},
+    )
+
+
+# 🧩 Maps a batched JSON reply back onto the fields; any field missing or
+# malformed in the reply falls back to its label
+def parse_batch_questions(content, described):
+    by_id = {}
+    try:
+        data = json.loads(content)
+        items = data.get("questions", []) if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            raise ValueError(f"expected a list of questions, got {type(items).__name__}")
+    except Exception as e:
+        print(f"❌ Could not parse batched questions: {e}")
+        items = []
+    # One bad item only costs its own field
+    for item in items:
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4.1-mini",  # Use "gpt-4" or "gpt-3.5-turbo" if needed
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.4,
-                max_tokens=50
-            )
-            question = response['choices'][0]['message']['content'].strip().rstrip("?")
-            questions.append(question)
+            question = str(item.get("question", "")).strip().rstrip("?")
+            if question:
+                by_id[int(item.get("id"))] = question
         except Exception as e:
-            print(f"❌ Error for field '{name}': {e}")
-            questions.append(f"{label}")
+            print(f"❌ Skipping malformed batched question {item!r}: {e}")
+    return [by_id.get(i, label) for i, (label, _, _) in enumerate(described)]
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
 
+
+# 🗃️ Splits fields into cached questions and the ones that still need the LLM.
+# Returns (keys, questions-with-None-for-misses, indexes of misses).
+async def _lookup_cached_questions(described):
+    keys = [question_cache.key(label, ftype, opts, PROMPT_VERSION) for label, ftype, opts in described]
+    questions = await question_cache.get_many(keys)
+    pending = [i for i, q in enumerate(questions) if q is None]
+    return keys, questions, pending
+
+
+# 💾 Merges freshly generated questions in and stores them (label fallbacks are not cached)
+async def _store_generated_questions(described, keys, questions, pending, generated):
+    to_store = {}
+    for i, question in zip(pending, generated):
+        questions[i] = question
+        if question and question != described[i][0]:
+            to_store[keys[i]] = question
+    await question_cache.put_many(to_store)
+    return questions
+
+
+# 🎤 This function uses GPT to generate natural, friendly questions for each form field.
+# Synchronous entry point for scripts; inside the app use generate_questions_async.
+def generate_questions(fields, mode=None):
+    return asyncio.run(generate_questions_async(fields, mode))
+
+
+# 🎤 One GPT call for a single field (per-field mode)
+async def generate_question_for_field(label, ftype, clean_options):
+    try:
+        response = await llm_client.chat(
+            model="gpt-4.1-mini",  # Use "gpt-4" or "gpt-3.5-turbo" if needed
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": build_question_prompt(label, ftype, clean_options)}
+            ],
+            temperature=0.4,
+            max_tokens=50
+        )
+        return response['choices'][0]['message']['content'].strip().rstrip("?")
+    except Exception as e:
+        print(f"❌ Error for field '{label}': {e}")
+        return f"{label}"
+
+
+# ⚡ Batch mode sends fields in structured requests of batch_size that run
+# concurrently (bounded by QUESTION_CONCURRENCY), so latency stays roughly flat;
+# per-field mode keeps one call per field. Cached questions skip the LLM entirely.
+async def generate_questions_async(fields, mode=None, batch_size=QUESTION_BATCH_SIZE,
+                                   concurrency=QUESTION_CONCURRENCY):
+    described = [d for d in (describe_field(f) for f in fields) if d]
+    if not described:
+        return []
+    keys, questions, pending = await _lookup_cached_questions(described)
+    if pending:
+        generated = await _generate_uncached(
+            [described[i] for i in pending], mode, batch_size, concurrency
+        )
+        await _store_generated_questions(described, keys, questions, pending, generated)
     return questions
 
 
-# 🧹 This function normalizes raw speech-to-text transcripts based on the expected field type.
-# For email: replaces 'at', 'dot' with '@' and '.' and extracts valid pattern.
-# For phone: strips non-digits and returns 10-digit Indian number with +91 prefix.
-def normalize_transcript(text, field_name):
-    text = text.lower().strip()
+async def _generate_uncached(described, mode, batch_size, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
 
-    if 'email' in field_name.lower():
-        if ' at ' in text:
-            text = text.replace(' at ', '@')
-        if ' dot ' in text:
-            text = text.replace(' dot ', '.')
-        if ' gmail' in text and '@' not in text:
-            text = text.replace(' gmail', '@gmail.com')
-        # Extract actual email
-        match = re.search(r'\b[\w.-]+@[\w.-]+\.\w+\b', text)
-        if match:
-            return match.group(0)
+    if (mode or QUESTION_MODE) == "per_field":
+        async def run_field(d):
+            async with semaphore:
+                return await generate_question_for_field(*d)
+        return list(await asyncio.gather(*(run_field(d) for d in described)))
 
-    if 'phone' in field_name.lower():
-        digits = re.sub(r'\D', '', text)
-        if len(digits) >= 10:
-            return '+91' + digits[-10:]
+    async def run_chunk(chunk):
+        async with semaphore:
+            try:
+                response = await llm_client.chat(**_batch_request(chunk))
+                content = response['choices'][0]['message']['content']
+                return parse_batch_questions(content, chunk)
+            except Exception as e:
+                print(f"❌ Batched question generation failed: {e}")
+                return [label for label, _, _ in chunk]
 
-    return None  # fallback to GPT
+    results = await asyncio.gather(*(run_chunk(c) for c in _chunks(described, batch_size)))
+    return [q for chunk_questions in results for q in chunk_questions]
 
 
 # 🤖 This function uses GPT to extract the exact field value from user's spoken response.
 # It returns only the value — no greetings, no explanation — just the clean answer.
-def extract_answer_from_gpt(field_name, prompt):
+async def extract_answer_from_gpt(field_name, prompt):
     """
     Extracts the answer for a given field from the response using GPT.
     """
     try:
-        completion = openai.ChatCompletion.create(
+        completion = await llm_client.chat(
             model="gpt-4.1-mini",  
             messages=[
                 {"role": "system", "content":  "You are a helpful assistant. "
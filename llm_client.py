@@ -0,0 +1,82 @@
+import openai
+import aiohttp
+import asyncio
+import logging
+import os
+import random
+
+logger = logging.getLogger(__name__)
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "15"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+# Max completions in flight across the whole process
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+# Keep-alive HTTP connections shared by all completions
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "32"))
+LLM_BACKOFF_BASE = 0.5
+LLM_BACKOFF_CAP = 8.0
+
+# Transient failures worth retrying; auth/validation errors are raised immediately
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+    openai.error.Timeout,
+    openai.error.TryAgain,
+    openai.error.APIError,
+    asyncio.TimeoutError,
+    aiohttp.ClientError,
+)
+
+
+# 🤖 Non-blocking OpenAI client shared by question generation and answer extraction.
+# Reuses one pooled aiohttp session, bounds concurrency, enforces a timeout and
+# retries transient errors with exponential backoff + full jitter.
+class AsyncLLMClient:
+    def __init__(self, timeout: float = LLM_TIMEOUT, max_retries: int = LLM_MAX_RETRIES,
+                 concurrency: int = LLM_CONCURRENCY, pool_size: int = LLM_POOL_SIZE):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.concurrency = concurrency
+        self.pool_size = pool_size
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+
+    # 🔌 Lazily (re)creates the pooled session for the running event loop
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._session
+
+    async def chat(self, **params):
+        session = self._bind_loop()
+        openai.aiosession.set(session)
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    return await asyncio.wait_for(
+                        openai.ChatCompletion.acreate(request_timeout=self.timeout, **params),
+                        self.timeout,
+                    )
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(LLM_BACKOFF_CAP, LLM_BACKOFF_BASE * 2 ** attempt))
+                logger.warning("LLM call failed (%s); retry %d in %.2fs", e, attempt + 1, delay)
+                await asyncio.sleep(delay)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+llm_client = AsyncLLMClient()
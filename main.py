@@ -1,25 +1,32 @@
 from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect, Request, Response
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, HttpUrl
 from sqlalchemy.orm import Session
-from google.cloud import texttospeech
-from datetime import datetime
-from typing import Dict
-import logging, os, re, traceback, asyncio, audioop
-from playwright.async_api import async_playwright
-import inflect, re
-from number_parser import parse_ordinal
-from dateutil import parser
-from gpt_integration import generate_questions, extract_answer_from_gpt, normalize_transcript
-from stt import transcribe_streaming
+import logging, os, re, traceback, asyncio, contextlib
+from gpt_integration import generate_questions_async
+from answer_extraction import answer_extractor
+from answer_handlers import AnswerState, FieldSpec, Outcome, get_handler, FILL, RETRY
+from option_index import get_option_index
+from audio_buffer import AudioRingBuffer
+from audio_codec import build_decoder, negotiate_codec, parse_hello, PCM_CODEC
+from vad import VoiceActivityDetector
+from audio_stream import AudioStreamMetrics, enqueue_frame, log_task_failure, AUDIO_QUEUE_MAX_FRAMES
+from stt import transcribe_streaming, open_recognizer
 from db import SessionLocal
 from models import ErrorLog, Base
-from email_utils import normalize_email, extract_possible_email, looks_like_email
-from parser import extract_shadow_form, extract_normal_form, extract_fields_from_html
-
-# Global form session state
-session_state: Dict[str, list] = {}
+from parser import extract_form_snapshot, extract_fields_from_html
+from browser_pool import browser_pool
+from form_submit import fill_and_submit, direct_submitter, SUBMIT_MODE
+from tts import tts_cache, tts_cache_key, stream_synthesis, MEDIA_TYPES
+from session_manager import session_manager
+from llm_client import llm_client
+from question_cache import question_cache
+from form_cache import form_cache, normalize_url, hash_form_html, fetch_validators
+
+# Strong references to fire-and-forget tasks (asyncio only keeps weak ones)
+background_tasks = set()
 
 # Logging setup
 logging.basicConfig(level=logging.INFO)
@@ -36,9 +43,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Auto-create DB tables if SQLite file doesn't exist
-if not os.path.exists("form_logs.db"):
-    Base.metadata.create_all(bind=SessionLocal().bind)
+# Auto-create missing DB tables (create_all skips tables that already exist)
+Base.metadata.create_all(bind=SessionLocal().bind)
+
+# 🌐 Warm the shared Chromium pool once so analyze/submit never pay a cold launch
+@app.on_event("startup")
+async def start_browser_pool():
+    await browser_pool.start()
+
+# 🧹 Background sweep that drops idle form sessions
+@app.on_event("startup")
+async def start_session_expiry():
+    background_tasks.add(asyncio.create_task(session_manager.run_expiry_loop()))
+
+@app.on_event("shutdown")
+async def stop_browser_pool():
+    await browser_pool.stop()
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm_client.close()
+
+@app.on_event("shutdown")
+async def close_direct_submitter():
+    await direct_submitter.close()
 
 class URLRequest(BaseModel):
     url: HttpUrl
@@ -52,6 +80,19 @@ def get_db():
     finally:
         db.close()
 
+# 🔊 Builds a TTS response from the content-addressed audio cache.
+# The ETag is the cache key, so a matching If-None-Match is answered without synthesis.
+async def tts_response(text: str, request: Request):
+    etag = f'"{tts_cache_key(text)}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    audio, key = await tts_cache.get_or_synthesize(text)
+    if key is None:
+        # Fallback-engine audio: don't let browsers keep it under the primary's ETag
+        headers = {"Cache-Control": "no-store"}
+    return Response(audio, media_type="audio/mpeg", headers=headers)
+
 # 🔊 Google Cloud TTS endpoint: converts text to speech using en-IN Wavenet-D voice
 @app.post("/tts-audio")
 async def tts_audio(request: Request):
@@ -59,369 +100,248 @@ async def tts_audio(request: Request):
     text = data.get("text")
     if not text:
         return {"error": "No text provided"}
-    client = texttospeech.TextToSpeechClient()
-    synthesis_input = texttospeech.SynthesisInput(text=text)
-    voice = texttospeech.VoiceSelectionParams(language_code="en-IN", name="en-IN-Wavenet-D")
-    audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
-    response = client.synthesize_speech(input=synthesis_input, voice=voice, audio_config=audio_config)
-    return Response(response.audio_content, media_type="audio/mpeg")
-
-# 🔇 Detects if the last portion of the audio is silent based on RMS energy
-# Used to decide if user has finished speaking in WebSocket STT
-def detect_silence_at_end(audio_data: bytes, sample_rate=16000, silence_threshold=500, window_ms=300):
-    window_size = int(sample_rate * (window_ms / 1000.0)) * 2  
-    if len(audio_data) < window_size:
-        return False 
-
-    last_window = audio_data[-window_size:]
-    rms = audioop.rms(last_window, 2)
-    print(f"🔍 End-window RMS: {rms}")
-    return rms < silence_threshold
-
-
-# ⏰ Parses spoken time expressions like "3 pm", "14:00", "noon" into HH:MM 24-hour format
-# Used when field type is "time"
-def parse_spoken_time(text):
-    # Lowercase and strip
-    text = text.lower().strip()
-    # Replace "in the morning"/"in the evening"/etc. for easier parsing
-    text = text.replace("in the morning", "am").replace("in the evening", "pm").replace("at night", "pm").replace("noon", "12:00 pm")
-    # Replace "hours" with ":00"
-    text = re.sub(r"(\d{1,2})\s*hours?", r"\1:00", text)
-    # Replace "am"/"pm" attached
-    text = re.sub(r"(\d{1,2})\s*([ap]m)", r"\1:00 \2", text)
-    # Convert to a known datetime format
-    patterns = [
-        "%I %p",         # 7 pm
-        "%I:%M %p",      # 7:30 pm
-        "%H:%M",         # 15:30
-        "%I",            # 7
-        "%H",            # 21
-        "%I%p",          # 7pm
-        "%H%M",          # 1530
-    ]
-    for pat in patterns:
-        try:
-            dt = datetime.strptime(text, pat)
-            return dt.strftime("%H:%M")
-        except Exception:
-            pass
-    # Try extracting numbers and guessing
-    match = re.search(r'(\d{1,2})[:. ]?(\d{2})?\s*([ap]m)?', text)
-    if match:
-        hour = int(match.group(1))
-        minute = int(match.group(2)) if match.group(2) else 0
-        ampm = match.group(3)
-        if ampm == "pm" and hour < 12:
-            hour += 12
-        if ampm == "am" and hour == 12:
-            hour = 0
-        return f"{hour:02}:{minute:02}"
-    return ""  # fallback
-
-
-p = inflect.engine()
-
-# 🧹 Cleans a date string by removing dots and extra spaces.
-# Example: "12. July  2023" → "12 July 2023"
-def clean_date_str(s):
-    return re.sub(r'[.]', '', s).replace('  ', ' ').strip()
-
-
-# 🔢 Replaces ordinal words like 'first', 'second', 'twenty-third' with numeric values (1, 2, 23)
-# This helps the parser understand spoken dates like "twenty fifth July"
-def replace_ordinals(text):
-    words = text.lower().replace('-', ' ').split()
-    new_words = []
-    for word in words:
-        try:
-            num = parse_ordinal(word)
-            new_words.append(str(num))
-        except Exception:
-            new_words.append(word)
-    return ' '.join(new_words)
-
-# 📅 Parses a fuzzy, spoken-style date string (e.g., "fifth of July") into ISO format YYYY-MM-DD
-# Returns "" if parsing fails
-def parse_spoken_date(text):
-    try:
-        dt = parser.parse(text, fuzzy=True, dayfirst=True)
-        return dt.strftime('%Y-%m-%d')
-    except Exception as e:
-        print("Date parse failed:", text, e)
-        return ""
-
-# 🔁 Matches user transcript with one of the predefined options (radio/checkbox)
-# Returns the matched option string if found
-def match_spoken_option(transcript, options):
-    transcript = transcript.lower().strip()
-    options = [str(opt).lower().strip() for opt in options]
-    for opt in options:
-        if opt in transcript or transcript in opt:
-            return opt
-    return None
+    return await tts_response(text, request)
+
+# 🔊 Cacheable GET variant so browsers can keep and revalidate question audio
+@app.get("/tts-audio")
+async def tts_audio_get(request: Request, text: str = ""):
+    if not text:
+        return {"error": "No text provided"}
+    return await tts_response(text, request)
+
+# ✅ Lets the page pick the ETag-cached /tts-audio for clips that are already synthesized
+@app.get("/tts-cached")
+async def tts_cached(text: str = ""):
+    return {"cached": bool(text) and tts_cache.contains(text)}
+
+# 🌊 Streaming TTS: sentences are synthesized concurrently and sent as they are ready,
+# so playback starts after the first sentence. format: "mp3" (default) or "ogg" (Opus)
+@app.get("/tts-stream")
+async def tts_stream(text: str = "", format: str = "mp3"):
+    if not text:
+        return {"error": "No text provided"}
+    encoding = "OGG_OPUS" if format == "ogg" else "MP3"
+    return StreamingResponse(
+        stream_synthesis(text, encoding=encoding),
+        media_type=MEDIA_TYPES[encoding],
+        headers={"Cache-Control": "no-store"},
+    )
+
+# Upper bound on buffered speech per connection (older audio is overwritten)
+AUDIO_BUFFER_SECONDS = float(os.getenv("AUDIO_BUFFER_SECONDS", "15"))
+
+# Voice activity detection: 0 (least) - 3 (most aggressive at rejecting noise)
+VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", "2"))
+# Non-speech needed before an utterance is considered finished
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "700"))
+VAD_PREROLL_BYTES = 16000 * 2 * 200 // 1000   # 200 ms kept before speech onset
+VAD_TAIL_BYTES = 16000 * 2 * 100 // 1000      # 100 ms kept after speech end
+
+# "streaming" forwards audio to a live recognizer as it arrives;
+# "buffered" transcribes each VAD-endpointed utterance in a single request
+STT_MODE = os.getenv("STT_MODE", "streaming")
 
 # 🎤 WebSocket STT handler: receives real-time audio, triggers STT,
 @app.websocket("/stt")
 async def websocket_stt(websocket: WebSocket):
     await websocket.accept()
-    audio_queue = asyncio.Queue()
-    transcript_buffer = ""
-    buffer_start_time = datetime.now()
-    last_transcript = ""
-    buffered_audio = b''
-    last_voice_time = datetime.now()
-    start_voice_time = datetime.now()
-    SILENCE_GAP = 2.0
-    phone_digit_buffer = ""
+    # Bind this socket to the form session issued by /analyze-form
+    session = await session_manager.get(websocket.query_params.get("session_id"))
+    if session is None:
+        await websocket.send_json({"type": "error", "message": "Unknown or expired session. Please re-analyze the form."})
+        await websocket.close(code=4404)
+        return
+    # Bounded: a slow consumer merges/drops frames instead of growing memory
+    audio_queue = asyncio.Queue(maxsize=AUDIO_QUEUE_MAX_FRAMES)
+    metrics = AudioStreamMetrics(session.session_id)
+    # Speech carried across utterances for the current field
+    answer_state = AnswerState()
+    # Preallocated per-connection audio; bounded to AUDIO_BUFFER_SECONDS of speech
+    buffered_audio = AudioRingBuffer.for_seconds(AUDIO_BUFFER_SECONDS)
+    # Endpointing: VAD segments close after VAD_HANGOVER_MS of non-speech;
+    # MAX_WAIT (seconds) force-flushes a long, still-open utterance
+    vad = VoiceActivityDetector(aggressiveness=VAD_AGGRESSIVENESS, hangover_ms=VAD_HANGOVER_MS)
+    utterance_segments = []
     MAX_WAIT = 6.0
 
-    # 🧠 Background task to process buffered audio and call STT when silence or timeout is detected
+    # ✂️ Zero-copy view of the buffered audio covering [start_sample, end_sample)
+    # (absolute VAD positions) plus a little pre-roll/tail
+    def utterance_view(start_sample, end_sample):
+        origin = vad.samples_received - len(buffered_audio) // 2
+        start = max(0, (start_sample - origin) * 2 - VAD_PREROLL_BYTES)
+        end = (end_sample - origin) * 2 + VAD_TAIL_BYTES
+        return buffered_audio.view(start, end)
+
+    # 🧠 Background task: awaits each queued frame (no polling), runs VAD on it and
+    # calls STT once speech has ended (or MAX_WAIT is exceeded). Silence is never sent.
     async def process_audio():
-        nonlocal buffered_audio, start_voice_time, last_transcript,last_voice_time
+        nonlocal utterance_segments
         while True:
-            if not audio_queue.empty():
-                audio_data = await audio_queue.get()
-                buffered_audio += audio_data
-
-                rms = audioop.rms(audio_data, 2)
-
-                # Update last voice time if speaking
-                if rms > 200:
-                    last_voice_time = datetime.now()
-
-                now = datetime.now()
-                time_since_last_voice = (now - last_voice_time).total_seconds()
-                total_speaking_time = (now - start_voice_time).total_seconds()
-
-                # 🧠 Check if silence or max duration exceeded
-                min_bytes = 51200       
-                if (
-                    len(buffered_audio) >= min_bytes and (
-                        time_since_last_voice > SILENCE_GAP or
-                        total_speaking_time > MAX_WAIT or
-                        detect_silence_at_end(buffered_audio, window_ms=300)
-                    )
-                ):
-                    await asyncio.sleep(0.5)
-                    if len(buffered_audio) < 4096:
-                        buffered_audio = b"\x00" * 2048 + buffered_audio
-
-                    print(f"📤 Triggering STT | Buffer Size: {len(buffered_audio)} | Time: {total_speaking_time:.2f}s")
-                    transcript = await asyncio.to_thread(transcribe_streaming,buffered_audio)
-                    if not transcript and len(buffered_audio) >= 51200:
-                        print("🔁 Empty STT — retrying once...")
-                        transcript = await asyncio.to_thread(transcribe_streaming, buffered_audio)
-                    print("📏 Sending audio of duration (ms):", len(buffered_audio) / (16000 * 2) * 1000)
-                    print("🎙️ Final Transcript:", transcript)
-                    await process_transcript(transcript)
-
-                    # Reset
-                    buffered_audio = b''
-                    start_voice_time = datetime.now()
-
-            await asyncio.sleep(0.1)
-
-    # 🧠 Processes final transcript to extract form field answers
-    # Uses normalization, fallback email/phone logic, GPT if needed, and sends result to frontend
+            audio_data = await audio_queue.get()
+            buffered_audio.append(audio_data)
+            utterance_segments += vad.process(audio_data)
+
+            speaking_for = 0.0
+            if vad.in_speech:
+                first_start = utterance_segments[0][0] if utterance_segments else vad.speech_start
+                speaking_for = (vad.samples_seen - first_start) / 16000
+            speech_ended = utterance_segments and not vad.in_speech
+            if not speech_ended and speaking_for <= MAX_WAIT:
+                continue
+
+            start = utterance_segments[0][0] if utterance_segments else vad.speech_start
+            end = vad.samples_seen if vad.in_speech else utterance_segments[-1][1]
+            audio = utterance_view(start, end)
+            print(f"📤 Triggering STT | Speech: {len(audio) / (16000 * 2) * 1000:.0f} ms")
+            metrics.stt_requests += 1
+            transcript = await asyncio.to_thread(transcribe_streaming, audio)
+            print("🎙️ Final Transcript:", transcript)
+            await process_transcript(transcript)
+
+            # Reset
+            utterance_segments = []
+            vad.reset()
+            buffered_audio.clear()
+
+    # 🧠 Routes each final transcript to the handler for the current field's type
+    # (answer_handlers registry), then fills, re-asks or keeps listening
     async def process_transcript(transcript):
-        nonlocal last_transcript, transcript_buffer, buffer_start_time,phone_digit_buffer
         final = transcript.strip()
         if not final:
             return  # Skip logging or processing for blank
-        # Append to buffer
-        transcript_buffer += " " + final
-        buffer_start_time = datetime.now()
-        current_field = session_state.get("current_field")
-        if "email" in current_field and not looks_like_email(normalize_email(transcript_buffer)):
-            print("Waiting for complete email...")
-            return
-        if "phone" in current_field and (not transcript_buffer.replace(" ", "").isdigit() or len(transcript_buffer.replace(" ", "")) < 10):
-            print(" Waiting for complete phone number...")
-            return
-        print("Final Transcript in process_transcript :", final)  # Always log final, even if short
-        extracted_answers = {}
-        current_field = session_state.get("current_field")
+        answer_state.transcript += " " + final
+        current_field = session.current_field
         if not current_field:
             return
-        question = session_state["field_questions"].get(current_field, f"Question for {current_field}")
-        field_type = session_state["field_types"].get(current_field, "text")
-        field_options = session_state["field_options"].get(current_field, [])
-        if field_type == "checkbox" and field_options:
-            # Multi-select: split transcript by "and", ",", or just space
-            spoken = final.lower().replace(" and ", ",").replace(" & ", ",")
-            user_choices = [opt.strip() for opt in spoken.split(",") if opt.strip()]
-            matched_options = []
-            for choice in user_choices:
-                for opt in field_options:
-                    if choice in opt.lower() or opt.lower() in choice:
-                        matched_options.append(opt)
-            if matched_options:
-                answer = ",".join(matched_options)
-                extracted_answers[current_field] = {"question": question, "answer": answer}
-                await websocket.send_json({
-                    "type": "fill_field",
-                    "field_name": current_field,
-                    "value": answer
-                })
-                # Move to next field
-                fields = session_state.get("fields", [])
-                idx = fields.index(current_field) if current_field in fields else -1
-                session_state["current_field"] = fields[idx + 1] if idx + 1 < len(fields) else None
-                transcript_buffer = ""
-                last_transcript = ""
-                return
-            else:
-                await websocket.send_json({
-                    "transcript": final,
-                    "answers": {},
-                    "retry": True,
-                    "message": f"Please say one or more of: {', '.join(field_options)}"
-                })
-                return
-        elif field_type == "radio" and field_options:
-            matched_option = match_spoken_option(final, field_options)
-            print(f"Matched spoken option: {matched_option}")
-            if matched_option:
-                answer = matched_option
-                extracted_answers[current_field] = {"question": question, "answer": answer}
-                await websocket.send_json({
-                    "type": "fill_field",
-                    "field_name": current_field,
-                    "value": answer
-                })
-                # Move to next field
-                fields = session_state.get("fields", [])
-                idx = fields.index(current_field) if current_field in fields else -1
-                session_state["current_field"] = fields[idx + 1] if idx + 1 < len(fields) else None
-                transcript_buffer = ""
-                last_transcript = ""
-                return
-            else:
-                await websocket.send_json({
-                    "transcript": final,
-                    "answers": {},
-                    "retry": True,
-                    "message": f"Please say one of: {', '.join(field_options)}"
-                })
-                return
-        if "email" in current_field:
-            # 1. Try to extract and normalize from latest transcript only
-            possible_email = extract_possible_email(final)
-            email_candidate = normalize_email(possible_email)
-            print("Final Email is:", email_candidate)
-            if looks_like_email(email_candidate):
-                final = email_candidate
-                transcript_buffer = ""  # Success: clear buffer
-            else:
-                # 2. Fallback: try the full buffer
-                possible_email_buf = extract_possible_email(transcript_buffer)
-                email_candidate_buf = normalize_email(possible_email_buf)
-                print("Fallback Email from buffer:", email_candidate_buf)
-                if looks_like_email(email_candidate_buf):
-                    final = email_candidate_buf
-                    transcript_buffer = ""  # Success: clear buffer
-                else:
-                    print(" Waiting for complete email...")
-                    transcript_buffer = ""
-                    return
-        if "phone" in current_field:
-            # Extract digits from current transcript (ignore non-digits)
-            digits = ''.join(filter(str.isdigit, transcript))
-            phone_digit_buffer += digits
-            print(f"Buffered phone digits: {phone_digit_buffer}")
-            if len(phone_digit_buffer) < 10:
-                print("Waiting for complete phone number...")
-                return
-            # Accept first 10 digits as phone number
-            final = phone_digit_buffer[:10]
-            phone_digit_buffer = ""
-        if field_type == "time":
-            norm_time = parse_spoken_time(final)
-            if norm_time:
-                answer = norm_time
-                extracted_answers[current_field] = {"question": question, "answer": answer}
-                await websocket.send_json({
-                    "type": "fill_field",
-                    "field_name": current_field,
-                    "value": answer
-                })
-                # Move to next field
-                fields = session_state.get("fields", [])
-                idx = fields.index(current_field) if current_field in fields else -1
-                session_state["current_field"] = fields[idx + 1] if idx + 1 < len(fields) else None
-                transcript_buffer = ""
-                last_transcript = ""
-                return
-            else:
-                await websocket.send_json({
-                    "transcript": final,
-                    "answers": {},
-                    "retry": True,
-                    "message": "Please say a time (e.g., 3 pm, 14:30, 7 in the morning)"
-                })
-                return
-            
-        if field_type == "date":
-            norm_date = parse_spoken_date(final)
-            print(f"Parsed date: {norm_date}")
-            if norm_date:
-                answer = norm_date
-                extracted_answers[current_field] = {"question": question, "answer": answer}
-                await websocket.send_json({
-                    "type": "fill_field",
-                    "field_name": current_field,
-                    "value": answer  # Format: YYYY-MM-DD
-                })
-                # Move to next field and RESET buffers!
-                fields = session_state.get("fields", [])
-                idx = fields.index(current_field) if current_field in fields else -1
-                session_state["current_field"] = fields[idx + 1] if idx + 1 < len(fields) else None
-                transcript_buffer = ""
-                last_transcript = ""
-                return
-            else:
-                await websocket.send_json({
-                    "transcript": final,
-                    "answers": {},
-                    "retry": True,
-                    "message": "Please say a date, for example: 4th July, tomorrow, or July 4 2024."
-                })
-                return
-        #  Call GPT only if needed
-        normalized = normalize_transcript(final, current_field)
-        if normalized:
-            answer = normalized
-        else:
-            answer = extract_answer_from_gpt(current_field, final)
-            print(f"GPT Answer for '{current_field}':", answer)
-        extracted_answers[current_field] = {"question": question, "answer": answer}
-        current_field = session_state.get("current_field")
-        if current_field and current_field in extracted_answers:
-            # Only send the answer string, not the object!
-            answer_str = extracted_answers[current_field].get("answer", "")
+        print("Final Transcript in process_transcript :", final)
+        field = FieldSpec(
+            current_field,
+            session.field_types.get(current_field, "text"),
+            session.field_options.get(current_field, []),
+        )
+        try:
+            outcome = await get_handler(field.name, field.type)(field, final, answer_state)
+        except Exception as e:
+            # One failed answer (e.g. the LLM out of retries) must not end the conversation
+            logger.warning("Answer handling failed for %s: %r", current_field, e)
+            outcome = Outcome(RETRY, "Sorry, I couldn't process that. Please say it again.")
+        if outcome.kind == FILL:
             await websocket.send_json({
                 "type": "fill_field",
                 "field_name": current_field,
-                "value": answer_str
+                "value": outcome.value
+            })
+            session.advance()
+            await session_manager.save(session)
+            answer_state.reset()
+        elif outcome.kind == RETRY:
+            await websocket.send_json({
+                "transcript": final,
+                "answers": {},
+                "retry": True,
+                "message": outcome.value
             })
-        # Move to next field
-        fields = session_state.get("fields", [])
-        idx = fields.index(current_field) if current_field in fields else -1
-        session_state["current_field"] = fields[idx + 1] if idx + 1 < len(fields) else None
-        transcript_buffer = ""
-        last_transcript = ""
 
-    asyncio.create_task(process_audio())
+    # 🎧 Streaming mode: frames go straight to a live recognizer; the engine's endpointing
+    # marks the end of each utterance and interim results are relayed to the client
+    stt_events = asyncio.Queue()
+    recognizer = None
+
+    # Hold back audio until VAD hears speech, then open a stream primed with the pre-roll
+    preroll = AudioRingBuffer(VAD_PREROLL_BYTES + 4096)
+
+    # VAD onset (speech_start) the current stream was opened for
+    stream_onset = None
+
+    def feed_recognizer(audio_data):
+        nonlocal recognizer, stream_onset
+        vad.process(audio_data)
+        if recognizer is None or recognizer.closed:
+            # Only a new onset opens a stream: the rest of a segment the engine has
+            # already endpointed (e.g. the VAD hangover) is held back like silence
+            if not vad.in_speech or vad.speech_start == stream_onset:
+                preroll.append(audio_data)
+                return
+            recognizer = open_recognizer(stt_events)
+            stream_onset = vad.speech_start
+            recognizer.feed(preroll.view())
+            preroll.clear()
+        recognizer.feed(audio_data)
+
+    async def process_stream_events():
+        while True:
+            kind, text, source = await stt_events.get()
+            if kind == "interim":
+                await websocket.send_json({"type": "interim_transcript", "transcript": text})
+            elif kind == "final":
+                metrics.stt_requests += 1
+                print("🎙️ Final Transcript:", text)
+                await process_transcript(text)
+            elif kind in ("endpoint", "end"):
+                # Next VAD onset opens a fresh stream for the next utterance
+                source.close()
+
+    if STT_MODE == "streaming":
+        consumer = asyncio.create_task(process_stream_events())
+    else:
+        consumer = asyncio.create_task(process_audio())
+    consumer.add_done_callback(log_task_failure)
+
+    # 🔌 A dead consumer would leave the client talking into nothing: close the socket
+    # (the receive loop then sees the disconnect and cleans up)
+    async def close_socket():
+        with contextlib.suppress(Exception):
+            await websocket.close(code=1011)
+
+    def close_on_consumer_failure(task):
+        if task.cancelled() or task.exception() is None:
+            return
+        closing = asyncio.create_task(close_socket())
+        background_tasks.add(closing)
+        closing.add_done_callback(background_tasks.discard)
+
+    consumer.add_done_callback(close_on_consumer_failure)
+
+    # Until the client negotiates a codec, frames are raw 16 kHz Int16 PCM
+    decoder = build_decoder(PCM_CODEC)
 
     try:
         while True:
-            audio_data = await websocket.receive_bytes()
-            await audio_queue.put(audio_data)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("text") is not None:
+                # 🤝 Capability handshake: {"type": "hello", "codecs": ["opus", "pcm16"]}.
+                # Anything else is ignored; a bad control message never ends the stream.
+                codecs = parse_hello(message["text"])
+                if codecs is not None:
+                    decoder = build_decoder(negotiate_codec(codecs))
+                    await websocket.send_json({"type": "codec", "codec": decoder.codec})
+                continue
+            frame = message.get("bytes")
+            if not frame:
+                continue
+            metrics.wire_bytes_received += len(frame)
+            audio_data = await decoder.decode(frame)
+            if STT_MODE == "streaming":
+                metrics.frames_received += 1
+                metrics.bytes_received += len(audio_data)
+                feed_recognizer(audio_data)
+            else:
+                enqueue_frame(audio_queue, audio_data, metrics)
     except WebSocketDisconnect:
         print("❌ Client disconnected")
     except Exception as e:
         print(f"❌ WebSocket error: {e}")
+    finally:
+        # Tie the consumer's lifetime to the socket so nothing leaks after disconnect
+        if recognizer is not None:
+            recognizer.close()
+        consumer.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await consumer
+        logger.info("Audio stream metrics: %s", metrics.as_dict())
+        logger.info("Answer extraction stats: %s", answer_extractor.stats())
         
         
 # Submit Form Endpoint
@@ -434,71 +354,37 @@ async def submit_form(request: Request):
         form_data = data.get("form_data", {})
         if not target_url or not form_data:
             raise HTTPException(status_code=400, detail="Missing target_url or form_data")
-        # Submit the form data to the target URL
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
+        if SUBMIT_MODE == "auto":
+            # Plain HTML forms: one HTTP request with the analysis-time action and cookies
+            session = await session_manager.get(data.get("session_id"))
+            snapshot = None
+            if session is not None and normalize_url(session.target_url) == normalize_url(target_url):
+                snapshot = session.submission
+            try:
+                result = await direct_submitter.submit(target_url, form_data, snapshot)
+            except Exception as e:
+                return {
+                    "success": False,
+                    "message": f"Error submitting form: {str(e)}",
+                    "submitted_data": form_data
+                }
+            if result is not None:
+                return {
+                    "success": True,
+                    "message": "Form submitted successfully",
+                    "final_url": result["final_url"],
+                    "submitted_data": form_data
+                }
+        # Scripted forms (or SUBMIT_MODE=browser): fill and submit in a real page
+        async with browser_pool.page() as page:
             await page.goto(target_url, wait_until="domcontentloaded")
-            # Fill all form fields
-            for field_name, field_value in form_data.items():
-                try:
-                    # Try different selectors for the field
-                    selectors = [
-                        f'input[name="{field_name}"]',
-                        f'select[name="{field_name}"]',
-                        f'textarea[name="{field_name}"]',
-                        f'#{field_name}',
-                    ]
-                    field_filled = False
-                    for selector in selectors:
-                        try:
-                            element = await page.query_selector(selector)
-                            if element:
-                                element_type = await element.get_attribute('type')
-                                tag_name = await element.evaluate('el => el.tagName.toLowerCase()')
-                                if tag_name == 'select':
-                                    await element.select_option(field_value)
-                                elif element_type in ['checkbox', 'radio']:
-                                    if field_value.lower() in ['true', 'yes', '1']:
-                                        await element.check()
-                                elif tag_name in ['input', 'textarea']:
-                                    await element.fill(str(field_value))
-                                field_filled = True
-                                break
-                        except Exception as e:
-                            continue
-                    if not field_filled:
-                        logger.warning(f"Could not fill field: {field_name}")
-                except Exception as e:
-                    logger.error(f"Error filling field {field_name}: {e}")
-            # Submit the form
+            # Field schema from analysis (tag/type/id) lets the filler skip selector probing
+            cached = await form_cache.get(normalize_url(target_url))
             try:
-                # Try to find and click submit button
-                submit_selectors = [
-                    'input[type="submit"]',
-                    'button[type="submit"]',
-                    'button:has-text("Submit")',
-                    'button:has-text("Send")',
-                    'form button:last-child'
-                ]
-                submitted = False
-                for selector in submit_selectors:
-                    try:
-                        submit_btn = await page.query_selector(selector)
-                        if submit_btn:
-                            await submit_btn.click()
-                            submitted = True
-                            break
-                    except:
-                        continue
-                if not submitted:
-                    # Fallback: submit the form directly
-                    await page.evaluate('document.querySelector("form").submit()')
-                # Wait for navigation or response
-                await page.wait_for_timeout(2000)
+                # One evaluate fills every field; then wait for navigation or the POST response
+                await fill_and_submit(page, form_data, cached["fields"] if cached else None)
                 # Get the final URL and status
                 final_url = page.url
-                await browser.close()
                 return {
                     "success": True,
                     "message": "Form submitted successfully",
@@ -506,7 +392,6 @@ async def submit_form(request: Request):
                     "submitted_data": form_data
                 }
             except Exception as e:
-                await browser.close()
                 return {
                     "success": False,
                     "message": f"Error submitting form: {str(e)}",
@@ -523,23 +408,51 @@ async def analyze_form(request: URLRequest, db: Session = Depends(get_db)):
     try:
         # Always fetch dynamically, ignore static rendering
         url = str(request.url)
-        # Store the target URL in session
-        session_state["target_url"] = url
-        form_html = await extract_shadow_form(url)
-        if not form_html:
-            form_html = await extract_normal_form(url)
-        fields = extract_fields_from_html(form_html)
-        if not fields:
-            raise HTTPException(status_code=400, detail="No input fields found.")
-        questions = generate_questions(fields)
-        session_state["fields"] = [f['name'] for f in fields if f['name']]
-        session_state["field_questions"] = {f['name']: q for f, q in zip(fields, questions) if f['name']}
-        session_state["field_types"] = {f['name']: f.get('type', 'text') for f in fields if f['name']}
-        session_state["field_options"] = {f['name']: f.get('options', []) for f in fields if f['name']}
-        session_state["current_field"] = session_state["fields"][0]
+        cache_key = normalize_url(url)
+        cached = await form_cache.get(cache_key)
+        submission = None
+        if cached and (form_cache.is_fresh(cached) or await form_cache.revalidate(url, cached)):
+            logger.info("Form schema cache hit: %s", cache_key)
+            fields, questions = cached["fields"], cached["questions"]
+        else:
+            (form_source, fields, submission), (etag, last_modified) = await asyncio.gather(
+                extract_form_snapshot(url), asyncio.to_thread(fetch_validators, url)
+            )
+            form_hash = hash_form_html(form_source)
+            if cached and cached["form_hash"] == form_hash:
+                # DOM unchanged: skip field extraction and question generation
+                logger.info("Form schema unchanged (DOM hash match): %s", cache_key)
+                fields, questions = cached["fields"], cached["questions"]
+            else:
+                if fields is None:
+                    fields = extract_fields_from_html(form_source)
+                if not fields:
+                    raise HTTPException(status_code=400, detail="No input fields found.")
+                questions = await generate_questions_async(fields)
+            await form_cache.put(cache_key, form_hash, fields, questions, etag, last_modified)
+        field_names = [f['name'] for f in fields if f['name']]
+        # Each analysis gets its own session; the client binds /stt to it via session_id
+        session = await session_manager.create(
+            target_url=url,
+            fields=field_names,
+            field_questions={f['name']: q for f, q in zip(fields, questions) if f['name']},
+            field_types={f['name']: f.get('type', 'text') for f in fields if f['name']},
+            field_options={f['name']: f.get('options', []) for f in fields if f['name']},
+            current_field=field_names[0],
+            submission=submission,
+        )
+        # Precompile option matchers now so the first spoken answer doesn't pay for it
+        for f in fields:
+            if f.get('options'):
+                get_option_index(f['options'])
         logger.info("Fields extracted: %s", fields)
         logger.info("Questions generated: %s", questions)
-        return {"fields": fields, "questions": questions, "extracted_answers": {}}
+        logger.info("Question template cache: %s", question_cache.stats())
+        # Warm TTS for every question while the client renders the form
+        task = asyncio.create_task(tts_cache.presynthesize(questions))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        return {"session_id": session.session_id, "fields": fields, "questions": questions, "extracted_answers": {}}
     except Exception as e:
         error_message = f"Error occurred: {str(e)}\n{traceback.format_exc()}"
         print(f"Error: {error_message}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
@@ -11,3 +11,20 @@ class ErrorLog(Base):
     error_message = Column(String, nullable=False)
     dynamic = Column(Boolean, default=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+class FormSchemaEntry(Base):
+    __tablename__ = "form_schema_cache"
+    url = Column(String, primary_key=True)
+    form_hash = Column(String, nullable=False)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    fields_json = Column(Text, nullable=False)
+    questions_json = Column(Text, nullable=False)
+    checked_at = Column(Float, nullable=False)
+
+class QuestionTemplate(Base):
+    __tablename__ = "question_templates"
+    signature = Column(String, primary_key=True)
+    question = Column(Text, nullable=False)
+    hits = Column(Integer, default=0)
+    last_used = Column(Float, nullable=False, index=True)
@@ -0,0 +1,69 @@
+from urllib.parse import urlsplit
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Resource types aborted while analyzing a page (Playwright request.resource_type values)
+ANALYSIS_BLOCK_RESOURCES = frozenset(
+    t.strip() for t in os.getenv("ANALYSIS_BLOCK_RESOURCES", "image,font,media").split(",") if t.strip()
+)
+# Stylesheets can affect visibility checks (FORM_EXTRACTION_MODE=browser), so opt-in
+ANALYSIS_BLOCK_STYLESHEETS = os.getenv("ANALYSIS_BLOCK_STYLESHEETS", "false").lower() == "true"
+# Analytics/ads/tag managers never matter for form structure
+DEFAULT_BLOCKED_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "doubleclick.net",
+    "googleadservices.com", "facebook.net", "connect.facebook.net", "hotjar.com", "clarity.ms",
+    "segment.io", "segment.com", "mixpanel.com", "amplitude.com", "intercom.io", "hs-analytics.net",
+    "hs-scripts.com", "adservice.google.com", "taboola.com", "outbrain.com", "criteo.com",
+    "scorecardresearch.com", "newrelic.com", "nr-data.net", "fullstory.com", "tiktok.com",
+)
+ANALYSIS_BLOCK_DOMAINS = tuple(
+    d.strip().lower() for d in os.getenv("ANALYSIS_BLOCK_DOMAINS", ",".join(DEFAULT_BLOCKED_DOMAINS)).split(",")
+    if d.strip()
+)
+
+
+# 🚦 What a page may load during analysis. Applied as one route handler per page,
+# so blocked requests are aborted before they hit the network.
+class NavigationProfile:
+    def __init__(self, block_resources=ANALYSIS_BLOCK_RESOURCES, block_stylesheets=ANALYSIS_BLOCK_STYLESHEETS,
+                 block_domains=ANALYSIS_BLOCK_DOMAINS):
+        self.block_resources = set(block_resources)
+        if block_stylesheets:
+            self.block_resources.add("stylesheet")
+        self.block_domains = tuple(block_domains)
+        self.blocked = 0
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.block_resources:
+            return True
+        host = (urlsplit(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.block_domains)
+
+    async def _route(self, route):
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def apply(self, page):
+        if self.block_resources or self.block_domains:
+            await page.route("**/*", self._route)
+
+
+# 🧭 Profile used by form analysis (parser.py)
+def analysis_profile():
+    return NavigationProfile()
+
+
+# 🏃 Load a page for analysis: blocking profile, then DOMContentLoaded
+async def open_for_analysis(page, url, profile=None):
+    profile = profile or analysis_profile()
+    await profile.apply(page)
+    await page.goto(url, wait_until="domcontentloaded")
+    if profile.blocked:
+        logger.info("Blocked %d request(s) while loading %s", profile.blocked, url)
+    return profile
@@ -0,0 +1,223 @@
+from datetime import date, timedelta
+import re
+from dateutil import parser as date_parser
+
+# Everything here runs once per utterance, so patterns and lookup tables are built
+# at import time; nothing is compiled, rebuilt or parsed by trial and error per call.
+
+
+# 🔁 One compiled alternation for a whole replacement table; longest phrases win
+def compile_table(table: dict, word_bounded: bool = True):
+    alternation = "|".join(re.escape(k) for k in sorted(table, key=len, reverse=True))
+    pattern = re.compile(rf"\b(?:{alternation})\b" if word_bounded else alternation)
+    return pattern, (lambda m: table[m.group(0)])
+
+
+def replace_all(text: str, compiled) -> str:
+    pattern, repl = compiled
+    return pattern.sub(repl, text)
+
+
+# ---------------------------------------------------------------- numbers
+
+UNITS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+         "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+         "seventeen", "eighteen", "nineteen"]
+TENS = {20: "twenty", 30: "thirty", 40: "forty", 50: "fifty", 60: "sixty", 70: "seventy",
+        80: "eighty", 90: "ninety"}
+ORDINAL_UNITS = ["zeroth", "first", "second", "third", "fourth", "fifth", "sixth", "seventh",
+                 "eighth", "ninth", "tenth", "eleventh", "twelfth", "thirteenth", "fourteenth",
+                 "fifteenth", "sixteenth", "seventeenth", "eighteenth", "nineteenth"]
+ORDINAL_TENS = {20: "twentieth", 30: "thirtieth"}
+
+
+def _number_words():
+    cardinals, ordinals = {}, {}
+    for n in range(1, 100):
+        if n < 20:
+            cardinals[UNITS[n]] = n
+            ordinals[ORDINAL_UNITS[n]] = n
+            continue
+        tens, unit = n - n % 10, n % 10
+        if unit == 0:
+            cardinals[TENS[tens]] = n
+            if tens in ORDINAL_TENS:
+                ordinals[ORDINAL_TENS[tens]] = n
+            continue
+        for sep in (" ", "-"):
+            cardinals[f"{TENS[tens]}{sep}{UNITS[unit]}"] = n
+            if n <= 31:
+                ordinals[f"{TENS[tens]}{sep}{ORDINAL_UNITS[unit]}"] = n
+    return cardinals, ordinals
+
+
+CARDINAL_WORDS, ORDINAL_WORDS = _number_words()
+NUMBER_WORDS = {k: str(v) for k, v in {**CARDINAL_WORDS, **ORDINAL_WORDS}.items()}
+NUMBER_TABLE = compile_table(NUMBER_WORDS)
+
+
+# 🔢 "twenty fifth of july" -> "25 of july"; "seven thirty" -> "7 30"
+def spoken_numbers_to_digits(text: str) -> str:
+    return replace_all(text.lower(), NUMBER_TABLE)
+
+
+# ---------------------------------------------------------------- phone
+
+# Every number word a digit group can be read as: "nine", "oh", "fourteen", "ninety eight"
+PHONE_NUMBER_WORDS = {w: str(n) for w, n in CARDINAL_WORDS.items()}
+PHONE_NUMBER_WORDS.update({"zero": "0", "oh": "0", "o": "0"})
+PHONE_DIGIT_WORDS = {w: d for w, d in PHONE_NUMBER_WORDS.items() if len(d) == 1}
+
+
+def _alternation(words):
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+PHONE_TOKEN = re.compile(
+    rf"\b(double|triple)\s+({_alternation(PHONE_DIGIT_WORDS)}|\d)\b"                      # "double seven"
+    rf"|\b({_alternation(PHONE_DIGIT_WORDS)}|\d)\s+hundred(?:\s+and)?"
+    rf"(?:\s+({_alternation(PHONE_NUMBER_WORDS)})\b)?"                                     # "nine hundred (five)"
+    rf"|\b({_alternation(PHONE_NUMBER_WORDS)})\b"                                          # "ninety eight", "oh"
+    r"|\d"
+)
+REPEATS = {"double": 2, "triple": 3}
+
+
+# 📞 Digits as dictated, in single digits or groups:
+# "nine eight double seven 6 5" -> "987765", "ninety eight forty five" -> "9845",
+# "nine hundred two" -> "902"
+def spoken_digits(text: str) -> str:
+    out = []
+    for m in PHONE_TOKEN.finditer(text.lower()):
+        repeat, repeated, hundreds, rest, group = m.groups()
+        if repeat:
+            out.append(PHONE_DIGIT_WORDS.get(repeated, repeated) * REPEATS[repeat])
+        elif hundreds:
+            value = int(PHONE_DIGIT_WORDS.get(hundreds, hundreds)) * 100
+            out.append(str(value + int(PHONE_NUMBER_WORDS[rest]) if rest else value))
+        elif group:
+            out.append(PHONE_NUMBER_WORDS[group])
+        else:
+            out.append(m.group(0))
+    return "".join(out)
+
+
+# 📞 Indian mobile number in E.164 form, or None when fewer than 10 digits were heard
+def normalize_phone(text: str):
+    digits = spoken_digits(text)
+    return "+91" + digits[-10:] if len(digits) >= 10 else None
+
+
+# ---------------------------------------------------------------- email
+
+# Spoken forms inside an address -> symbols. Precomputed once, longest phrase first,
+# padded so only whole words match; spaces are removed afterwards. (For tables this
+# small, C-level str.replace behind an `in` check beats a regex with a callback.)
+def spoken_table(table: dict):
+    return tuple((f" {k} ", f" {v} ") for k, v in sorted(table.items(), key=lambda kv: -len(kv[0])))
+
+
+EMAIL_WORDS = spoken_table({
+    "at the gmail dot com": "@gmail.com",
+    "at the gmail": "@gmail.com",
+    "gmail logo": "@gmail.com",
+    "attherate": "@",
+    "at tha": "@",
+    "at": "@",
+    "dot": ".",
+    "underscore": "_",
+    "dash": "-",
+    "space": "",
+})
+# Lead-ins and separators people say before/inside the address
+EMAIL_PREFIX = re.compile(r"^(my\s*)?(email(\s*(address|id))?\s*is\s*)")
+EMAIL_FILLERS = spoken_table({
+    "enter": "@", "the rate": "@", "attherate": "@", "at the": "@", "at": "@",
+    "dot": ".", "underscore": "_", "dash": "-", "space": "",
+})
+EMAIL_DOMAINS = ("gmail.com", "yahoo.com", "outlook.com")
+EMAIL_IN_TEXT = re.compile(r"([a-z0-9_.+-]+)@([a-z0-9-]+\.[a-z0-9-.]+)")
+GMAIL_WITHOUT_AT = re.compile(r"([a-z0-9_.+-]+)gmail\.com")
+EMAIL_SHAPE = re.compile(r"[^@ \t\r\n]+@[^@ \t\r\n]+\.[^@ \t\r\n]+")
+
+
+def replace_spoken(text: str, table) -> str:
+    text = f" {text} "
+    for spoken, symbol in table:
+        if spoken in text:
+            text = text.replace(spoken, symbol)
+    return "".join(text.split())
+
+
+# 🔧 Spoken or semi-structured email text -> address ("abc at gmail dot com" -> "abc@gmail.com")
+def normalize_email(text: str) -> str:
+    text = replace_spoken(text.lower(), EMAIL_WORDS)
+    if "@" not in text:
+        for domain in EMAIL_DOMAINS:
+            if text.endswith(domain):
+                return text[:-len(domain)] + "@" + domain
+    return text.replace("@thegmail.com", "@gmail.com")
+
+
+# 🔍 Best-effort email address inside a longer utterance ("my email id is abc gmail.com")
+def extract_possible_email(text: str) -> str:
+    text = replace_spoken(EMAIL_PREFIX.sub("", text.lower().strip()), EMAIL_FILLERS)
+    match = EMAIL_IN_TEXT.search(text)
+    if match:
+        return match.group(0)
+    match = GMAIL_WITHOUT_AT.search(text)
+    if match:
+        return match.group(1) + "@gmail.com"
+    return text
+
+
+def looks_like_email(text: str) -> bool:
+    return bool(EMAIL_SHAPE.match(text))
+
+
+# ---------------------------------------------------------------- time
+
+TIME_WORDS = compile_table({
+    "noon": "12:00 pm", "midday": "12:00 pm", "midnight": "12:00 am",
+    "in the morning": "am", "in the afternoon": "pm", "in the evening": "pm", "at night": "pm",
+    "morning": "am", "afternoon": "pm", "evening": "pm", "night": "pm",
+    "o'clock": "", "o clock": "", "hours": "", "hour": "", "hrs": "",
+})
+TIME_PATTERN = re.compile(r"(?<!\d)(\d{1,2})(?:\s*[:.]\s*|\s+)?(\d{2})?(?!\d)\s*(?:([ap])\.?\s*m\b)?")
+
+
+# ⏰ "3 pm", "14:30", "seven thirty in the evening", "noon" -> "HH:MM" (24-hour); "" if unparseable
+def parse_spoken_time(text: str) -> str:
+    text = spoken_numbers_to_digits(replace_all(text.lower().strip(), TIME_WORDS))
+    match = TIME_PATTERN.search(text)
+    if not match:
+        return ""
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    meridiem = match.group(3)
+    if meridiem == "p" and hour < 12:
+        hour += 12
+    elif meridiem == "a" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return ""
+    return f"{hour:02}:{minute:02}"
+
+
+# ---------------------------------------------------------------- date
+
+RELATIVE_DAYS = {"day after tomorrow": 2, "day before yesterday": -2, "tomorrow": 1, "today": 0, "yesterday": -1}
+RELATIVE_DAY = re.compile(r"\b(" + "|".join(sorted(RELATIVE_DAYS, key=len, reverse=True)) + r")\b")
+
+
+# 📅 "fifth of July", "tomorrow", "4/7/2024" -> "YYYY-MM-DD"; "" if unparseable
+def parse_spoken_date(text: str, today: date = None) -> str:
+    text = spoken_numbers_to_digits(text)
+    relative = RELATIVE_DAY.search(text)
+    if relative:
+        return ((today or date.today()) + timedelta(days=RELATIVE_DAYS[relative.group(1)])).isoformat()
+    try:
+        return date_parser.parse(text, fuzzy=True, dayfirst=True).strftime("%Y-%m-%d")
+    except (ValueError, OverflowError) as e:
+        print("Date parse failed:", text, e)
+        return ""
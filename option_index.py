@@ -0,0 +1,159 @@
+from collections import OrderedDict
+import os
+import re
+import threading
+
+# Minimum fuzzy score (0..1) for an option to count as what the user said
+OPTION_MATCH_THRESHOLD = float(os.getenv("OPTION_MATCH_THRESHOLD", "0.6"))
+OPTION_INDEX_CACHE_SIZE = int(os.getenv("OPTION_INDEX_CACHE_SIZE", "512"))
+
+WORD = re.compile(r"[a-z0-9]+")
+ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6, "seventh": 7,
+    "eighth": 8, "ninth": 9, "tenth": 10, "1st": 1, "2nd": 2, "3rd": 3, "4th": 4, "5th": 5,
+    "6th": 6, "7th": 7, "8th": 8, "9th": 9, "10th": 10, "last": -1,
+}
+CARDINALS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+             "eight": 8, "nine": 9, "ten": 10}
+# "the second one", "option 3", "number two", "the last option"
+ORDINAL_PHRASE = re.compile(
+    r"\b(?:(" + "|".join(ORDINALS) + r")(?:\s+(?:one|option|choice))?"
+    r"|(?:option|number|choice)\s+(\d+|" + "|".join(CARDINALS) + r"))\b"
+)
+MULTI_SPLIT = re.compile(r"\s*(?:,|&|\band\b|\bplus\b|\balso\b)\s*")
+SOUNDEX_CODES = str.maketrans("bfpvcgjkqsxzdtlmnr", "111122222222334556")
+
+
+def normalize_option(text) -> str:
+    return " ".join(WORD.findall(str(text).lower()))
+
+
+# 🔊 Soundex key per word, so "Shree"/"Sri" or "Kumar"/"Kumaar" land together
+def soundex(word: str) -> str:
+    if not word or word.isdigit():
+        return word
+    coded = word.translate(SOUNDEX_CODES)
+    key, last = word[0], coded[0]
+    for ch in coded[1:]:
+        if ch.isdigit() and ch != last:
+            key += ch
+        if ch not in "hw":
+            last = ch
+    return (key + "000")[:4]
+
+
+def trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# 🗂️ Precompiled lookup structure for one field's options: normalized text, word and
+# phonetic token sets, and a trigram -> option posting list. Built once per field
+# (at /analyze-form), then every utterance only touches options sharing trigrams or words.
+class OptionIndex:
+    def __init__(self, options):
+        self.options = [str(o).strip() for o in options]
+        self.normalized = [normalize_option(o) for o in self.options]
+        self.exact = {}
+        self.tokens = []
+        self.phonetic = []
+        self.grams = []
+        self.postings = {}
+        for i, norm in enumerate(self.normalized):
+            self.exact.setdefault(norm, i)
+            words = norm.split()
+            self.tokens.append(frozenset(words))
+            self.phonetic.append(frozenset(soundex(w) for w in words))
+            grams = trigrams(norm)
+            self.grams.append(grams)
+            for key in grams | {"#" + soundex(w) for w in words}:
+                self.postings.setdefault(key, []).append(i)
+
+    def __len__(self):
+        return len(self.options)
+
+    # 🔢 "the second one" -> index 1; None when the utterance has no ordinal reference
+    def ordinal(self, normalized: str):
+        match = ORDINAL_PHRASE.search(normalized)
+        if not match:
+            return None
+        if match.group(1):
+            position = ORDINALS[match.group(1)]
+        else:
+            raw = match.group(2)
+            position = int(raw) if raw.isdigit() else CARDINALS[raw]
+        index = len(self.options) - 1 if position == -1 else position - 1
+        return index if 0 <= index < len(self.options) else None
+
+    def _score(self, i, text, words, phonetic, grams):
+        norm = self.normalized[i]
+        if not norm:
+            return 0.0
+        # Whole option spoken inside the utterance ("I'd like the blue one" ~ "Blue")
+        if f" {norm} " in f" {text} ":
+            return 0.95 + 0.05 * len(norm) / max(len(text), 1)
+        option_words = self.tokens[i]
+        word_score = len(option_words & words) / len(option_words)
+        sound_score = len(self.phonetic[i] & phonetic) / len(self.phonetic[i]) * 0.9
+        gram_score = 2 * len(self.grams[i] & grams) / (len(self.grams[i]) + len(grams))
+        return max(word_score * 0.9, sound_score, gram_score)
+
+    # 🏆 Ranked (option, score) candidates, best first
+    def rank(self, transcript: str, limit: int = 5):
+        text = normalize_option(transcript)
+        if not text:
+            return []
+        if text in self.exact:
+            return [(self.options[self.exact[text]], 1.0)]
+        words = frozenset(text.split())
+        phonetic = frozenset(soundex(w) for w in words)
+        grams = trigrams(text)
+        candidates = set()
+        for key in grams | {"#" + p for p in phonetic}:
+            candidates.update(self.postings.get(key, ()))
+        scored = sorted(
+            ((self._score(i, text, words, phonetic, grams), i) for i in candidates),
+            key=lambda pair: (-pair[0], pair[1]),
+        )
+        return [(self.options[i], round(score, 3)) for score, i in scored[:limit]]
+
+    # 🎯 Best single option (text match first, then ordinal reference), or None
+    def match(self, transcript: str, threshold: float = OPTION_MATCH_THRESHOLD):
+        ranked = self.rank(transcript, limit=1)
+        if ranked and ranked[0][1] >= 0.9:
+            return ranked[0][0]
+        position = self.ordinal(normalize_option(transcript))
+        if position is not None:
+            return self.options[position]
+        if ranked and ranked[0][1] >= threshold:
+            return ranked[0][0]
+        return None
+
+    # ☑️ Multi-select: every option named in "red, green and the last one", in order, no repeats
+    def match_many(self, transcript: str, threshold: float = OPTION_MATCH_THRESHOLD):
+        matched = []
+        for part in MULTI_SPLIT.split(transcript.lower()):
+            option = self.match(part, threshold) if part.strip() else None
+            if option is not None and option not in matched:
+                matched.append(option)
+        return matched
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+# 📦 Index for an option list, built once and shared by every session with the same options
+def get_option_index(options) -> OptionIndex:
+    key = tuple(str(o) for o in options)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = OptionIndex(key)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > OPTION_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
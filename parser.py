@@ -1,297 +1,630 @@
-from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
+import asyncio
+import re
 import requests
 from fastapi import Form, Request
 import json
 import logging
+import os
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urljoin
+from browser_pool import browser_pool
+from navigation import open_for_analysis
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+try:
+    import lxml  # noqa: F401  optional: C parser, several times faster than html.parser
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+HTML_PARSER = os.getenv("FORM_HTML_PARSER", HTML_PARSER)
 
-# 🔍 Extract a form inside a nested shadow DOM (2 levels deep)
-async def extract_shadow_form(url):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
-        await page.goto(url, wait_until="domcontentloaded")
-        shadow_form_html = await page.evaluate("""
-        () => {
-            const host = document.querySelector('#host');
-            if (!host) return null;
-            const shadowRoot1 = host.shadowRoot;
-            if (!shadowRoot1) return null;
-            const innerHost = shadowRoot1.getElementById('inner-host');
-            if (!innerHost) return null;
-            const shadowRoot2 = innerHost.shadowRoot;
-            if (!shadowRoot2) return null;
-            const form = shadowRoot2.getElementById('shadow-form');
-            if (!form) return null;
-            return form.outerHTML;
+
+# 🕸️ Walks the light DOM and every open shadow root (any depth) in one pass,
+# returning each <form> found in document order with its control count
+DISCOVER_FORMS_JS = """
+() => {
+    const forms = [];
+    const walk = (root, depth) => {
+        for (const el of root.querySelectorAll('*')) {
+            if (el.tagName === 'FORM') {
+                forms.push({
+                    html: el.outerHTML,
+                    controls: el.querySelectorAll('input, select, textarea').length,
+                    shadow_depth: depth,
+                });
+            }
+            if (el.shadowRoot) walk(el.shadowRoot, depth + 1);
         }
-        """)
-        await browser.close()
-        return shadow_form_html
-    
-# 🔍 Extract a normal HTML form from the page DOM
-async def extract_normal_form(url):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
-        await page.goto(url, wait_until="domcontentloaded")
-        form_html = await page.evaluate("""
-        () => {
-            const form = document.querySelector('form');
-            if (form) return form.outerHTML;
-            return null;
+    };
+    walk(document, 0);
+    return forms;
+}
+"""
+
+# Try a plain HTTP GET before starting a browser page
+ANALYSIS_STATIC_FAST_PATH = os.getenv("ANALYSIS_STATIC_FAST_PATH", "true").lower() == "true"
+ANALYSIS_STATIC_TIMEOUT = float(os.getenv("ANALYSIS_STATIC_TIMEOUT", "5"))
+# Custom elements may host shadow-DOM forms that only exist once scripts run
+CUSTOM_ELEMENT_TAG = re.compile(r"<[a-z][a-z0-9]*-[a-z0-9-]*[\s/>]", re.IGNORECASE)
+FORM_CONTROL_TAGS = ["input", "select", "textarea"]
+# Client-rendered apps mount forms the raw HTML doesn't show (a static search box
+# would win selection): app roots, framework attributes and script bundles
+SCRIPTED_APP_MARKERS = re.compile(
+    r"""\bid=["']?(?:root|app|__next|__nuxt|svelte|___gatsby)["'\s>]"""
+    r"|\b(?:data-reactroot|ng-app|ng-version|data-v-app|data-server-rendered)\b"
+    r"""|<script\b[^>]*\btype=["']?module"""
+    r"""|<script\b[^>]*\bsrc=["']?[^"'\s>]*(?:bundle|chunk|main|app|vendor|runtime)[.\-]""",
+    re.IGNORECASE,
+)
+# Fewer controls than this (a search box, a newsletter signup) isn't trusted statically
+ANALYSIS_STATIC_MIN_CONTROLS = int(os.getenv("ANALYSIS_STATIC_MIN_CONTROLS", "2"))
+
+# Pooled keep-alive connections for static fetches. The session never stores
+# cookies: each fetch reports its own, so one user's cookies can't leak to another.
+http_session = requests.Session()
+http_session.headers["User-Agent"] = "Mozilla/5.0 (compatible; FormAssistant/1.0)"
+http_session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+
+# 🧾 The form a browser would analyze, when the raw HTML already contains it and
+# nothing suggests scripts render a different one. None means "ask the browser".
+def static_form_from_html(html):
+    if CUSTOM_ELEMENT_TAG.search(html) or SCRIPTED_APP_MARKERS.search(html):
+        return None
+    soup = BeautifulSoup(html, HTML_PARSER)
+    candidates = [
+        {"html": str(form), "controls": len(form.find_all(FORM_CONTROL_TAGS))}
+        for form in soup.find_all("form")
+    ]
+    if not candidates or max(c["controls"] for c in candidates) < ANALYSIS_STATIC_MIN_CONTROLS:
+        return None  # no form, or only a tiny one while the real form may be injected
+    return select_form(candidates)
+
+
+# ⚡ Static fast path: fetch the raw HTML and return the best form's markup when the
+# form is already there without JavaScript, with the final page URL and the cookies
+# the site set on the way. None means "needs a browser".
+def fetch_static_form(url):
+    resp = http_session.get(url, timeout=ANALYSIS_STATIC_TIMEOUT)
+    if resp.status_code != 200 or "html" not in resp.headers.get("Content-Type", ""):
+        return None
+    form_html = static_form_from_html(resp.text)
+    if not form_html:
+        return None
+    cookies = {}
+    for r in (*resp.history, resp):
+        cookies.update(r.cookies.get_dict())
+    return {"html": form_html, "url": resp.url, "cookies": cookies}
+
+
+async def static_form(url):
+    if not ANALYSIS_STATIC_FAST_PATH:
+        return None
+    try:
+        page = await asyncio.to_thread(fetch_static_form, url)
+    except requests.RequestException as e:
+        logger.info("Static fetch failed for %s (%s); using the browser", url, e)
+        return None
+    if page:
+        logger.info("Static fast path: form found in raw HTML of %s", url)
+    return page
+
+
+# 🔍 Load the page once and collect every candidate form (light DOM + nested shadow DOM)
+async def discover_forms(url):
+    async with browser_pool.page() as page:
+        await open_for_analysis(page, url)
+        return await page.evaluate(DISCOVER_FORMS_JS)
+
+# 🎯 Pick the most likely target form: the candidate with the most controls
+# (first one wins on ties). Returns the form's outerHTML or None.
+def select_form(candidates):
+    if not candidates:
+        return None
+    best = max(candidates, key=lambda c: c.get("controls", 0))
+    return best.get("html")
+
+# 🔍 Raw HTML when it already contains the form, else one browser navigation
+async def extract_form_html(url):
+    static = await static_form(url)
+    if static:
+        return static["html"]
+    candidates = await discover_forms(url)
+    logger.info("Discovered %d candidate form(s) on %s", len(candidates), url)
+    return select_form(candidates)
+
+# "html" serializes the chosen form and parses it here; "browser" builds the field
+# schema inside the page (one evaluate, no outerHTML round trip, hidden fields dropped)
+FORM_EXTRACTION_MODE = os.getenv("FORM_EXTRACTION_MODE", "html")
+
+# 🧭 Same selection rule and field dict shape as select_form + extract_fields_from_html,
+# computed in the live DOM. Adds what only the browser knows: rendered visibility,
+# disabled state and accessible names (label, aria-labelledby, aria-label).
+EXTRACT_FIELDS_JS = """
+([allowedTypes, allowedTags]) => {
+    const forms = [];
+    const walk = (root) => {
+        for (const el of root.querySelectorAll('*')) {
+            if (el.tagName === 'FORM') forms.push(el);
+            if (el.shadowRoot) walk(el.shadowRoot);
         }
-        """)
-        await browser.close()
-        return form_html
+    };
+    walk(document);
+    let form = null, best = -1;
+    for (const f of forms) {
+        const n = f.querySelectorAll('input, select, textarea').length;
+        if (n > best) { best = n; form = f; }
+    }
+    if (!form) return null;
 
-# 🧠 Parse HTML of a form and extract structured metadata about all fields
+    const allowed = new Set(allowedTypes), allowedTag = new Set(allowedTags);
+    const text = (el) => (el.innerText || el.textContent || '').replace(/\\s+/g, ' ').trim();
+    const attr = (el, name) => el.getAttribute(name) || '';
+    const visible = (el) => el.checkVisibility
+        ? el.checkVisibility({visibilityProperty: true})
+        : el.getClientRects().length > 0;
+    const label = (el) => {
+        if (el.labels && el.labels.length) {
+            const t = text(el.labels[0]);
+            if (t) return t;
+        }
+        const ids = attr(el, 'aria-labelledby');
+        if (ids) {
+            const root = el.getRootNode();
+            const t = ids.split(/\\s+/).map(id => root.getElementById ? root.getElementById(id) : null)
+                .filter(Boolean).map(text).join(' ').trim();
+            if (t) return t;
+        }
+        return attr(el, 'aria-label');
+    };
+    const groupLabel = (container) => {
+        if (!container) return '';
+        const legend = container.tagName === 'FIELDSET' ? container.querySelector('legend') : null;
+        return label(container) || (legend ? text(legend) : '');
+    };
+    // A custom-styled checkbox/radio is often invisible itself; its label counts too
+    const shown = (el) => visible(el) || Array.from(el.labels || []).some(visible);
+    const usable = (el) => !el.disabled && el.type !== 'hidden' && shown(el);
+
+    const controls = form.querySelectorAll('input, select, textarea, button');
+    // Checkbox/radio groups by type + name, indexed in one sweep
+    const groups = new Map();
+    for (const el of controls) {
+        const type = el.getAttribute('type');
+        if (el.tagName === 'INPUT' && (type === 'checkbox' || type === 'radio') && el.name && usable(el)) {
+            const key = type + '\\u0000' + el.name;
+            if (!groups.has(key)) groups.set(key, []);
+            groups.get(key).push(el);
+        }
+    }
+
+    const fields = [];
+    const seenGroups = new Set();
+    for (const el of controls) {
+        const tag = el.tagName.toLowerCase();
+        const type = tag === 'input' ? (el.getAttribute('type') || 'text')
+            : tag === 'select' ? 'select-one' : tag === 'textarea' ? 'textarea' : (el.getAttribute('type') || 'button');
+        const name = attr(el, 'name');
+        const base = {tag, type, name, label: label(el), id: el.id, options: [], required: el.required};
+        let field = null;
+
+        if (name === 'g-recaptcha-response') {
+            field = {...base, type: 'recaptcha', label: 'Google reCAPTCHA', value: ''};
+        } else if (tag === 'input' && (type === 'checkbox' || type === 'radio')) {
+            const key = type + '\\u0000' + name;
+            if (!name || seenGroups.has(key)) continue;
+            seenGroups.add(key);
+            const group = groups.get(key);
+            if (!group) continue;
+            if (type === 'checkbox') {
+                field = {
+                    tag: 'input', type, name,
+                    label: groupLabel(group[0].closest('div, fieldset, ul')),
+                    options: group.map((cb, i) => label(cb) || cb.value || 'Option' + (i + 1)),
+                    required: group.some(cb => cb.required), multiple: true, id: group[0].id,
+                };
+            } else {
+                field = {
+                    tag: 'input', type, name,
+                    options: group.map(r => r.getAttribute('value') !== null ? r.value : label(r)),
+                    label: label(group[0]), id: group[0].id,
+                    required: group.some(r => r.required),
+                };
+            }
+            fields.push(field);
+            continue;
+        } else if (!usable(el)) {
+            continue;
+        } else if (tag === 'input' && type === 'file') {
+            field = {...base, multiple: el.multiple};
+        } else if (tag === 'input' && type === 'color') {
+            field = {...base, value: el.value || '#000000'};
+        } else if (tag === 'input' || tag === 'textarea') {
+            field = {
+                ...base, value: el.value,
+                min: tag === 'input' ? attr(el, 'min') : '', max: tag === 'input' ? attr(el, 'max') : '',
+                minLength: attr(el, 'minlength'), maxLength: attr(el, 'maxlength'),
+                pattern: tag === 'input' ? attr(el, 'pattern') : '',
+            };
+        } else if (tag === 'select') {
+            field = {
+                ...base, value: '', options: Array.from(el.options).map(o => o.text.trim()),
+                min: '', max: '', minLength: '', maxLength: '', pattern: '',
+            };
+        } else if (tag === 'button' && (type === 'submit' || !el.hasAttribute('type'))) {
+            field = {
+                tag, type: 'submit', name, id: el.id,
+                value: el.getAttribute('value') !== null ? el.value : text(el),
+                label: attr(el, 'aria-label') || text(el) || 'Submit',
+            };
+        }
+        if (field && (allowed.has(field.type) || allowedTag.has(tag))) fields.push(field);
+    }
+    return {fields, controls: best};
+}
+"""
+
+
+# 🧭 Browser-mode extraction: one navigation, one evaluate, fields straight from the DOM
+async def extract_fields_in_browser(url):
+    async with browser_pool.page() as page:
+        await open_for_analysis(page, url)
+        result = await page.evaluate(EXTRACT_FIELDS_JS, [sorted(ALLOWED_TYPES), sorted(ALLOWED_TAGS)])
+    if not result:
+        return []
+    logger.info("Extracted %d field(s) in-page from %s", len(result["fields"]), url)
+    return result["fields"]
+
+
+# 📸 What /analyze-form fingerprints and parses, per FORM_EXTRACTION_MODE:
+# returns (source, fields, submission). When source is form HTML (html mode, or the
+# static fast path) fields is None: parse with extract_fields_from_html only if the
+# hash changed. In "browser" mode source is the canonical JSON of the fields themselves.
+# submission is form_submission_meta for forms served as plain HTML, else None.
+async def extract_form_snapshot(url, mode=None):
+    if (mode or FORM_EXTRACTION_MODE) == "browser":
+        # Fields always come from the rendered page (visibility, computed labels); the
+        # raw HTML, fetched alongside, only supplies the submission metadata
+        static, fields = await asyncio.gather(static_form(url), extract_fields_in_browser(url))
+        submission = form_submission_meta(static["html"], static["url"], static["cookies"]) if static else None
+        return json.dumps(fields, sort_keys=True, ensure_ascii=False), fields, submission
+    # Server-rendered forms need no browser in html mode
+    static = await static_form(url)
+    if static:
+        submission = form_submission_meta(static["html"], static["url"], static["cookies"])
+        return static["html"], None, submission
+    candidates = await discover_forms(url)
+    logger.info("Discovered %d candidate form(s) on %s", len(candidates), url)
+    return select_form(candidates), None, None
+
+
+# Tags the extractor cares about; everything else in the form is skipped
+FIELD_TAGS = ["input", "select", "textarea", "button", "label"]
+
+# Allowed types and tags
+ALLOWED_TYPES = {
+    "text", "email", "file", "select-one", "textarea", "checkbox", "multi-checkbox",
+    "radio", "color", "date", "tel", "number", "submit", "button", "recaptcha", "time"
+}
+ALLOWED_TAGS = {"select", "textarea", "button"}
+
+
+# 🧠 Parse HTML of a form and extract structured metadata about all fields.
+# One sweep over the form's controls and labels: labels are indexed by `for`
+# and checkbox/radio groups by name up front, so the cost is linear in the DOM.
 def extract_fields_from_html(form_html):
     if not form_html:
         return []
-    soup = BeautifulSoup(form_html, "html.parser")
+    soup = BeautifulSoup(form_html, HTML_PARSER)
     form = soup.find("form")
     if not form:
         return []
 
-    fields = []
-    radio_groups = {}
+    labels_for = {}   # for= id -> first <label> pointing at it
+    controls = []     # form controls in DOM order
+    groups = {}       # (type, name) -> checkbox/radio inputs sharing that name
+    for elem in form.find_all(FIELD_TAGS):
+        if elem.name == "label":
+            target = elem.get("for")
+            if target and target not in labels_for:
+                labels_for[target] = elem
+            continue
+        controls.append(elem)
+        if elem.name == "input" and elem.get("type") in ("checkbox", "radio"):
+            name = elem.get("name", "")
+            if name and name != "g-recaptcha-response":
+                groups.setdefault((elem["type"], name), []).append(elem)
 
-    # Helper to fetch label
+    label_texts = {}
+
+    # Helper to fetch label: <label for=id>, else an enclosing <label>
     def get_label(field):
         label = ""
-        if 'id' in field.attrs:
-            label_tag = form.find('label', attrs={'for': field['id']})
-            if label_tag:
-                label = label_tag.get_text(strip=True)
+        field_id = field.get("id")
+        if field_id is not None:
+            label = label_texts.get(field_id)
+            if label is None:
+                label_tag = labels_for.get(field_id)
+                label = label_texts[field_id] = label_tag.get_text(strip=True) if label_tag else ""
         if not label:
             parent_label = field.find_parent('label')
             if parent_label:
                 label = parent_label.get_text(strip=True)
         return label
 
-    # Track processed elements to avoid double-count
-    processed = set()
-
-
-    # Main traversal: in DOM order
-    for elem in form.descendants:
-        if getattr(elem, "name", None) in ["input", "select", "textarea", "button"] and elem not in processed:
-            tag = elem.name
-            # Determine type, with defaults and explicit types for selects/textareas/buttons
-            if tag == "input":
-                type_ = elem.get("type", "text")
-            elif tag == "select":
-                type_ = "select-one"
-            elif tag == "textarea":
-                type_ = "textarea"
-            elif tag == "button":
-                type_ = elem.get("type", "button")
-            else:
-                type_ = ""
+    fields = []
+    emitted_groups = set()
+    for elem in controls:
+        tag = elem.name
+        # Determine type, with defaults and explicit types for selects/textareas/buttons
+        if tag == "input":
+            type_ = elem.get("type", "text")
+        elif tag == "select":
+            type_ = "select-one"
+        elif tag == "textarea":
+            type_ = "textarea"
+        else:
+            type_ = elem.get("type", "button")
 
-            name = elem.get("name", "")
-            field = None
+        name = elem.get("name", "")
+        field = None
 
-            # Google reCAPTCHA special case (textarea or input)
-            if name == "g-recaptcha-response":
-                field = {
-                    "tag": tag,
-                    "type": "recaptcha",
-                    "name": name,
-                    "label": "Google reCAPTCHA",
-                    "id": elem.get("id", ""),
-                    "value": "",
-                    "options": [],
-                    "required": elem.has_attr("required"),
-                }
+        # Google reCAPTCHA special case (textarea or input)
+        if name == "g-recaptcha-response":
+            field = {
+                "tag": tag,
+                "type": "recaptcha",
+                "name": name,
+                "label": "Google reCAPTCHA",
+                "id": elem.get("id", ""),
+                "value": "",
+                "options": [],
+                "required": elem.has_attr("required"),
+            }
 
-            # Grouped checkboxes
-            elif tag == "input" and type_ == "checkbox":
-                if name and name not in processed:
-                    group = form.find_all("input", {"type": "checkbox", "name": name}) if name else [elem]
-                    options = []
-                    for cb in group:
-                        options.append(get_label(cb) or cb.get("value", "") or f"Option{len(options) + 1}")
-                        processed.add(cb)
-                    fields.append({
-                        "tag": "input",
-                        "type": "checkbox",
-                        "name": name,
-                        "label": get_label(group[0].find_parent(['div', 'fieldset', 'ul']) or group[0]),
-                        "options": options,
-                        "required": any(cb.has_attr("required") for cb in group),
-                        "multiple": True,
-                        "id": group[0].get("id", ""),
-                    })
+        # Grouped checkboxes / radio groups: emitted once, at the first member
+        elif tag == "input" and type_ in ("checkbox", "radio"):
+            key = (type_, name)
+            if not name or key in emitted_groups:
                 continue
-
-            # Radio groups
-            elif tag == "input" and type_ == "radio":
-                if name and name not in radio_groups:
-                    group = form.find_all("input", {"type": "radio", "name": name})
-                    options = [cb.get("value", get_label(cb)) for cb in group]
-                    label = get_label(group[0])
-                    fields.append({
-                        "tag": "input",
-                        "type": "radio",
-                        "name": name,
-                        "options": options,
-                        "label": label,
-                        "id": group[0].get("id", ""),
-                        "required": any(cb.has_attr("required") for cb in group),
-                    })
-                    for cb in group:
-                        processed.add(cb)
-                continue
-
-            # Single checkbox
-            elif tag == "input" and type_ == "checkbox":
+            emitted_groups.add(key)
+            group = groups[key]
+            if type_ == "checkbox":
+                options = []
+                for cb in group:
+                    options.append(get_label(cb) or cb.get("value", "") or f"Option{len(options) + 1}")
                 field = {
-                    "tag": tag,
-                    "type": type_,
+                    "tag": "input",
+                    "type": "checkbox",
                     "name": name,
-                    "value": elem.get("value", ""),
-                    "label": get_label(elem),
-                    "id": elem.get("id", ""),
-                    "options": [],
-                    "required": elem.has_attr("required"),
+                    "label": get_label(group[0].find_parent(['div', 'fieldset', 'ul']) or group[0]),
+                    "options": options,
+                    "required": any(cb.has_attr("required") for cb in group),
+                    "multiple": True,
+                    "id": group[0].get("id", ""),
                 }
-
-            # File input
-            elif tag == "input" and type_ == "file":
+            else:
                 field = {
-                    "tag": tag,
-                    "type": "file",
+                    "tag": "input",
+                    "type": "radio",
                     "name": name,
-                    "label": get_label(elem),
-                    "id": elem.get("id", ""),
-                    "options": [],
-                    "required": elem.has_attr("required"),
-                    "multiple": elem.has_attr("multiple"),
+                    "options": [cb.get("value", get_label(cb)) for cb in group],
+                    "label": get_label(group[0]),
+                    "id": group[0].get("id", ""),
+                    "required": any(cb.has_attr("required") for cb in group),
                 }
 
-            # Color picker
-            elif tag == "input" and type_ == "color":
-                field = {
-                    "tag": tag,
-                    "type": "color",
-                    "name": name,
-                    "value": elem.get("value", "#000000"),
-                    "label": get_label(elem),
-                    "id": elem.get("id", ""),
-                    "options": [],
-                    "required": elem.has_attr("required"),
-                }
+        # File input
+        elif tag == "input" and type_ == "file":
+            field = {
+                "tag": tag,
+                "type": "file",
+                "name": name,
+                "label": get_label(elem),
+                "id": elem.get("id", ""),
+                "options": [],
+                "required": elem.has_attr("required"),
+                "multiple": elem.has_attr("multiple"),
+            }
 
-            # Other inputs (text, email, password, etc.)
-            elif tag == "input":
-                field = {
-                    "tag": tag,
-                    "type": type_,
-                    "name": name,
-                    "value": elem.get("value", ""),
-                    "label": get_label(elem),
-                    "id": elem.get("id", ""),
-                    "options": [],
-                    "min": elem.get("min", ""),
-                    "max": elem.get("max", ""),
-                    "minLength": elem.get("minlength", ""),
-                    "maxLength": elem.get("maxlength", ""),
-                    "required": elem.has_attr("required"),
-                    "pattern": elem.get("pattern", ""),
-                }
+        # Color picker
+        elif tag == "input" and type_ == "color":
+            field = {
+                "tag": tag,
+                "type": "color",
+                "name": name,
+                "value": elem.get("value", "#000000"),
+                "label": get_label(elem),
+                "id": elem.get("id", ""),
+                "options": [],
+                "required": elem.has_attr("required"),
+            }
 
-            # Textarea (not recaptcha)
-            elif tag == "textarea":
-                if name == "g-recaptcha-response":
-                    field = {
-                        "tag": tag,
-                        "type": "recaptcha",
-                        "name": name,
-                        "label": "Google reCAPTCHA",
-                        "id": elem.get("id", ""),
-                        "value": "",
-                        "options": [],
-                        "required": elem.has_attr("required"),
-                    }
-                else:
-                    field = {
-                        "tag": tag,
-                        "type": "textarea",
-                        "name": name,
-                        "value": elem.string if elem.string else "",
-                        "label": get_label(elem),
-                        "id": elem.get("id", ""),
-                        "options": [],
-                        "min": "",
-                        "max": "",
-                        "minLength": elem.get("minlength", ""),
-                        "maxLength": elem.get("maxlength", ""),
-                        "required": elem.has_attr("required"),
-                        "pattern": "",
-                    }
-
-            # Select
-            elif tag == "select":
-                options = [option.get_text(strip=True) for option in elem.find_all("option")]
-                field = {
-                    "tag": tag,
-                    "type": "select-one",
-                    "name": name,
-                    "value": "",
-                    "label": get_label(elem),
-                    "id": elem.get("id", ""),
-                    "options": options,
-                    "min": "",
-                    "max": "",
-                    "minLength": "",
-                    "maxLength": "",
-                    "required": elem.has_attr("required"),
-                    "pattern": "",
-                }
+        # Other inputs (text, email, password, etc.)
+        elif tag == "input":
+            field = {
+                "tag": tag,
+                "type": type_,
+                "name": name,
+                "value": elem.get("value", ""),
+                "label": get_label(elem),
+                "id": elem.get("id", ""),
+                "options": [],
+                "min": elem.get("min", ""),
+                "max": elem.get("max", ""),
+                "minLength": elem.get("minlength", ""),
+                "maxLength": elem.get("maxlength", ""),
+                "required": elem.has_attr("required"),
+                "pattern": elem.get("pattern", ""),
+            }
 
-            # Submit button
-            elif (tag == "button" and (type_ == "submit" or not elem.has_attr("type"))) or (tag == "input" and type_ == "submit"):
-                field = {
-                    "tag": tag,
-                    "type": "submit",
-                    "name": name,
-                    "value": elem.get("value", elem.get_text(strip=True) if tag == "button" else ""),
-                    "label": elem.get("aria-label", "") or elem.get_text(strip=True) or "Submit",
-                    "id": elem.get("id", ""),
-                }
+        # Textarea (not recaptcha)
+        elif tag == "textarea":
+            field = {
+                "tag": tag,
+                "type": "textarea",
+                "name": name,
+                "value": str(elem.string) if elem.string else "",
+                "label": get_label(elem),
+                "id": elem.get("id", ""),
+                "options": [],
+                "min": "",
+                "max": "",
+                "minLength": elem.get("minlength", ""),
+                "maxLength": elem.get("maxlength", ""),
+                "required": elem.has_attr("required"),
+                "pattern": "",
+            }
 
-            if field:
-                fields.append(field)
-                processed.add(elem)
+        # Select
+        elif tag == "select":
+            options = [option.get_text(strip=True) for option in elem.find_all("option")]
+            field = {
+                "tag": tag,
+                "type": "select-one",
+                "name": name,
+                "value": "",
+                "label": get_label(elem),
+                "id": elem.get("id", ""),
+                "options": options,
+                "min": "",
+                "max": "",
+                "minLength": "",
+                "maxLength": "",
+                "required": elem.has_attr("required"),
+                "pattern": "",
+            }
 
-    # Allowed types and tags
-    allowed_types = {
-        "text", "email", "file", "select-one", "textarea", "checkbox", "multi-checkbox",
-        "radio", "color", "date", "tel", "number", "submit", "button", "recaptcha","time"
-    }
-    allowed_tags = {"select", "textarea", "button"}
+        # Submit button
+        elif tag == "button" and (type_ == "submit" or not elem.has_attr("type")):
+            field = {
+                "tag": tag,
+                "type": "submit",
+                "name": name,
+                "value": elem.get("value", elem.get_text(strip=True)),
+                "label": elem.get("aria-label", "") or elem.get_text(strip=True) or "Submit",
+                "id": elem.get("id", ""),
+            }
+
+        if field and (field["type"] in ALLOWED_TYPES or tag in ALLOWED_TAGS):
+            fields.append(field)
 
-    # Filter fields to only allowed types or tags
-    fields = [f for f in fields if (f.get("type") in allowed_types or f.get("tag") in allowed_tags)]
     logger.info("==========================================")
     logger.info("Extracted fields: %s", fields)
     logger.info("==========================================")
     return fields
 
+# Markers of forms that only a browser can submit correctly
+CAPTCHA_CLASSES = {"g-recaptcha", "h-captcha", "cf-turnstile"}
+# Input types that never carry a user value in a direct submission
+NON_VALUE_TYPES = {"submit", "button", "image", "reset", "file"}
+
+
+# Whitespace/case-insensitive key, the same normalization FILL_FORM_JS uses
+def choice_key(text):
+    return re.sub(r"\s+", "", str(text or "")).lower()
+
+
+# 📮 Everything needed to submit a server-rendered form without a browser: resolved
+# action, method, enctype, the values a browser would send by default (hidden
+# inputs, prefilled and pre-checked controls), option label -> value maps and the
+# submit button. "direct" is False (with a reason) when the form relies on scripts
+# or a captcha, so submission must go through Playwright.
+def form_submission_meta(form_html, page_url, cookies=None):
+    soup = BeautifulSoup(form_html or "", HTML_PARSER)
+    form = soup.find("form")
+    if not form:
+        return None
+    action = (form.get("action") or "").strip()
+    method = (form.get("method") or "get").strip().lower()
+    enctype = (form.get("enctype") or "application/x-www-form-urlencoded").strip().lower()
+
+    labels_for = {lbl["for"]: lbl.get_text(strip=True) for lbl in form.find_all("label", attrs={"for": True})}
+
+    def label_of(el):
+        if el.get("id") in labels_for:
+            return labels_for[el["id"]]
+        parent = el.find_parent("label")
+        return parent.get_text(strip=True) if parent else ""
+
+    defaults, choices, submitter = [], {}, None
+    members = {}  # name -> number of checkbox/radio inputs sharing it
+    has_captcha = False
+    for el in form.find_all(["input", "select", "textarea", "button", "div"]):
+        if el.name == "div":
+            has_captcha = has_captcha or bool(CAPTCHA_CLASSES.intersection(el.get("class") or []))
+            continue
+        name = el.get("name", "")
+        type_ = (el.get("type") or ("submit" if el.name == "button" else "text")).lower()
+        if name == "g-recaptcha-response":
+            has_captcha = True
+            continue
+        if type_ == "submit" and el.name in ("input", "button"):
+            if submitter is None and not el.has_attr("disabled"):
+                submitter = [name, el.get("value", "")] if name else []
+            continue
+        if not name or el.has_attr("disabled"):
+            continue
+        if el.name == "select":
+            entry = choices.setdefault(name, {"kind": "select", "multiple": el.has_attr("multiple"), "options": {}})
+            selected = []
+            for option in el.find_all("option"):
+                value = option.get("value", option.get_text(strip=True))
+                entry["options"].setdefault(choice_key(option.get_text()), value)
+                entry["options"].setdefault(choice_key(value), value)
+                if option.has_attr("selected"):
+                    selected.append(value)
+            if not selected and not entry["multiple"]:
+                first = el.find("option")
+                selected = [first.get("value", first.get_text(strip=True))] if first else []
+            defaults += [[name, v] for v in (selected if entry["multiple"] else selected[:1])]
+        elif el.name == "textarea":
+            defaults.append([name, el.get_text()])
+        elif type_ in ("checkbox", "radio"):
+            value = el.get("value", "on")
+            entry = choices.setdefault(name, {"kind": type_, "multiple": False, "options": {}})
+            members[name] = members.get(name, 0) + 1
+            entry["multiple"] = type_ == "checkbox" and members[name] > 1
+            entry["options"].setdefault(choice_key(label_of(el)), value)
+            entry["options"].setdefault(choice_key(value), value)
+            if el.has_attr("checked"):
+                defaults.append([name, value])
+        elif type_ not in NON_VALUE_TYPES:
+            defaults.append([name, el.get("value", "")])
+
+    if form.has_attr("onsubmit") or action.lower().startswith("javascript:"):
+        reason = "submit handler"
+    elif not form.has_attr("action") and not form.has_attr("method"):
+        reason = "no action or method (submitted by script)"
+    elif method not in ("get", "post"):
+        reason = f"method {method}"
+    elif has_captcha:
+        reason = "captcha"
+    else:
+        reason = ""
+    return {
+        "action": urljoin(page_url, action),
+        "method": method,
+        "enctype": enctype,
+        "defaults": defaults,
+        "choices": choices,
+        "submitter": submitter or None,
+        "cookies": cookies or {},
+        # Page whose response set the cookies; they are only sent back to its host
+        "page_url": page_url,
+        "captured_at": time.time(),
+        "direct": not reason,
+        "reason": reason,
+    }
+
 # 📥 FastAPI endpoint logic to extract form from a given URL
-# Tries shadow DOM first, falls back to normal form extraction
+# Discovers light-DOM and shadow-DOM forms in a single page load
 async def extract_form(request: Request, url: str = Form(...)):
-    shadow_form = await extract_shadow_form(url)
-    if shadow_form:
-        form_html = shadow_form
-    else:
-        form_html = await extract_normal_form(url)
+    form_html = await extract_form_html(url)
 
     fields = extract_fields_from_html(form_html)
     
@@ -306,4 +639,4 @@ async def extract_form(request: Request, url: str = Form(...)):
         "form_html": form_html,
         "fields": fields,
         "url": url
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from db import SessionLocal
+from models import QuestionTemplate
+
+logger = logging.getLogger(__name__)
+
+QUESTION_CACHE_MAX_ENTRIES = int(os.getenv("QUESTION_CACHE_MAX_ENTRIES", "2048"))
+# Rows kept in SQLite; least recently used templates are pruned beyond this
+QUESTION_CACHE_MAX_ROWS = int(os.getenv("QUESTION_CACHE_MAX_ROWS", "20000"))
+QUESTION_CACHE_PERSIST = os.getenv("QUESTION_CACHE_PERSIST", "1") == "1"
+
+
+# 🗃️ Memoizes generated questions by field signature so common fields
+# ("Email", "Phone", "Date of birth"...) never hit the LLM twice.
+# Memory LRU in front of the question_templates table, with hit/miss counters.
+# SQLite calls run in a worker thread, never on the event loop.
+class QuestionCache:
+    def __init__(self, max_entries: int = QUESTION_CACHE_MAX_ENTRIES,
+                 max_rows: int = QUESTION_CACHE_MAX_ROWS, persist: bool = QUESTION_CACHE_PERSIST):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.persist = persist
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    # 🔑 Signature of a field: normalized label, type/tag, cleaned options and prompt version
+    @staticmethod
+    def key(label, ftype, clean_options, prompt_version):
+        raw = json.dumps([
+            " ".join(str(label).lower().split()),
+            str(ftype).lower(),
+            [" ".join(str(o).lower().split()) for o in clean_options],
+            prompt_version,
+        ])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    # 🔍 Looks up many signatures at once; returns questions with None for misses
+    async def get_many(self, keys):
+        found = {}
+        for k in keys:
+            if k in self._entries:
+                self._entries.move_to_end(k)
+                found[k] = self._entries[k]
+        missing = [k for k in keys if k not in found]
+        if missing and self.persist:
+            loaded = await asyncio.to_thread(self._load_many, missing)
+            for k, question in loaded.items():
+                self._remember(k, question)
+            found.update(loaded)
+        results = [found.get(k) for k in keys]
+        hit_count = sum(1 for q in results if q is not None)
+        self.hits += hit_count
+        self.misses += len(results) - hit_count
+        return results
+
+    async def put_many(self, items):
+        if not items:
+            return
+        for k, question in items.items():
+            self._remember(k, question)
+        if self.persist:
+            await asyncio.to_thread(self._save_many, items)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def _remember(self, k, question):
+        self._entries[k] = question
+        self._entries.move_to_end(k)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load_many(self, keys):
+        db = SessionLocal()
+        try:
+            rows = db.query(QuestionTemplate).filter(QuestionTemplate.signature.in_(keys)).all()
+            # Read before commit(): committing expires the rows and each access would reload one
+            loaded = {row.signature: row.question for row in rows}
+            now = time.time()
+            for row in rows:
+                row.hits = (row.hits or 0) + 1
+                row.last_used = now
+            db.commit()
+            return loaded
+        except Exception as e:
+            db.rollback()
+            logger.warning("Question cache load failed: %s", e)
+            return {}
+        finally:
+            db.close()
+
+    def _save_many(self, items):
+        db = SessionLocal()
+        try:
+            now = time.time()
+            for k, question in items.items():
+                db.merge(QuestionTemplate(signature=k, question=question, hits=0, last_used=now))
+            db.commit()
+            self._prune(db)
+        except Exception as e:
+            db.rollback()
+            logger.warning("Question cache save failed: %s", e)
+        finally:
+            db.close()
+
+    # 🧹 Evicts least recently used rows once the table grows past max_rows
+    def _prune(self, db):
+        count = db.query(QuestionTemplate).count()
+        excess = count - self.max_rows
+        if excess <= 0:
+            return
+        stale = [
+            row.signature for row in db.query(QuestionTemplate.signature)
+            .order_by(QuestionTemplate.last_used.asc())
+            .limit(excess)
+        ]
+        db.query(QuestionTemplate).filter(QuestionTemplate.signature.in_(stale)).delete(
+            synchronize_session=False
+        )
+        db.commit()
+
+
+question_cache = QuestionCache()
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds of inactivity after which a form session is dropped
+SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", "1800"))
+# "memory" (single worker) or "redis" (any Redis-compatible server shared by workers)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+
+
+# 📋 Per-user form session: what /analyze-form discovered and where the /stt
+# conversation currently is. Slotted to keep thousands of sessions compact.
+class FormSession:
+    __slots__ = (
+        "session_id", "target_url", "fields", "field_questions",
+        "field_types", "field_options", "current_field", "cursor", "submission", "last_seen",
+    )
+
+    def __init__(self, session_id, target_url="", fields=None, field_questions=None,
+                 field_types=None, field_options=None, current_field=None, cursor=None, submission=None, last_seen=None):
+        self.session_id = session_id
+        self.target_url = target_url
+        self.fields = fields or []
+        self.field_questions = field_questions or {}
+        self.field_types = field_types or {}
+        self.field_options = field_options or {}
+        # Position of current_field in fields; kept explicitly so advancing is O(1)
+        if cursor is None:
+            cursor = self.fields.index(current_field) if current_field in self.fields else 0
+        self.cursor = cursor
+        self.current_field = current_field
+        # Form action/method/enctype, defaults and cookies captured at analysis time
+        # (parser.form_submission_meta) for browserless submission; None if unavailable
+        self.submission = submission
+        self.last_seen = last_seen or time.time()
+
+    # ⏭️ Moves to the next field (None once every field has been answered)
+    def advance(self):
+        self.cursor += 1
+        self.current_field = self.fields[self.cursor] if self.cursor < len(self.fields) else None
+        return self.current_field
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{k: data.get(k) for k in cls.__slots__})
+
+
+# 🧠 In-process backend: a dict plus idle expiry. Sessions live in one worker only.
+class InMemorySessionBackend:
+    def __init__(self, ttl: int = SESSION_IDLE_TTL):
+        self.ttl = ttl
+        self._sessions = {}
+
+    async def get(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if time.time() - session.last_seen > self.ttl:
+            self._sessions.pop(session_id, None)
+            return None
+        return session
+
+    async def save(self, session):
+        self._sessions[session.session_id] = session
+
+    async def delete(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    async def purge_expired(self):
+        cutoff = time.time() - self.ttl
+        expired = [sid for sid, s in self._sessions.items() if s.last_seen < cutoff]
+        for sid in expired:
+            self._sessions.pop(sid, None)
+        return len(expired)
+
+
+# 🗄️ Shared backend for multi-worker deployments. Works against Redis or any
+# wire-compatible stand-in (Valkey, KeyDB, a local redis-server); expiry via key TTL.
+class RedisSessionBackend:
+    def __init__(self, url: str = SESSION_REDIS_URL, ttl: int = SESSION_IDLE_TTL):
+        import redis.asyncio as redis  # optional dependency, only needed for this backend
+        self.ttl = ttl
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    def _key(self, session_id):
+        return f"form_session:{session_id}"
+
+    async def get(self, session_id):
+        raw = await self._redis.get(self._key(session_id))
+        return FormSession.from_dict(json.loads(raw)) if raw else None
+
+    async def save(self, session):
+        await self._redis.set(self._key(session.session_id), json.dumps(session.to_dict()), ex=self.ttl)
+
+    async def delete(self, session_id):
+        await self._redis.delete(self._key(session_id))
+
+    async def purge_expired(self):
+        return 0  # Redis expires keys itself
+
+
+# 🔑 Issues session IDs and refreshes idle timers on every access
+class SessionManager:
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def create(self, **state):
+        session = FormSession(secrets.token_urlsafe(16), **state)
+        await self.backend.save(session)
+        return session
+
+    async def get(self, session_id):
+        if not session_id:
+            return None
+        session = await self.backend.get(session_id)
+        if session is not None:
+            session.last_seen = time.time()
+        return session
+
+    async def save(self, session):
+        session.last_seen = time.time()
+        await self.backend.save(session)
+
+    async def delete(self, session_id):
+        await self.backend.delete(session_id)
+
+    # 🧹 Periodic sweep so abandoned sessions don't accumulate in memory
+    async def run_expiry_loop(self, interval: float = 60.0):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                purged = await self.backend.purge_expired()
+                if purged:
+                    logger.info("Expired %d idle form session(s)", purged)
+            except Exception as e:
+                logger.warning("Session expiry sweep failed: %s", e)
+
+
+def build_session_backend(name: str = SESSION_BACKEND):
+    if name == "redis":
+        return RedisSessionBackend()
+    return InMemorySessionBackend()
+
+
+session_manager = SessionManager(build_session_backend())
@@ -1,52 +1,317 @@
-from google.cloud import speech_v1p1beta1 as speech
-from google.oauth2 import service_account
+import asyncio
+import hashlib
+import json
 import os
+import queue
+import threading
+from audio_buffer import iter_chunks, leading_silence_bytes
 
-# Set credentials
-CREDENTIALS_PATH = "google-speech-to-text-text-to-speech.json"
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = CREDENTIALS_PATH
-credentials = service_account.Credentials.from_service_account_file(CREDENTIALS_PATH)
-client = speech.SpeechClient(credentials=credentials)
-
-# 🔧 Build configuration for Google Cloud's streaming speech recognition
-def build_streaming_config():
-    return speech.StreamingRecognitionConfig(
-        config=speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,
-            language_code="en-US",
-            enable_automatic_punctuation=True
-        ),
-        interim_results=False,
-        single_utterance=True
-    )
-
-
-# 🎙️ Transcribes streaming audio bytes using Google Cloud STT (Streaming)
-def transcribe_streaming(audio_bytes: bytes) -> str:
-    # 🧹 Clean leading null bytes (can cause decoding issues)
-    while audio_bytes.startswith(b'\x00\x00'):
-        audio_bytes = audio_bytes[2:]
-        
-     # 📤 Generator that yields small audio chunks for streaming    
-    def request_gen():
-        chunk_size = 4096
-        for i in range(0, len(audio_bytes), chunk_size):
-            yield speech.StreamingRecognizeRequest(audio_content=audio_bytes[i:i + chunk_size])
-
-    try:
-        responses = client.streaming_recognize(build_streaming_config(), request_gen())
+# Which engine handles speech: "google" (cloud), "local" (Vosk, CPU-only) or "fake" (fixtures)
+STT_BACKEND = os.getenv("STT_BACKEND", "google")
+CREDENTIALS_PATH = os.getenv("GOOGLE_CREDENTIALS_PATH", "google-speech-to-text-text-to-speech.json")
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "models/vosk-model-small-en-us")
+# Directory of <name>.pcm (16 kHz mono Int16) + <name>.txt transcript pairs for the fake
+STT_FAKE_FIXTURES = os.getenv("STT_FAKE_FIXTURES", "")
+SAMPLE_RATE = 16000
+CHUNK_SIZE = 4096
+# Slice from the middle of each fake fixture clip that identifies it inside streamed audio
+FAKE_PROBE_BYTES = SAMPLE_RATE * 2 // 10
 
+
+# 🧵 Shared plumbing for incremental recognizers: frames are queued from the event
+# loop and consumed by a worker thread that runs the engine. Events are pushed onto an
+# asyncio queue as (kind, text, recognizer) with kind in "interim", "final",
+# "endpoint", "error", "end". One recognizer covers one utterance; callers open a
+# new one once it is closed.
+class ThreadedRecognizer:
+    def __init__(self, events, loop=None):
+        self.events = events
+        self.closed = False
+        self._loop = loop or asyncio.get_running_loop()
+        self._audio = queue.Queue()
+        self._thread = None
+
+    # 📥 Queue a frame; the engine stream is opened lazily on the first frame
+    def feed(self, chunk: bytes):
+        if self.closed:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._audio.put(bytes(chunk))
+
+    # 🛑 Stop sending audio (unblocks the frame iterator)
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._audio.put(None)
+
+    def _frames(self):
+        while True:
+            chunk = self._audio.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    def _emit(self, kind, text=""):
+        self._loop.call_soon_threadsafe(self.events.put_nowait, (kind, text, self))
+
+    def _run(self):
+        try:
+            self._recognize(self._frames())
+        except Exception as e:
+            print("❌ Streaming STT error:", e)
+            self._emit("error", str(e))
+        finally:
+            self.close()
+            self._emit("end")
+
+    def _recognize(self, frames):
+        raise NotImplementedError
+
+
+# ☁️ Google Cloud Speech. The client is created on first use, so the app can start
+# (and run other backends) without a credentials file.
+class GoogleSTTBackend:
+    def __init__(self, credentials_path: str = CREDENTIALS_PATH):
+        self.credentials_path = credentials_path
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def speech(self):
+        from google.cloud import speech_v1p1beta1 as speech
+        return speech
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from google.oauth2 import service_account
+                os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = self.credentials_path
+                credentials = service_account.Credentials.from_service_account_file(self.credentials_path)
+                self._client = self.speech.SpeechClient(credentials=credentials)
+            return self._client
+
+    # 🔧 Build configuration for Google Cloud's streaming speech recognition
+    def build_streaming_config(self, interim_results=False):
+        speech = self.speech
+        return speech.StreamingRecognitionConfig(
+            config=speech.RecognitionConfig(
+                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                sample_rate_hertz=SAMPLE_RATE,
+                language_code="en-US",
+                enable_automatic_punctuation=True
+            ),
+            interim_results=interim_results,
+            single_utterance=True
+        )
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        speech = self.speech
+
+        # 📤 Generator that yields small audio chunks for streaming
+        def request_gen():
+            for chunk in iter_chunks(audio_bytes, CHUNK_SIZE):
+                yield speech.StreamingRecognizeRequest(audio_content=bytes(chunk))
+
+        try:
+            responses = self.client.streaming_recognize(self.build_streaming_config(), request_gen())
+            for response in responses:
+                for result in response.results:
+                    if result.is_final and result.alternatives:
+                        transcript = result.alternatives[0].transcript.strip()
+                        print("🗣️ Google Streaming STT Final:", repr(transcript))
+                        return transcript
+            print("⚠️ Google Streaming STT gave no final result")
+        except Exception as e:
+            print("❌ Streaming STT error:", e)
+        return ""
+
+    def open_stream(self, events, loop=None):
+        return GoogleStreamingRecognizer(self, events, loop)
+
+
+# 🎧 Forwards frames to one streaming_recognize call as they arrive; Google's own
+# endpointing (single_utterance) decides when the user has finished
+class GoogleStreamingRecognizer(ThreadedRecognizer):
+    def __init__(self, backend, events, loop=None):
+        super().__init__(events, loop)
+        self.backend = backend
+
+    def _recognize(self, frames):
+        speech = self.backend.speech
+        end_of_utterance = speech.StreamingRecognizeResponse.SpeechEventType.END_OF_SINGLE_UTTERANCE
+        requests = (speech.StreamingRecognizeRequest(audio_content=chunk) for chunk in frames)
+        responses = self.backend.client.streaming_recognize(
+            self.backend.build_streaming_config(interim_results=True), requests
+        )
         for response in responses:
+            if response.speech_event_type == end_of_utterance:
+                self._emit("endpoint")
             for result in response.results:
-                if result.is_final and result.alternatives:
-                    transcript = result.alternatives[0].transcript.strip()
+                if not result.alternatives:
+                    continue
+                transcript = result.alternatives[0].transcript.strip()
+                if result.is_final:
                     print("🗣️ Google Streaming STT Final:", repr(transcript))
-                    return transcript
+                    self._emit("final", transcript)
+                else:
+                    self._emit("interim", transcript)
+
+
+# 💻 Offline CPU engine via Vosk (Kaldi). The model directory is loaded once and
+# shared; each utterance gets its own lightweight KaldiRecognizer.
+class LocalSTTBackend:
+    def __init__(self, model_path: str = VOSK_MODEL_PATH):
+        import vosk  # optional dependency, only needed for this backend
+        self._vosk = vosk
+        self.model = vosk.Model(model_path)
+
+    def new_recognizer(self):
+        return self._vosk.KaldiRecognizer(self.model, SAMPLE_RATE)
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        rec = self.new_recognizer()
+        for chunk in iter_chunks(audio_bytes, CHUNK_SIZE):
+            rec.AcceptWaveform(bytes(chunk))
+        return json.loads(rec.FinalResult()).get("text", "").strip()
+
+    def open_stream(self, events, loop=None):
+        return LocalStreamingRecognizer(self, events, loop)
+
+
+class LocalStreamingRecognizer(ThreadedRecognizer):
+    def __init__(self, backend, events, loop=None):
+        super().__init__(events, loop)
+        self.backend = backend
+
+    def _recognize(self, frames):
+        rec = self.backend.new_recognizer()
+        for chunk in frames:
+            if rec.AcceptWaveform(chunk):
+                # Vosk detected the end of an utterance
+                self._emit("final", json.loads(rec.Result()).get("text", "").strip())
+                self._emit("endpoint")
+                return
+            partial = json.loads(rec.PartialResult()).get("partial", "")
+            if partial:
+                self._emit("interim", partial)
+        text = json.loads(rec.FinalResult()).get("text", "").strip()
+        if text:
+            self._emit("final", text)
+
+
+# 🧪 Deterministic fake for tests and load tests: transcripts are looked up by the
+# SHA-1 of the audio bytes, then by a fixture's audio appearing inside the utterance
+# (streams start at an arbitrary pre-roll), falling back to a default transcript.
+class FakeSTTBackend:
+    def __init__(self, fixtures=None, default: str = "", utterance_bytes: int = SAMPLE_RATE * 2, clips=None):
+        self.fixtures = dict(fixtures or {})
+        self.default = default
+        self.utterance_bytes = utterance_bytes
+        # (probe, offset of the probe in the clip, clip length, transcript) per fixture clip
+        self.probes = []
+        for audio, transcript in clips or ():
+            self.fixtures[hashlib.sha1(audio).hexdigest()] = transcript
+            offset = max(0, len(audio) // 2 - FAKE_PROBE_BYTES // 2) & ~1
+            self.probes.append((bytes(audio[offset:offset + FAKE_PROBE_BYTES]), offset, len(audio), transcript))
+
+    @classmethod
+    def from_fixture_dir(cls, path, **kwargs):
+        clips = []
+        for name in os.listdir(path):
+            if not name.endswith(".pcm"):
+                continue
+            transcript_path = os.path.join(path, name[:-4] + ".txt")
+            if not os.path.exists(transcript_path):
+                continue
+            with open(os.path.join(path, name), "rb") as f:
+                audio = f.read()
+            with open(transcript_path, encoding="utf-8") as f:
+                clips.append((audio, f.read().strip()))
+        return cls(clips=clips, **kwargs)
+
+    # 🔎 (transcript, end of the clip in audio) for the first fixture clip found in
+    # audio at or after `start`, else None
+    def locate(self, audio, start: int = 0):
+        for probe, offset, length, transcript in self.probes:
+            at = audio.find(probe, start)
+            if at >= 0:
+                return transcript, at - offset + length
+        return None
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        audio = bytes(audio_bytes)
+        transcript = self.fixtures.get(hashlib.sha1(audio).hexdigest())
+        if transcript is None:
+            found = self.locate(audio)
+            transcript = found[0] if found else self.default
+        return transcript
+
+    def open_stream(self, events, loop=None):
+        return FakeStreamingRecognizer(self, events, loop)
+
+
+# Ends the utterance where the fixture clip heard in it ends, or once
+# utterance_bytes of audio have arrived when none matches
+class FakeStreamingRecognizer(ThreadedRecognizer):
+    def __init__(self, backend, events, loop=None):
+        super().__init__(events, loop)
+        self.backend = backend
+
+    def _recognize(self, frames):
+        audio = bytearray()
+        found, end = None, self.backend.utterance_bytes
+        for chunk in frames:
+            searched = len(audio)
+            audio += chunk
+            if found is None:
+                found = self.backend.locate(audio, max(0, searched - FAKE_PROBE_BYTES))
+                if found is not None:
+                    end = found[1]
+            if len(audio) >= end:
+                break
+        self._emit("endpoint")
+        self._emit("final", found[0] if found else self.backend.transcribe(bytes(audio)))
+
+
+def build_stt_backend(name: str = STT_BACKEND):
+    if name == "local":
+        return LocalSTTBackend()
+    if name == "fake":
+        if STT_FAKE_FIXTURES:
+            return FakeSTTBackend.from_fixture_dir(STT_FAKE_FIXTURES)
+        return FakeSTTBackend()
+    return GoogleSTTBackend()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+# 🔌 Process-wide backend chosen by STT_BACKEND, created on first use
+def get_stt_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = build_stt_backend()
+        return _backend
+
+
+def set_stt_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
 
-        print("⚠️ Google Streaming STT gave no final result")
+# 🎙️ Transcribes a complete utterance (bytes or a zero-copy memoryview) with the configured backend
+def transcribe_streaming(audio_bytes) -> str:
+    # 🧹 Skip leading null samples (can cause decoding issues) without copying
+    audio = memoryview(audio_bytes)
+    return get_stt_backend().transcribe(audio[leading_silence_bytes(audio):])
 
-    except Exception as e:
-        print("❌ Streaming STT error:", e)
 
-    return ""
+# 🎧 Opens an incremental recognizer for one utterance on the configured backend
+def open_recognizer(events, loop=None):
+    return get_stt_backend().open_stream(events, loop)
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the application modules the way main.py does (flat, from the repo root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# 🗄️ Throwaway SQLite database with the app's tables, instead of form_logs.db
+@pytest.fixture
+def session_factory(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from models import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+import answer_extraction
+from answer_extraction import AnswerExtractor, classify_field, strip_answer_prefix
+
+
+@pytest.mark.parametrize("name, ftype, rule", [
+    ("email", "text", "email"),
+    ("contact", "email", "email"),
+    ("mobileNumber", "text", "phone"),
+    ("pincode", "text", "postal_code"),
+    ("shipping_method", "text", "text"),
+    ("country", "text", "country"),
+    ("firstName", "text", "name"),
+    ("username", "text", "text"),
+    ("age", "text", "number"),
+    ("page_language", "text", "text"),
+    ("agree_terms", "checkbox", "yes_no"),
+    ("home_address", "text", "long_text"),
+])
+def test_classify_field(name, ftype, rule):
+    assert classify_field(name, ftype) == rule
+
+
+def test_strip_answer_prefix():
+    assert strip_answer_prefix("Okay, my first name is rahul, thanks") == "rahul"
+    assert strip_answer_prefix("I live in Pune.") == "Pune"
+
+
+@pytest.mark.parametrize("field, transcript, expected", [
+    ("email", "it's john dot doe at gmail dot com", "john.doe@gmail.com"),
+    ("pincode", "four one one zero zero one", "411001"),
+    ("age", "I am 34", "34"),
+    ("age", "twenty five", "25"),
+    ("subscribe", "yes please", "yes"),
+    ("country", "I'm from india", "India"),
+    ("full_name", "my name is anita rao", "Anita Rao"),
+])
+def test_confident_rule_answers(field, transcript, expected):
+    result = AnswerExtractor().extract_rule_based(field, transcript)
+    assert result.value == expected
+    assert result.confidence >= answer_extraction.ANSWER_CONFIDENCE_THRESHOLD
+
+
+def test_ambiguous_answers_are_low_confidence():
+    extractor = AnswerExtractor()
+    assert extractor.extract_rule_based("subscribe", "yes no maybe").confidence < extractor.threshold
+    assert extractor.extract_rule_based("pincode", "one two").confidence < extractor.threshold
+
+
+def test_llm_is_only_called_below_threshold(monkeypatch):
+    calls = []
+
+    async def fake_gpt(field_name, prompt):
+        calls.append(field_name)
+        return "from-llm"
+
+    monkeypatch.setattr(answer_extraction, "extract_answer_from_gpt", fake_gpt)
+    extractor = AnswerExtractor()
+
+    async def scenario():
+        assert await extractor.extract("age", "I am 34") == "34"
+        assert await extractor.extract("pincode", "one two") == "from-llm"
+
+    asyncio.run(scenario())
+    assert calls == ["pincode"]
+    stats = extractor.stats()
+    assert stats["rule_hits"] == 1 and stats["llm_calls"] == 1
+    assert stats["by_rule"]["postal_code"] == {"rule_hits": 0, "llm_calls": 1}
@@ -0,0 +1,67 @@
+import asyncio
+
+import answer_handlers
+from answer_handlers import AnswerState, FieldSpec, FILL, RETRY, WAIT, get_handler
+
+
+def run(field, *utterances):
+    handler = get_handler(field.name, field.type)
+    state = AnswerState()
+    outcome = None
+    for utterance in utterances:
+        state.transcript += " " + utterance
+        outcome = asyncio.run(handler(field, utterance, state))
+    return outcome
+
+
+def test_specific_type_wins_over_name():
+    assert get_handler("contact_email", "email") is answer_handlers.handle_email
+    assert get_handler("phone_preference", "radio") is answer_handlers.handle_choice
+
+
+def test_plain_text_inputs_use_name_hints():
+    assert get_handler("phone", "text") is answer_handlers.handle_phone
+    assert get_handler("email", "text") is answer_handlers.handle_email
+    assert get_handler("mobilePhone", "") is answer_handlers.handle_phone
+    assert get_handler("mobileNumber", "text") is answer_handlers.handle_phone
+    assert get_handler("full_name", "text") is answer_handlers.handle_text
+
+
+def test_phone_spoken_in_pieces_is_buffered():
+    field = FieldSpec("phone", "text")
+    assert run(field, "nine eight seven six five").kind == WAIT
+    outcome = run(field, "nine eight seven six five", "four three two one zero")
+    assert (outcome.kind, outcome.value) == (FILL, "+919876543210")
+
+
+def test_email_waits_until_complete():
+    field = FieldSpec("email", "text")
+    assert run(field, "rahul dot sharma").kind == WAIT
+    outcome = run(field, "rahul dot sharma at gmail dot com")
+    assert (outcome.kind, outcome.value) == (FILL, "rahul.sharma@gmail.com")
+
+
+def test_spoken_lead_ins_are_not_part_of_the_answer():
+    for field in (FieldSpec("email", "text"), FieldSpec("contact", "email")):
+        assert run(field, "it's abc at gmail dot com").value == "abc@gmail.com"
+        assert run(field, "this is john dot doe at gmail dot com").value == "john.doe@gmail.com"
+        assert run(field, "my email address is abc at gmail dot com").value == "abc@gmail.com"
+    outcome = run(FieldSpec("mobileNumber", "tel"), "it's plus nine one", "nine eight seven six five four three two one zero")
+    assert (outcome.kind, outcome.value) == (FILL, "+919876543210")
+
+
+def test_choice_fills_or_retries():
+    field = FieldSpec("gender", "radio", ["Male", "Female"])
+    assert run(field, "I am female").value == "Female"
+    assert run(field, "purple").kind == RETRY
+
+
+def test_checkbox_collects_several_options():
+    field = FieldSpec("hobbies", "checkbox", ["Reading", "Sports", "Music"])
+    outcome = run(field, "reading and music")
+    assert (outcome.kind, outcome.value) == (FILL, "Reading,Music")
+
+
+def test_time_field():
+    outcome = run(FieldSpec("slot", "time"), "seven thirty in the evening")
+    assert (outcome.kind, outcome.value) == (FILL, "19:30")
@@ -0,0 +1,47 @@
+import random
+
+from audio_buffer import AudioRingBuffer, iter_chunks, leading_silence_bytes
+
+
+def test_append_and_view_before_wrapping():
+    buffer = AudioRingBuffer(16)
+    buffer.append(b"abcd")
+    buffer.append(b"efgh")
+    assert len(buffer) == 8
+    assert bytes(buffer.view()) == b"abcdefgh"
+    assert bytes(buffer.view(2, 6)) == b"cdef"
+    assert bytes(buffer.tail(3)) == b"fgh"
+
+
+def test_oldest_audio_is_overwritten_and_views_stay_contiguous():
+    buffer = AudioRingBuffer(10)
+    reference = b""
+    rng = random.Random(0)
+    for _ in range(200):
+        chunk = bytes(rng.randrange(256) for _ in range(rng.randrange(0, 14)))
+        buffer.append(chunk)
+        reference = (reference + chunk)[-10:]
+        assert bytes(buffer.view()) == reference
+        start = rng.randrange(0, 11)
+        assert bytes(buffer.view(start, start + 4)) == reference[start:start + 4]
+
+
+def test_capacity_is_whole_samples_and_clear_resets():
+    buffer = AudioRingBuffer(11)
+    assert buffer.capacity == 10
+    buffer.append(b"x" * 25)
+    assert len(buffer) == 10
+    buffer.clear()
+    assert len(buffer) == 0 and bytes(buffer.view()) == b""
+
+
+def test_views_are_zero_copy():
+    buffer = AudioRingBuffer.for_seconds(0.01)
+    buffer.append(b"\x01\x00" * 10)
+    assert isinstance(buffer.view(), memoryview)
+
+
+def test_helpers():
+    assert leading_silence_bytes(b"\x00\x00\x00\x00\x05\x00") == 4
+    assert leading_silence_bytes(b"\x00\x01") == 0
+    assert [bytes(c) for c in iter_chunks(b"abcdefg", 3)] == [b"abc", b"def", b"g"]
@@ -0,0 +1,27 @@
+import asyncio
+
+from audio_codec import PCM_CODEC, build_decoder, negotiate_codec, parse_hello, supported_codecs
+
+
+def test_parse_hello():
+    assert parse_hello('{"type": "hello", "codecs": ["opus", "pcm16"]}') == ["opus", "pcm16"]
+    assert parse_hello('{"type": "hello"}') == []
+    assert parse_hello('{"type": "hello", "codecs": "opus"}') == []
+    assert parse_hello('{"type": "hello", "codecs": ["opus", 3, null]}') == ["opus"]
+
+
+def test_bad_control_messages_are_ignored():
+    for text in ("not json", "[1, 2]", '"hello"', "42", "null", '{"type": "ping"}', ""):
+        assert parse_hello(text) is None
+
+
+def test_negotiation_falls_back_to_pcm():
+    assert negotiate_codec([]) == PCM_CODEC
+    assert negotiate_codec(["speex"]) == PCM_CODEC
+    assert negotiate_codec(["PCM16"]) == PCM_CODEC
+    assert negotiate_codec(["opus", "pcm16"]) == supported_codecs()[0]
+
+
+def test_pcm_decoder_passes_frames_through():
+    decoder = build_decoder(PCM_CODEC)
+    assert asyncio.run(decoder.decode(b"\x01\x02")) == b"\x01\x02"
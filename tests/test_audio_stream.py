@@ -0,0 +1,35 @@
+import asyncio
+
+from audio_stream import AudioStreamMetrics, enqueue_frame
+
+
+def fill(policy, frames, maxsize=4, max_merge_bytes=1000):
+    queue = asyncio.Queue(maxsize=maxsize)
+    metrics = AudioStreamMetrics("s")
+    for frame in frames:
+        enqueue_frame(queue, frame, metrics, policy=policy, max_merge_bytes=max_merge_bytes)
+    return [queue.get_nowait() for _ in range(queue.qsize())], metrics
+
+
+def test_merge_keeps_all_audio_under_the_cap():
+    frames = [bytes([i]) * 10 for i in range(6)]
+    queued, metrics = fill("merge", frames)
+    assert b"".join(queued) == b"".join(frames)
+    assert metrics.frames_merged == 4 and metrics.bytes_dropped == 0
+
+
+def test_merge_is_bounded_while_the_consumer_is_stuck():
+    frames = [i.to_bytes(2, "little") * 50 for i in range(500)]  # 100 bytes each
+    queued, metrics = fill("merge", frames)
+    assert max(len(f) for f in queued) <= 1000
+    assert sum(len(f) for f in queued) <= 1000 + 3 * 100
+    # Newest audio survives, sample-aligned
+    assert b"".join(queued).endswith(frames[-1])
+    assert all(len(f) % 2 == 0 for f in queued)
+    assert metrics.bytes_dropped == 500 * 100 - sum(len(f) for f in queued)
+
+
+def test_drop_oldest_policy():
+    frames = [bytes([i]) for i in range(6)]
+    queued, metrics = fill("drop_oldest", frames)
+    assert queued == frames[2:] and metrics.frames_dropped == 2
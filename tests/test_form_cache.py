@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+import form_cache as form_cache_module
+from form_cache import FormCache, hash_form_html, normalize_url
+
+FIELDS = [{"name": "email", "type": "email", "label": "Email"}]
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.com:443/apply/?b=2&a=1#top") == "https://example.com/apply?a=1&b=2"
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+
+
+def test_hash_ignores_whitespace():
+    assert hash_form_html("<form>\n  <input name=a>\n</form>") == hash_form_html("<form> <input name=a> </form>")
+    assert hash_form_html("<form><input name=a></form>") != hash_form_html("<form><input name=b></form>")
+
+
+def test_memory_lru_and_ttl():
+    cache = FormCache(max_entries=2, ttl=60, persist=False)
+
+    async def scenario():
+        for url in ("a", "b", "c"):
+            await cache.put(url, "h", FIELDS, ["Q?"])
+        return await cache.get("a"), await cache.get("c")
+
+    evicted, kept = asyncio.run(scenario())
+    assert evicted is None and kept["fields"] == FIELDS
+    assert cache.is_fresh(kept)
+    kept["checked_at"] -= 120
+    assert not cache.is_fresh(kept)
+
+
+def test_persisted_entries_survive_a_restart_and_load_off_the_loop(session_factory, monkeypatch):
+    threads = []
+    real_load = FormCache._load
+
+    def tracking_load(self, url):
+        threads.append(threading.current_thread())
+        return real_load(self, url)
+
+    monkeypatch.setattr(form_cache_module, "SessionLocal", session_factory)
+    monkeypatch.setattr(FormCache, "_load", tracking_load)
+
+    async def scenario():
+        await FormCache(persist=True).put("u", "hash", FIELDS, ["What is your email?"], etag='"v1"')
+        return await FormCache(persist=True).get("u")
+
+    entry = asyncio.run(scenario())
+    assert entry["form_hash"] == "hash" and entry["questions"] == ["What is your email?"]
+    assert entry["etag"] == '"v1"'
+    assert threads and threads[0] is not threading.main_thread()
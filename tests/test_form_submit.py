@@ -0,0 +1,231 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from yarl import URL
+
+import form_submit
+from form_submit import DirectSubmitter, build_direct_payload, build_fill_entries
+from parser import form_submission_meta, static_form_from_html
+
+PAGE_URL = "https://example.com/apply/form?ref=ad"
+FORM = """
+<form action="/apply" method="POST">
+  <input type="hidden" name="csrf" value="tok">
+  <label for="n">Name</label><input id="n" name="name" value="x">
+  <select name="country"><option value="">Choose</option><option value="in">India</option>
+    <option value="uk" selected>United Kingdom</option></select>
+  <label><input type="checkbox" name="topics" value="r"> Reading</label>
+  <label><input type="checkbox" name="topics" value="m" checked> Music</label>
+  <input type="checkbox" name="agree" id="ag"><label for="ag">I agree</label>
+  <input type="radio" name="g" value="M" id="m"><label for="m">Male</label>
+  <input type="radio" name="g" value="F" id="f"><label for="f">Female</label>
+  <textarea name="notes">hi</textarea>
+  <input type="file" name="cv">
+  <button type="submit" name="go" value="1">Send</button>
+</form>
+"""
+
+
+def meta(form_html=FORM, page_url=PAGE_URL, cookies=None):
+    return form_submission_meta(form_html, page_url, cookies)
+
+
+def test_submission_meta():
+    m = meta(cookies={"sid": "1"})
+    assert (m["action"], m["method"], m["enctype"]) == (
+        "https://example.com/apply", "post", "application/x-www-form-urlencoded")
+    assert m["defaults"] == [["csrf", "tok"], ["name", "x"], ["country", "uk"], ["topics", "m"], ["notes", "hi"]]
+    assert m["choices"]["topics"]["multiple"] and not m["choices"]["agree"]["multiple"]
+    assert m["choices"]["g"]["options"]["female"] == "F"
+    assert m["submitter"] == ["go", "1"] and m["cookies"] == {"sid": "1"}
+    assert m["direct"] and m["reason"] == ""
+
+
+@pytest.mark.parametrize("form_html, reason", [
+    ('<form><input name="a"></form>', "no action or method (submitted by script)"),
+    ('<form action="/x" onsubmit="send()"><input name="a"></form>', "submit handler"),
+    ('<form action="javascript:void(0)"><input name="a"></form>', "submit handler"),
+    ('<form action="/x" method="dialog"><input name="a"></form>', "method dialog"),
+    ('<form action="/x" method="post"><div class="g-recaptcha"></div><input name="a"></form>', "captcha"),
+])
+def test_script_driven_forms_need_the_browser(form_html, reason):
+    m = meta(form_html)
+    assert not m["direct"] and m["reason"] == reason
+
+
+def test_payload_maps_answers_onto_defaults():
+    pairs = build_direct_payload(meta(), {
+        "name": "Ravi", "country": "India", "topics": "Reading, music", "agree": "yes", "g": "Female",
+    })
+    assert pairs == [
+        ("csrf", "tok"), ("notes", "hi"), ("name", "Ravi"), ("country", "in"),
+        ("topics", "r"), ("topics", "m"), ("agree", "on"), ("g", "F"), ("go", "1"),
+    ]
+
+
+def test_payload_leaves_unchecked_single_checkbox_out():
+    assert ("agree", "on") not in build_direct_payload(meta(), {"agree": "no"})
+
+
+def test_fill_entries_use_the_schema():
+    entries = build_fill_entries({"email": "a@b.co", "x": None}, [{"name": "email", "tag": "input", "type": "email", "id": "e"}])
+    assert entries == [
+        {"name": "email", "value": "a@b.co", "tag": "input", "type": "email", "id": "e"},
+        {"name": "x", "value": "", "tag": "", "type": "", "id": ""},
+    ]
+
+
+class FakeResponse:
+    def __init__(self, url, status=200, body="", cookies=None):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+        self.history = ()
+        self.cookies = {k: type("Morsel", (), {"value": v})() for k, v in (cookies or {}).items()}
+
+    async def text(self):
+        return self.body
+
+    async def read(self):
+        return self.body.encode()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, page_html="", page_cookies=None, status=200):
+        self.calls = []
+        self.page_html = page_html
+        self.page_cookies = page_cookies
+        self.status = status
+        self.jar = None
+
+    def with_jar(self, jar):
+        self.jar = jar
+        return self
+
+    # Cookies aiohttp would attach to a request for url
+    def cookies_for(self, url):
+        return {k: m.value for k, m in self.jar.filter_cookies(URL(url)).items()}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def get(self, url, params=None, headers=None):
+        self.calls.append(("GET", url, params, headers))
+        if params is None:
+            return FakeResponse(url, body=self.page_html, cookies=self.page_cookies)
+        return FakeResponse(url + "?submitted", status=self.status)
+
+    def post(self, url, data=None, headers=None):
+        self.calls.append(("POST", url, data, headers))
+        return FakeResponse(url + "/thanks", status=self.status)
+
+
+def submit(session, target_url, form_data, snapshot):
+    submitter = DirectSubmitter()
+    submitter._bind_loop = lambda: session
+    submitter._request_session = session.with_jar
+    return asyncio.run(submitter.submit(target_url, form_data, snapshot))
+
+
+def test_fresh_snapshot_submits_in_one_request():
+    session = FakeSession()
+    result = submit(session, PAGE_URL, {"name": "Ravi"}, meta(cookies={"sid": "1", "lang": "en"}))
+    assert result == {"final_url": "https://example.com/apply/thanks", "status": 200}
+    [(method, url, data, headers)] = session.calls
+    assert (method, url) == ("POST", "https://example.com/apply")
+    assert isinstance(data, aiohttp.FormData)
+    assert headers == {"Referer": PAGE_URL}
+    assert session.cookies_for(url) == {"sid": "1", "lang": "en"}
+
+
+def test_missing_snapshot_is_refetched_before_submitting():
+    # After a form-cache hit /analyze-form has no snapshot: fetch the page, then submit
+    session = FakeSession(page_html=f"<html><body>{FORM}</body></html>", page_cookies={"sid": "fresh"})
+    result = submit(session, PAGE_URL, {"name": "Ravi"}, None)
+    assert result["status"] == 200
+    assert [c[0] for c in session.calls] == ["GET", "POST"]
+    assert session.calls[0][1] == PAGE_URL
+    assert session.cookies_for(session.calls[1][1]) == {"sid": "fresh"}
+
+
+def test_stale_snapshot_is_refetched():
+    stale = meta(cookies={"sid": "old"})
+    stale["captured_at"] = time.time() - form_submit.SUBMIT_SNAPSHOT_TTL - 1
+    session = FakeSession(page_html=FORM, page_cookies={"sid": "new"})
+    submit(session, PAGE_URL, {"name": "Ravi"}, stale)
+    assert session.cookies_for(session.calls[1][1]) == {"sid": "new"}
+
+
+def test_cookies_stay_with_the_host_that_set_them():
+    snapshot = meta('<form action="https://forms.thirdparty.io/f/123" method="post"><input name="name"></form>',
+                    page_url="https://bank.example.com/contact", cookies={"sessionid": "SECRET"})
+    session = FakeSession()
+    submit(session, snapshot["page_url"], {"name": "Ravi"}, snapshot)
+    [(_, url, _, headers)] = session.calls
+    assert url == "https://forms.thirdparty.io/f/123" and "Cookie" not in headers
+    assert session.cookies_for(url) == {}
+    assert session.cookies_for("https://bank.example.com/submit") == {"sessionid": "SECRET"}
+
+
+def test_cookies_are_not_sent_to_another_host_over_http():
+    seen = []
+
+    async def record(request):
+        seen.append((request.host.split(":")[0], request.headers.get("Cookie")))
+        return web.Response(text="ok")
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/{tail:.*}", record)
+        async with TestServer(app, host="127.0.0.1") as server:
+            page_url = f"http://localhost:{server.port}/contact"
+            for action in (f"http://127.0.0.1:{server.port}/f/123", f"http://localhost:{server.port}/send"):
+                snapshot = meta(f'<form action="{action}" method="post"><input name="name"></form>',
+                                page_url=page_url, cookies={"sessionid": "SECRET"})
+                submitter = DirectSubmitter()
+                try:
+                    assert (await submitter.submit(page_url, {"name": "Ravi"}, snapshot))["status"] == 200
+                finally:
+                    await submitter.close()
+
+    asyncio.run(scenario())
+    assert seen == [("127.0.0.1", None), ("localhost", "sessionid=SECRET")]
+
+
+def test_get_forms_replace_the_action_query():
+    snapshot = meta('<form action="/search?src=home#top" method="get"><input name="q"><input name="lang"></form>')
+    session = FakeSession()
+    submit(session, PAGE_URL, {"q": "shoes"}, snapshot)
+    [(method, url, params, _)] = session.calls
+    assert (method, url) == ("GET", "https://example.com/search")
+    assert params == [("lang", ""), ("q", "shoes")]
+
+
+def test_script_driven_or_rejected_forms_fall_back_to_the_browser():
+    session = FakeSession()
+    assert submit(session, PAGE_URL, {"a": "1"}, meta('<form><input name="a"><input name="b"></form>')) is None
+    assert session.calls == []
+    assert submit(FakeSession(status=403), PAGE_URL, {"name": "Ravi"}, meta()) is None
+    # Pages whose real form is rendered by scripts have no usable static snapshot
+    page = '<form action="/search"><input name="q"></form><div id="root"></div>'
+    assert static_form_from_html(page) is None
+    assert submit(FakeSession(page_html=page), PAGE_URL, {"name": "Ravi"}, None) is None
+
+
+def test_server_errors_are_reported_not_retried():
+    with pytest.raises(RuntimeError):
+        submit(FakeSession(status=502), PAGE_URL, {"name": "Ravi"}, meta())
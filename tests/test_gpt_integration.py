@@ -0,0 +1,30 @@
+import json
+
+from gpt_integration import parse_batch_questions
+
+DESCRIBED = [("Full name", "text", []), ("Email", "email", []), ("City", "text", [])]
+
+
+def test_parse_batch_questions():
+    content = json.dumps({"questions": [
+        {"id": 0, "question": "What is your full name?"},
+        {"id": 2, "question": "Which city do you live in?"},
+    ]})
+    assert parse_batch_questions(content, DESCRIBED) == [
+        "What is your full name", "Email", "Which city do you live in",
+    ]
+
+
+def test_malformed_item_only_affects_itself():
+    content = json.dumps({"questions": [
+        "not an object",
+        {"id": "first", "question": "Broken id?"},
+        {"id": 1, "question": "What is your email address?"},
+        {"id": 2, "question": "Which city?"},
+    ]})
+    assert parse_batch_questions(content, DESCRIBED) == ["Full name", "What is your email address", "Which city"]
+
+
+def test_unparseable_reply_falls_back_to_labels():
+    assert parse_batch_questions("not json", DESCRIBED) == ["Full name", "Email", "City"]
+    assert parse_batch_questions('{"questions": 3}', DESCRIBED) == ["Full name", "Email", "City"]
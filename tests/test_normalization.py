@@ -0,0 +1,67 @@
+from datetime import date
+
+import pytest
+
+from normalization import (
+    extract_possible_email, looks_like_email, normalize_email, normalize_phone,
+    parse_spoken_date, parse_spoken_time, spoken_digits, spoken_numbers_to_digits,
+)
+
+
+@pytest.mark.parametrize("spoken, digits", [
+    ("nine eight double seven 6 5", "987765"),
+    ("ninety eight forty five 123456", "9845123456"),
+    ("oh nine eight", "098"),
+    ("triple nine", "999"),
+    ("nine hundred two", "902"),
+    ("five six zero zero three four", "560034"),
+    ("my number is 98450 12345", "9845012345"),
+])
+def test_spoken_digits(spoken, digits):
+    assert spoken_digits(spoken) == digits
+
+
+def test_normalize_phone():
+    assert normalize_phone("ninety eight forty five 123456") == "+919845123456"
+    assert normalize_phone("nine eight seven") is None
+
+
+@pytest.mark.parametrize("spoken, email", [
+    ("rahul dot sharma at gmail dot com", "rahul.sharma@gmail.com"),
+    ("priya underscore k at yahoo dot com", "priya_k@yahoo.com"),
+    ("abc gmail.com", "abc@gmail.com"),
+])
+def test_normalize_email(spoken, email):
+    assert normalize_email(spoken) == email
+
+
+def test_extract_possible_email():
+    candidate = normalize_email(extract_possible_email("my email id is priya at outlook dot com"))
+    assert candidate == "priya@outlook.com" and looks_like_email(candidate)
+    assert not looks_like_email(normalize_email(extract_possible_email("rahul dot sharma")))
+
+
+@pytest.mark.parametrize("spoken, value", [
+    ("3 pm", "15:00"),
+    ("14:30", "14:30"),
+    ("seven thirty in the evening", "19:30"),
+    ("noon", "12:00"),
+    ("four in the afternoon", "16:00"),
+    ("12 a.m.", "00:00"),
+    ("whenever", ""),
+])
+def test_parse_spoken_time(spoken, value):
+    assert parse_spoken_time(spoken) == value
+
+
+def test_parse_spoken_date():
+    today = date(2024, 7, 1)
+    assert parse_spoken_date("tomorrow", today) == "2024-07-02"
+    assert parse_spoken_date("day after tomorrow", today) == "2024-07-03"
+    assert parse_spoken_date("twenty fifth of july 2024", today) == "2024-07-25"
+    assert parse_spoken_date("4/7/2024", today) == "2024-07-04"
+    assert parse_spoken_date("no idea", today) == ""
+
+
+def test_spoken_numbers_to_digits():
+    assert spoken_numbers_to_digits("Twenty-Third of May") == "23 of may"
@@ -0,0 +1,58 @@
+import option_index
+from option_index import OptionIndex, get_option_index, normalize_option, soundex
+
+COLOURS = ["Red", "Green", "Light Blue", "Dark Blue"]
+
+
+def test_normalize_and_soundex():
+    assert normalize_option("  Dark-Blue! ") == "dark blue"
+    assert soundex("kumar") == soundex("kumaar")
+    assert soundex("robert") == "r163"
+    assert soundex("42") == "42"
+
+
+def test_exact_and_contained_matches():
+    index = OptionIndex(COLOURS)
+    assert index.match("green") == "Green"
+    assert index.match("I'd like the dark blue one please") == "Dark Blue"
+    assert index.rank("RED") == [("Red", 1.0)]
+
+
+def test_fuzzy_and_phonetic_matches():
+    index = OptionIndex(["Shree Kumar", "Anita Rao"])
+    assert index.match("shri kumaar") == "Shree Kumar"
+    assert index.match("completely unrelated words") is None
+
+
+def test_ordinal_references():
+    index = OptionIndex(COLOURS)
+    assert index.match("the second one") == "Green"
+    assert index.match("option 3") == "Light Blue"
+    assert index.match("number four") == "Dark Blue"
+    assert index.match("the last option") == "Dark Blue"
+    # Out of range ordinals don't wrap around
+    assert index.ordinal("tenth one") is None
+
+
+def test_spoken_option_text_beats_ordinal():
+    index = OptionIndex(["First class", "Economy"])
+    assert index.match("first class") == "First class"
+    assert index.match("the second one") == "Economy"
+
+
+def test_match_many_keeps_order_and_drops_repeats():
+    index = OptionIndex(COLOURS)
+    assert index.match_many("red, light blue and the first one") == ["Red", "Light Blue"]
+    assert index.match_many("green plus dark blue") == ["Green", "Dark Blue"]
+    assert index.match_many("") == []
+
+
+def test_get_option_index_is_shared_and_bounded(monkeypatch):
+    monkeypatch.setattr(option_index, "OPTION_INDEX_CACHE_SIZE", 2)
+    monkeypatch.setattr(option_index, "_indexes", option_index.OrderedDict())
+    first = get_option_index(["a", "b"])
+    assert get_option_index(("a", "b")) is first
+    get_option_index(["c"])
+    get_option_index(["d"])
+    assert len(option_index._indexes) == 2
+    assert get_option_index(["a", "b"]) is not first
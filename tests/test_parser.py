@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import parser
+from parser import extract_fields_from_html, static_form_from_html
+
+SIGNUP = """
+<form action="/signup" method="post">
+  <label for="name">Full name</label><input id="name" name="name" required>
+  <label for="email">Email</label><input id="email" type="email" name="email">
+  <select name="country"><option>India</option><option>Nepal</option></select>
+  <div><label><input type="checkbox" name="topics" value="news"> News</label>
+       <label><input type="checkbox" name="topics" value="offers"> Offers</label></div>
+  <input type="radio" name="plan" value="free"><input type="radio" name="plan" value="pro">
+  <button type="submit">Join</button>
+</form>
+"""
+
+
+def test_extract_fields_groups_and_labels():
+    fields = extract_fields_from_html(SIGNUP)
+    by_name = {f["name"]: f for f in fields}
+    assert by_name["name"]["label"] == "Full name" and by_name["name"]["required"]
+    assert by_name["email"]["type"] == "email"
+    assert by_name["country"]["options"] == ["India", "Nepal"]
+    assert by_name["topics"]["options"] == ["News", "Offers"]
+    assert by_name["plan"]["options"] == ["free", "pro"]
+    assert [f["name"] for f in fields].count("topics") == 1
+
+
+def test_static_form_picks_largest_server_rendered_form():
+    html = f'<form action="/search"><input name="q"></form>{SIGNUP}'
+    assert 'action="/signup"' in static_form_from_html(html)
+
+
+def test_static_form_defers_to_browser_for_script_rendered_apps():
+    search = '<form action="/search"><input name="q"><input name="scope"></form>'
+    assert static_form_from_html(search + '<div id="root"></div>') is None
+    assert static_form_from_html(search + '<script src="/static/js/main.4f2a.js"></script>') is None
+    assert static_form_from_html(search + '<script type="module" src="/x.js"></script>') is None
+    assert static_form_from_html(search + "<my-form></my-form>") is None
+
+
+def test_static_form_ignores_tiny_forms():
+    html = '<form action="/search"><input name="q"></form><div id="root"></div><script src="/app.js"></script>'
+    assert static_form_from_html(html) is None
+    assert static_form_from_html('<form action="/search"><input name="q"></form>') is None
+
+
+def test_browser_mode_takes_fields_from_the_page_even_for_static_forms(monkeypatch):
+    form = '<form action="/go" method="post"><input name="a"><input name="b" style="display:none"></form>'
+    rendered = [{"name": "a", "label": "Visible A", "type": "text"}]
+
+    async def fake_static(url):
+        return {"html": form, "url": url, "cookies": {}}
+
+    async def fake_browser(url):
+        return rendered
+
+    monkeypatch.setattr(parser, "static_form", fake_static)
+    monkeypatch.setattr(parser, "extract_fields_in_browser", fake_browser)
+    source, fields, submission = asyncio.run(parser.extract_form_snapshot("https://example.com/f", mode="browser"))
+    assert fields == rendered and json.loads(source) == rendered
+    assert submission["action"] == "https://example.com/go"
+
+    # html mode still short-circuits on the raw HTML
+    source, fields, submission = asyncio.run(parser.extract_form_snapshot("https://example.com/f", mode="html"))
+    assert (source, fields) == (form, None) and submission["direct"]
@@ -0,0 +1,62 @@
+import asyncio
+
+from sqlalchemy import event
+
+import question_cache as question_cache_module
+from models import QuestionTemplate
+from question_cache import QuestionCache
+
+
+def test_key_normalizes_label_and_options():
+    a = QuestionCache.key("  Email   Address", "EMAIL", ["A", " b  c"], "1")
+    b = QuestionCache.key("email address", "email", ["a", "b c"], "1")
+    assert a == b
+    assert a != QuestionCache.key("email address", "email", ["a", "b c"], "2")
+
+
+def test_memory_hits_and_misses():
+    cache = QuestionCache(persist=False)
+
+    async def scenario():
+        await cache.put_many({"k1": "What is your email?"})
+        return await cache.get_many(["k1", "k2"])
+
+    assert asyncio.run(scenario()) == ["What is your email?", None]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_persisted_templates_load_in_one_query(session_factory, monkeypatch):
+    monkeypatch.setattr(question_cache_module, "SessionLocal", session_factory)
+    items = {f"k{i}": f"Question {i}?" for i in range(20)}
+    asyncio.run(QuestionCache(persist=True).put_many(items))
+
+    selects = []
+    engine = session_factory.kw["bind"]
+
+    def count_selects(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_selects)
+    try:
+        results = asyncio.run(QuestionCache(persist=True).get_many(list(items)))
+    finally:
+        event.remove(engine, "before_cursor_execute", count_selects)
+    assert results == list(items.values())
+    assert len(selects) == 1  # no per-row reload after commit()
+
+    db = session_factory()
+    try:
+        assert all(row.hits == 1 for row in db.query(QuestionTemplate))
+    finally:
+        db.close()
+
+
+def test_rows_are_pruned_beyond_max_rows(session_factory, monkeypatch):
+    monkeypatch.setattr(question_cache_module, "SessionLocal", session_factory)
+    asyncio.run(QuestionCache(persist=True, max_rows=5).put_many({f"k{i}": "Q?" for i in range(8)}))
+    db = session_factory()
+    try:
+        assert db.query(QuestionTemplate).count() == 5
+    finally:
+        db.close()
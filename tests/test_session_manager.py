@@ -0,0 +1,76 @@
+import asyncio
+import json
+import time
+
+from session_manager import (
+    FormSession,
+    InMemorySessionBackend,
+    SessionManager,
+    build_session_backend,
+)
+
+
+def test_cursor_follows_current_field_and_advances():
+    session = FormSession("s", fields=["name", "email", "phone"], current_field="email")
+    assert session.cursor == 1
+    assert session.advance() == "phone"
+    assert session.advance() is None
+    assert session.advance() is None
+
+
+def test_round_trip_through_json_keeps_submission():
+    submission = {"action": "https://example.com/submit", "method": "post", "defaults": {"csrf": "x"}}
+    session = FormSession("s", target_url="https://example.com", fields=["a", "b"],
+                          field_types={"a": "text"}, current_field="b", submission=submission)
+    restored = FormSession.from_dict(json.loads(json.dumps(session.to_dict())))
+    assert restored.to_dict() == session.to_dict()
+    assert restored.cursor == 1
+
+
+def test_manager_create_get_save_delete():
+    async def scenario():
+        manager = SessionManager(InMemorySessionBackend(ttl=60))
+        session = await manager.create(fields=["name"], current_field="name")
+        assert len(session.session_id) > 10
+        assert await manager.get(session.session_id) is session
+        assert await manager.get("") is None
+        assert await manager.get("missing") is None
+        session.advance()
+        await manager.save(session)
+        assert (await manager.get(session.session_id)).current_field is None
+        await manager.delete(session.session_id)
+        assert await manager.get(session.session_id) is None
+
+    asyncio.run(scenario())
+
+
+def test_idle_sessions_expire_on_access_and_by_sweep():
+    async def scenario():
+        backend = InMemorySessionBackend(ttl=10)
+        stale = FormSession("stale", last_seen=time.time() - 60)
+        other_stale = FormSession("other", last_seen=time.time() - 60)
+        fresh = FormSession("fresh")
+        for session in (stale, other_stale, fresh):
+            await backend.save(session)
+        assert await backend.get("stale") is None
+        assert await backend.purge_expired() == 1
+        assert await backend.get("fresh") is fresh
+
+    asyncio.run(scenario())
+
+
+def test_access_refreshes_idle_timer():
+    async def scenario():
+        backend = InMemorySessionBackend(ttl=10)
+        manager = SessionManager(backend)
+        session = await manager.create()
+        session.last_seen = time.time() - 8
+        await manager.get(session.session_id)
+        assert time.time() - session.last_seen < 1
+        assert await backend.purge_expired() == 0
+
+    asyncio.run(scenario())
+
+
+def test_default_backend_is_in_memory():
+    assert isinstance(build_session_backend("memory"), InMemorySessionBackend)
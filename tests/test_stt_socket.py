@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import anyio
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import stt
+from session_manager import session_manager
+from stt import FakeSTTBackend
+
+RATE = 16000
+FRAME_BYTES = RATE * 2 // 10  # 100 ms
+
+
+def pcm(signal):
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def silence(seconds):
+    return pcm(np.zeros(int(seconds * RATE)))
+
+
+# Noise-like "speech": loud enough for the VAD and never periodic
+def speech(seconds, seed=0):
+    return pcm(0.3 * np.random.default_rng(seed).uniform(-1, 1, int(seconds * RATE)))
+
+
+def frames(audio):
+    return [audio[i:i + FRAME_BYTES] for i in range(0, len(audio), FRAME_BYTES)]
+
+
+# ws.receive() without the risk of hanging the suite when nothing arrives
+def receive(ws, timeout=10):
+    async def bounded():
+        with anyio.fail_after(timeout):
+            return await ws._send_rx.receive()
+    return ws.portal.call(bounded)
+
+
+def receive_json(ws):
+    return json.loads(receive(ws)["text"])
+
+
+@pytest.fixture
+def stt_socket(monkeypatch):
+    monkeypatch.setattr(main, "STT_MODE", "streaming")
+
+    def connect(backend, *fields):
+        stt.set_stt_backend(backend)
+        session = asyncio.run(session_manager.create(fields=list(fields), current_field=fields[0]))
+        return TestClient(main.app).websocket_connect(f"/stt?session_id={session.session_id}")
+
+    yield connect
+    stt.set_stt_backend(None)
+
+
+def test_failed_answer_asks_again_and_keeps_listening(stt_socket, monkeypatch):
+    calls = []
+
+    async def flaky_handler(field, final, state):
+        calls.append(final)
+        if len(calls) == 1:
+            raise RuntimeError("LLM retries exhausted")
+        return main.Outcome(main.FILL, final)
+
+    monkeypatch.setattr(main, "get_handler", lambda name, type: flaky_handler)
+    with stt_socket(FakeSTTBackend(default="Pune"), "city") as ws:
+        for _ in range(2):
+            for frame in frames(silence(0.5) + speech(1.0) + silence(1.5)):
+                ws.send_bytes(frame)
+        assert receive_json(ws)["retry"] is True
+        assert receive_json(ws) == {"type": "fill_field", "field_name": "city", "value": "Pune"}
+
+
+def test_socket_closes_when_the_consumer_dies(stt_socket, monkeypatch):
+    def broken_stt(audio):
+        raise RuntimeError("engine down")
+
+    monkeypatch.setattr(main, "STT_MODE", "buffered")
+    monkeypatch.setattr(main, "transcribe_streaming", broken_stt)
+    with stt_socket(FakeSTTBackend(default="Pune"), "city") as ws:
+        for frame in frames(silence(0.5) + speech(1.0) + silence(1.5)):
+            ws.send_bytes(frame)
+        message = receive(ws)
+        assert (message["type"], message["code"]) == ("websocket.close", 1011)
+
+
+def test_one_utterance_opens_one_recognizer(stt_socket, monkeypatch):
+    opened = []
+
+    def counting_open(events, loop=None):
+        opened.append(stt.open_recognizer(events, loop))
+        return opened[-1]
+
+    monkeypatch.setattr(main, "open_recognizer", counting_open)
+    # The fake endpoints after 1 s of audio, inside this utterance's VAD hangover
+    with stt_socket(FakeSTTBackend(default="Pune"), "city", "landmark") as ws:
+        for frame in frames(silence(0.5) + speech(1.0) + silence(2.0)):
+            ws.send_bytes(frame)
+        assert receive_json(ws) == {"type": "fill_field", "field_name": "city", "value": "Pune"}
+        # A second utterance still opens its own stream
+        for frame in frames(speech(1.0, seed=1) + silence(2.0)):
+            ws.send_bytes(frame)
+        assert receive_json(ws) == {"type": "fill_field", "field_name": "landmark", "value": "Pune"}
+    assert len(opened) == 2
+
+
+@pytest.mark.parametrize("mode", ["streaming", "buffered"])
+def test_fixture_audio_is_recognised_in_either_mode(stt_socket, monkeypatch, tmp_path, mode):
+    clips = {
+        "nagpur": silence(0.2) + speech(1.2, seed=5) + silence(0.3),
+        "pune": silence(0.1) + speech(0.8, seed=6) + silence(0.2),
+    }
+    for name, audio in clips.items():
+        (tmp_path / f"{name}.pcm").write_bytes(audio)
+        (tmp_path / f"{name}.txt").write_text(name.title() + "\n", encoding="utf-8")
+    monkeypatch.setattr(main, "STT_MODE", mode)
+    backend = FakeSTTBackend.from_fixture_dir(str(tmp_path))
+    with stt_socket(backend, "city", "landmark") as ws:
+        for name, field in (("pune", "city"), ("nagpur", "landmark")):
+            # As a load tester would replay it: arbitrary lead-in, then the fixture file
+            for frame in frames(silence(0.7) + clips[name] + silence(1.5)):
+                ws.send_bytes(frame)
+            assert receive_json(ws) == {"type": "fill_field", "field_name": field, "value": name.title()}
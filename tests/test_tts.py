@@ -0,0 +1,120 @@
+import asyncio
+import struct
+
+import pytest
+
+import tts
+from tts import FailoverTTSBackend, FakeTTSBackend, TTSCache, MEDIA_TYPES
+
+
+class BrokenBackend:
+    name = "broken"
+
+    def synthesize(self, text, language, voice, encoding):
+        raise RuntimeError("quota exceeded")
+
+
+@pytest.fixture
+def backend():
+    previous = tts._backend
+    yield tts.set_tts_backend
+    tts.set_tts_backend(previous)
+
+
+def ogg_pages(data):
+    pages, offset = [], 0
+    while offset < len(data):
+        assert data[offset:offset + 4] == b"OggS"
+        flags, granule = data[offset + 5], struct.unpack_from("<q", data, offset + 6)[0]
+        n_segments = data[offset + 26]
+        body = sum(data[offset + 27:offset + 27 + n_segments])
+        end = offset + 27 + n_segments + body
+        page = data[offset:end]
+        zeroed = page[:22] + bytes(4) + page[26:]
+        crc = 0
+        for byte in zeroed:
+            crc = ((crc << 8) & 0xFFFFFFFF) ^ tts.OGG_CRC_TABLE[(crc >> 24) ^ byte]
+        assert struct.unpack_from("<I", page, 22)[0] == crc
+        pages.append((flags, granule, page))
+        offset = end
+    return pages
+
+
+@pytest.mark.parametrize("encoding", sorted(MEDIA_TYPES))
+def test_fake_backend_supports_every_encoding(encoding):
+    audio = FakeTTSBackend().synthesize("Hello there", "en-IN", "v", encoding)
+    assert audio
+
+
+def test_fake_ogg_opus_is_a_valid_ogg_stream():
+    pages = ogg_pages(tts.silent_ogg_opus(2500))
+    assert pages[0][2][28:36] == b"OpusHead" and pages[0][0] & 0x02
+    assert pages[1][2][28:36] == b"OpusTags"
+    assert pages[-1][0] & 0x04
+    assert pages[-1][1] == tts.OPUS_PRE_SKIP + 125 * 960
+
+
+def test_failover_clips_are_not_cached(backend):
+    backend(FailoverTTSBackend(BrokenBackend(), FakeTTSBackend(), timeout=1))
+    cache = TTSCache(cache_dir="")
+    audio, key = asyncio.run(cache.get_or_synthesize("What is your name?"))
+    assert audio and key is None
+    assert cache.peek("What is your name?") is None
+
+
+def test_primary_clips_are_cached(backend):
+    backend(FakeTTSBackend())
+    cache = TTSCache(cache_dir="")
+    audio, key = asyncio.run(cache.get_or_synthesize("What is your name?"))
+    assert key == tts.tts_cache_key("What is your name?")
+    assert cache.peek("What is your name?") == audio
+
+
+def test_stream_synthesis_ogg_with_fake_backend(backend, monkeypatch):
+    backend(FakeTTSBackend())
+    monkeypatch.setattr(tts, "tts_cache", TTSCache(cache_dir=""))
+
+    async def collect():
+        text = "First sentence is long enough. Second sentence is long enough too."
+        return [chunk async for chunk in tts.stream_synthesis(text, encoding="OGG_OPUS")]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) == 2 and all(chunk.startswith(b"OggS") for chunk in chunks)
+
+
+class SlowBackend:
+    name = "slow"
+
+    def __init__(self):
+        self.calls = 0
+
+    def synthesize(self, text, language, voice, encoding):
+        import time
+        self.calls += 1
+        time.sleep(0.1)
+        return b"audio:" + text.encode()
+
+
+def test_cancelled_caller_does_not_cancel_shared_synthesis(backend):
+    slow = SlowBackend()
+    backend(slow)
+    cache = TTSCache(cache_dir="")
+
+    async def scenario():
+        streaming = asyncio.create_task(cache.get_or_synthesize("Shared question"))
+        regular = asyncio.create_task(cache.get_or_synthesize("Shared question"))
+        await asyncio.sleep(0.02)
+        streaming.cancel()
+        return await regular
+
+    audio, key = asyncio.run(scenario())
+    assert audio == b"audio:Shared question" and key is not None
+    assert slow.calls == 1
+    assert cache.contains("Shared question")
+
+
+def test_contains_checks_the_disk_tier(backend, tmp_path):
+    backend(FakeTTSBackend())
+    asyncio.run(TTSCache(cache_dir=str(tmp_path)).get_or_synthesize("On disk"))
+    assert TTSCache(cache_dir=str(tmp_path)).contains("On disk")
+    assert not TTSCache(cache_dir=str(tmp_path)).contains("Never synthesized")
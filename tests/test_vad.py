@@ -0,0 +1,73 @@
+import numpy as np
+
+from vad import SAMPLE_RATE, VoiceActivityDetector
+
+
+def tone(seconds, amplitude, freq=220.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return amplitude * np.sin(2 * np.pi * freq * t)
+
+
+# Low-pass (so low zero-crossing rate, like fan/road rumble) noise at a steady level
+def rumble(seconds, amplitude, seed=0):
+    noise = np.random.default_rng(seed).standard_normal(int(seconds * SAMPLE_RATE))
+    noise = np.convolve(noise, np.ones(40) / 40, mode="same")
+    return amplitude * noise / np.sqrt(np.mean(noise ** 2))
+
+
+def pcm(signal):
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def test_silence_has_no_segments():
+    assert VoiceActivityDetector().segments(pcm(np.zeros(SAMPLE_RATE * 2))) == []
+
+
+def test_speech_in_quiet_room():
+    signal = np.concatenate((np.zeros(SAMPLE_RATE), tone(1.0, 0.3), np.zeros(SAMPLE_RATE * 2)))
+    [(start, end)] = VoiceActivityDetector().segments(pcm(signal))
+    assert abs(start - 1.0) < 0.1 and abs(end - 2.0) < 0.1
+
+
+def test_constant_background_noise_is_not_speech():
+    for amplitude in (0.01, 0.02, 0.0316):  # -40 .. -30 dBFS
+        hum = rumble(4.0, amplitude) + tone(4.0, amplitude, freq=100.0)
+        assert VoiceActivityDetector().segments(pcm(hum)) == []
+
+
+def test_noise_starting_mid_stream_stops_counting_as_speech():
+    signal = np.concatenate((np.zeros(SAMPLE_RATE), rumble(5.0, 0.0316)))
+    segments = VoiceActivityDetector().segments(pcm(signal))
+    # The onset may open one segment, but the floor catches up and closes it
+    assert all(end < 4.0 for _, end in segments)
+
+
+def test_speech_over_constant_background_noise():
+    background = rumble(5.0, 0.0316) + tone(5.0, 0.0316, freq=100.0)
+    burst = np.zeros_like(background)
+    burst[2 * SAMPLE_RATE:3 * SAMPLE_RATE] = tone(1.0, 0.4)
+    [(start, end)] = VoiceActivityDetector().segments(pcm(background + burst))
+    assert abs(start - 2.0) < 0.1 and abs(end - 3.0) < 0.1
+
+
+def test_long_utterance_over_noise_is_not_cut():
+    # 4 s of syllables (2.5 Hz envelope) with no real pause, over steady rumble
+    t = np.arange(4 * SAMPLE_RATE) / SAMPLE_RATE
+    syllables = tone(4.0, 0.3) * np.abs(np.sin(2 * np.pi * 2.5 * t))
+    signal = np.concatenate((np.zeros(SAMPLE_RATE // 2), syllables, np.zeros(SAMPLE_RATE)))
+    [(start, end)] = VoiceActivityDetector().segments(pcm(signal + rumble(5.5, 0.0316)))
+    assert abs(start - 0.5) < 0.1 and abs(end - 4.5) < 0.1
+
+
+def test_streamed_chunks_match_whole_buffer():
+    background = rumble(3.0, 0.02)
+    background[SAMPLE_RATE:2 * SAMPLE_RATE] += tone(1.0, 0.4)
+    audio = pcm(background)
+    vad = VoiceActivityDetector()
+    closed = []
+    for i in range(0, len(audio), 1234):
+        closed += vad.process(audio[i:i + 1234])
+    if vad.in_speech:
+        closed.append((vad.speech_start, vad.samples_seen))
+    expected = VoiceActivityDetector().segments(audio)
+    assert [(s / SAMPLE_RATE, e / SAMPLE_RATE) for s, e in closed] == expected
@@ -0,0 +1,393 @@
+from collections import OrderedDict
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import struct
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+TTS_LANGUAGE = os.getenv("TTS_LANGUAGE", "en-IN")
+TTS_VOICE = os.getenv("TTS_VOICE", "en-IN-Wavenet-D")
+TTS_ENCODING = "MP3"
+# In-memory tier budget (bytes of encoded audio)
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# On-disk tier; empty string disables it
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+TTS_PRESYNTH_CONCURRENCY = int(os.getenv("TTS_PRESYNTH_CONCURRENCY", "4"))
+
+# Which engine speaks: "google" (cloud), "local" (espeak-ng/Piper on CPU) or "fake" (silence/fixtures)
+TTS_BACKEND = os.getenv("TTS_BACKEND", "google")
+# Optional backend to fail over to when the primary errors or is slow
+TTS_FALLBACK = os.getenv("TTS_FALLBACK", "")
+TTS_FAILOVER_TIMEOUT = float(os.getenv("TTS_FAILOVER_TIMEOUT", "3"))
+LOCAL_TTS_ENGINE = os.getenv("LOCAL_TTS_ENGINE", "espeak-ng")
+# espeak-ng voice name, or path to a Piper .onnx model
+LOCAL_TTS_VOICE = os.getenv("LOCAL_TTS_VOICE", "en")
+TTS_FAKE_FIXTURES = os.getenv("TTS_FAKE_FIXTURES", "")
+
+MEDIA_TYPES = {"MP3": "audio/mpeg", "OGG_OPUS": "audio/ogg", "LINEAR16": "audio/wav"}
+# One silent MPEG-1 Layer III frame: 128 kbit/s, 44.1 kHz, mono, no CRC (1152 samples)
+SILENT_MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC0]) + bytes(413)
+MP3_FRAME_US = 1152 * 1000000 // 44100
+# Sentence boundary: end punctuation followed by whitespace
+SENTENCE_BREAK = re.compile(r"(?<=[.!?;:])\s+")
+# Fragments shorter than this are merged into the next one (avoids tiny requests)
+MIN_SEGMENT_CHARS = 24
+
+
+# 🔊 Google Cloud TTS. One TextToSpeechClient for the whole process
+# (gRPC channel reused across requests), created on first use.
+class GoogleTTSBackend:
+    name = "google"
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from google.cloud import texttospeech
+                self._client = texttospeech.TextToSpeechClient()
+            return self._client
+
+    def synthesize(self, text: str, language: str, voice: str, encoding: str) -> bytes:
+        from google.cloud import texttospeech
+        response = self.client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=text),
+            voice=texttospeech.VoiceSelectionParams(language_code=language, name=voice),
+            audio_config=texttospeech.AudioConfig(audio_encoding=getattr(texttospeech.AudioEncoding, encoding)),
+        )
+        return response.audio_content
+
+
+# 💻 Offline CPU synthesis through espeak-ng or Piper. Both produce PCM/WAV;
+# ffmpeg transcodes to MP3/Ogg Opus when those encodings are requested.
+class LocalTTSBackend:
+    name = "local"
+
+    def __init__(self, engine: str = LOCAL_TTS_ENGINE, voice: str = LOCAL_TTS_VOICE):
+        self.engine = engine
+        self.voice = voice
+
+    def _render_wav(self, text: str) -> bytes:
+        if self.engine == "piper":
+            # Piper writes a WAV file; read it back through a temp path
+            with tempfile.NamedTemporaryFile(suffix=".wav") as out:
+                subprocess.run(
+                    ["piper", "--model", self.voice, "--output_file", out.name],
+                    input=text.encode("utf-8"), check=True, capture_output=True,
+                )
+                return out.read()
+        result = subprocess.run(
+            ["espeak-ng", "--stdout", "-v", self.voice, text], check=True, capture_output=True
+        )
+        return result.stdout
+
+    def synthesize(self, text: str, language: str, voice: str, encoding: str) -> bytes:
+        wav = self._render_wav(text)
+        if encoding == "LINEAR16":
+            return wav
+        codec = ["-f", "mp3"] if encoding == "MP3" else ["-c:a", "libopus", "-f", "ogg"]
+        result = subprocess.run(
+            ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", *codec, "pipe:1"],
+            input=wav, check=True, capture_output=True,
+        )
+        return result.stdout
+
+
+# 🧪 Deterministic fake for tests and load tests: returns a fixture clip named by
+# the clip's cache key from TTS_FAKE_FIXTURES if present, otherwise silence whose
+# length grows with the text (so playback timing stays realistic).
+class FakeTTSBackend:
+    name = "fake"
+
+    def __init__(self, fixtures_dir: str = TTS_FAKE_FIXTURES, ms_per_char: int = 60):
+        self.fixtures_dir = fixtures_dir
+        self.ms_per_char = ms_per_char
+
+    def synthesize(self, text: str, language: str, voice: str, encoding: str) -> bytes:
+        if self.fixtures_dir:
+            key = tts_cache_key(text, language, voice, encoding)
+            path = os.path.join(self.fixtures_dir, f"{key}.{encoding.lower()}")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    return f.read()
+        duration_ms = min(15000, max(300, len(text) * self.ms_per_char))
+        if encoding == "MP3":
+            return SILENT_MP3_FRAME * max(1, duration_ms * 1000 // MP3_FRAME_US)
+        if encoding == "LINEAR16":
+            return silent_wav(duration_ms)
+        if encoding == "OGG_OPUS":
+            return silent_ogg_opus(duration_ms)
+        raise ValueError(f"Fake TTS backend cannot produce {encoding}")
+
+
+# ⏱️ Uses the primary backend but falls back when it errors or takes longer than
+# `timeout` seconds. Fallback clips are reported as non-cacheable so the cache
+# keeps asking the primary next time.
+class FailoverTTSBackend:
+    def __init__(self, primary, fallback, timeout: float = TTS_FAILOVER_TIMEOUT):
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout = timeout
+        self.name = primary.name
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tts-primary")
+
+    def synthesize(self, text: str, language: str, voice: str, encoding: str) -> bytes:
+        return self.synthesize_with_failover(text, language, voice, encoding)[0]
+
+    def synthesize_with_failover(self, text: str, language: str, voice: str, encoding: str):
+        future = self._pool.submit(self.primary.synthesize, text, language, voice, encoding)
+        try:
+            return future.result(timeout=self.timeout), True
+        except Exception as e:
+            logger.warning("TTS backend %s failed or timed out (%r); using %s",
+                           self.primary.name, e, self.fallback.name)
+            return self.fallback.synthesize(text, language, voice, encoding), False
+
+
+def build_tts_backend(name: str = TTS_BACKEND, fallback: str = TTS_FALLBACK):
+    backends = {"google": GoogleTTSBackend, "local": LocalTTSBackend, "fake": FakeTTSBackend}
+    backend = backends.get(name, GoogleTTSBackend)()
+    if fallback and fallback != name:
+        backend = FailoverTTSBackend(backend, backends[fallback]())
+    return backend
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+# 🔌 Process-wide backend chosen by TTS_BACKEND (+ optional TTS_FALLBACK)
+def get_tts_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = build_tts_backend()
+        return _backend
+
+
+def set_tts_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+# 🎙️ Blocking synthesis; always called off the event loop.
+# Returns (audio, cacheable) — failover clips are not cacheable.
+def synthesize(text: str, language: str = TTS_LANGUAGE, voice: str = TTS_VOICE,
+               encoding: str = TTS_ENCODING):
+    backend = get_tts_backend()
+    if isinstance(backend, FailoverTTSBackend):
+        return backend.synthesize_with_failover(text, language, voice, encoding)
+    return backend.synthesize(text, language, voice, encoding), True
+
+
+# 🔇 Minimal valid silent audio for the fake backend
+def silent_wav(duration_ms: int, sample_rate: int = 16000) -> bytes:
+    data_len = sample_rate * duration_ms // 1000 * 2
+    header = b"RIFF" + struct.pack("<I", 36 + data_len) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    header += b"data" + struct.pack("<I", data_len)
+    return header + bytes(data_len)
+
+
+def _ogg_crc_table():
+    table = []
+    for i in range(256):
+        crc = i << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else crc << 1
+        table.append(crc & 0xFFFFFFFF)
+    return table
+
+
+OGG_CRC_TABLE = _ogg_crc_table()
+# One 20 ms CELT frame of silence (mono, fullband)
+SILENT_OPUS_PACKET = b"\xf8\xff\xfe"
+OPUS_PRE_SKIP = 312
+
+
+def ogg_page(packets, granule: int, serial: int, sequence: int, flags: int = 0) -> bytes:
+    lacing = b""
+    for packet in packets:
+        lacing += b"\xff" * (len(packet) // 255) + bytes([len(packet) % 255])
+    header = b"OggS" + struct.pack("<BBqIII", 0, flags, granule, serial, sequence, 0)
+    page = header + bytes([len(lacing)]) + lacing + b"".join(packets)
+    crc = 0
+    for byte in page:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ OGG_CRC_TABLE[(crc >> 24) ^ byte]
+    return page[:22] + struct.pack("<I", crc) + page[26:]
+
+
+# 🔇 Silent Ogg Opus (RFC 7845): OpusHead, OpusTags, then 20 ms silent frames
+def silent_ogg_opus(duration_ms: int, serial: int = 0x46414B45) -> bytes:
+    head = b"OpusHead" + struct.pack("<BBHIhB", 1, 1, OPUS_PRE_SKIP, 48000, 0, 0)
+    tags = b"OpusTags" + struct.pack("<I", 4) + b"fake" + struct.pack("<I", 0)
+    pages = [ogg_page([head], 0, serial, 0, flags=0x02), ogg_page([tags], 0, serial, 1)]
+    frames = max(1, duration_ms // 20)
+    for start in range(0, frames, 50):
+        count = min(50, frames - start)
+        last = start + count == frames
+        pages.append(ogg_page([SILENT_OPUS_PACKET] * count, OPUS_PRE_SKIP + (start + count) * 960,
+                              serial, len(pages), flags=0x04 if last else 0))
+    return b"".join(pages)
+
+
+# #️⃣ Content address of a synthesized clip: text + voice + encoding + backend
+def tts_cache_key(text: str, language: str = TTS_LANGUAGE, voice: str = TTS_VOICE,
+                  encoding: str = TTS_ENCODING) -> str:
+    raw = "\x1f".join([text.strip(), language, voice, encoding, TTS_BACKEND])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# 🗃️ Two-tier audio cache: byte-bounded in-memory LRU over a directory of clips.
+# Concurrent requests for the same clip share one synthesis.
+class TTSCache:
+    def __init__(self, max_bytes: int = TTS_CACHE_MAX_BYTES, cache_dir: str = TTS_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._size = 0
+        self._inflight = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key, encoding):
+        return os.path.join(self.cache_dir, f"{key}.{encoding.lower()}")
+
+    def _remember(self, key, audio):
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key))
+        self._entries[key] = audio
+        self._size += len(audio)
+        while self._size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def _read_disk(self, key, encoding):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key, encoding), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key, encoding, audio):
+        if not self.cache_dir:
+            return
+        path = self._path(key, encoding)
+        tmp = f"{path}.tmp.{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(audio)
+        os.replace(tmp, path)
+
+    # 🔍 Returns (audio bytes, key); synthesizes and stores on a miss. key is None
+    # for clips that must not be cached anywhere (failover audio)
+    async def get_or_synthesize(self, text: str, language: str = TTS_LANGUAGE, voice: str = TTS_VOICE,
+                                encoding: str = TTS_ENCODING):
+        key = tts_cache_key(text, language, voice, encoding)
+        audio = self._entries.get(key)
+        if audio is not None:
+            self._entries.move_to_end(key)
+            return audio, key
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, text, language, voice, encoding))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        # Shielded: a caller that goes away (closed stream) only stops waiting; the
+        # shared synthesis still completes for everyone else and lands in the cache
+        audio, cacheable = await asyncio.shield(task)
+        return audio, key if cacheable else None
+
+    async def _load(self, key, text, language, voice, encoding):
+        audio = await asyncio.to_thread(self._read_disk, key, encoding)
+        cacheable = True
+        if audio is None:
+            audio, cacheable = await asyncio.to_thread(synthesize, text, language, voice, encoding)
+            if cacheable:
+                await asyncio.to_thread(self._write_disk, key, encoding, audio)
+        if cacheable:
+            self._remember(key, audio)
+        return audio, cacheable
+
+    def _finish(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved so failures nobody awaited aren't logged
+
+    # ✅ Whether a clip is ready without synthesis (memory or disk tier)
+    def contains(self, text: str, language: str = TTS_LANGUAGE, voice: str = TTS_VOICE,
+                 encoding: str = TTS_ENCODING) -> bool:
+        key = tts_cache_key(text, language, voice, encoding)
+        return key in self._entries or bool(self.cache_dir) and os.path.exists(self._path(key, encoding))
+
+    # 👀 Memory-tier lookup only; never synthesizes
+    def peek(self, text: str, language: str = TTS_LANGUAGE, voice: str = TTS_VOICE,
+             encoding: str = TTS_ENCODING):
+        return self._entries.get(tts_cache_key(text, language, voice, encoding))
+
+    # 🔥 Warms the cache for a list of texts (e.g. every question of an analyzed form)
+    async def presynthesize(self, texts, concurrency: int = TTS_PRESYNTH_CONCURRENCY):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def warm(text):
+            async with semaphore:
+                try:
+                    await self.get_or_synthesize(text)
+                except Exception as e:
+                    logger.warning("Pre-synthesis failed for %r: %s", text, e)
+
+        await asyncio.gather(*(warm(t) for t in dict.fromkeys(texts) if t))
+
+
+tts_cache = TTSCache()
+
+
+# ✂️ Splits text at sentence boundaries, merging very short fragments forward
+def split_sentences(text: str, min_chars: int = MIN_SEGMENT_CHARS):
+    segments, current = [], ""
+    for part in SENTENCE_BREAK.split(text.strip()):
+        current = f"{current} {part}".strip()
+        if len(current) >= min_chars:
+            segments.append(current)
+            current = ""
+    if current:
+        if segments:
+            segments[-1] = f"{segments[-1]} {current}"
+        else:
+            segments.append(current)
+    return segments
+
+
+# 🌊 Yields encoded audio segment by segment: all sentences are synthesized
+# concurrently (each through the cache) and streamed in order, so playback can
+# start as soon as the first sentence is ready. MP3 segments concatenate into a
+# playable stream; Ogg Opus segments form a chained Ogg stream.
+async def stream_synthesis(text: str, encoding: str = TTS_ENCODING):
+    whole = tts_cache.peek(text, encoding=encoding)
+    if whole is not None:
+        yield whole
+        return
+    tasks = [
+        asyncio.create_task(tts_cache.get_or_synthesize(segment, encoding=encoding))
+        for segment in split_sentences(text)
+    ]
+    try:
+        for task in tasks:
+            audio, _ = await task
+            yield audio
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,136 @@
+from collections import deque
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Required margin (dB) above the adaptive noise floor per aggressiveness level 0-3
+AGGRESSIVENESS_MARGIN_DB = {0: 6.0, 1: 9.0, 2: 12.0, 3: 15.0}
+# Frames quieter than this are never speech, whatever the noise floor says
+ABSOLUTE_FLOOR_DB = -55.0
+# Zero-crossing rate above which a frame is treated as hiss/noise unless it is loud
+MAX_SPEECH_ZCR = 0.45
+LOUD_MARGIN_DB = 20.0
+# Minimum-statistics window is split into this many blocks (running min/max each)
+NOISE_WINDOW_BLOCKS = 6
+
+
+# 📐 Vectorized per-frame features over Int16 PCM: energy in dBFS and zero-crossing rate
+def frame_features(samples: np.ndarray, frame_len: int):
+    n_frames = len(samples) // frame_len
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len).astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy_db = 20.0 * np.log10(np.maximum(rms, 1e-6))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(frame_len - 1)
+    return energy_db, zcr
+
+
+# 🗣️ Streaming voice activity detector on fixed 10/20/30 ms frames.
+# Energy + zero-crossing features are computed with NumPy per chunk; the decision
+# uses an adaptive noise floor, an onset requirement (min_speech_ms) and hangover
+# smoothing (hangover_ms of non-speech before a segment closes). The floor follows
+# quiet frames directly and, via minimum statistics over the last noise_window_ms of
+# all frames, also rises under steady background noise that would otherwise pass as speech.
+# Sample positions are absolute (counted since creation or reset()).
+class VoiceActivityDetector:
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = 20, aggressiveness: int = 2,
+                 hangover_ms: int = 700, min_speech_ms: int = 60, noise_adapt: float = 0.05,
+                 noise_window_ms: int = 1500):
+        if frame_ms not in (10, 20, 30):
+            raise ValueError("frame_ms must be 10, 20 or 30")
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.margin_db = AGGRESSIVENESS_MARGIN_DB[max(0, min(3, int(aggressiveness)))]
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.onset_frames = max(1, min_speech_ms // frame_ms)
+        self.noise_adapt = noise_adapt
+        self.block_frames = max(1, noise_window_ms // frame_ms // NOISE_WINDOW_BLOCKS)
+        self.reset(keep_noise_floor=False)
+
+    # 🔄 Clears segment/position state; the learned noise floor survives unless asked
+    def reset(self, keep_noise_floor: bool = True):
+        if not keep_noise_floor:
+            self.noise_floor_db = ABSOLUTE_FLOOR_DB
+            self._blocks = deque(maxlen=NOISE_WINDOW_BLOCKS - 1)  # (min, max) of finished blocks
+            self._block_min, self._block_max = float("inf"), float("-inf")  # current block
+            self._block_count = 0
+        self.in_speech = False
+        self.samples_seen = 0       # samples consumed as whole frames
+        self.samples_received = 0   # all samples fed, including a partial trailing frame
+        self.speech_start = None  # absolute sample where the open segment began
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._speech_run = 0
+        self._silence_run = 0
+
+    # 🔍 Feeds raw Int16 PCM; returns segments closed by this chunk as
+    # (start_sample, end_sample) pairs. Leftover samples carry over to the next call.
+    def process(self, audio) -> list:
+        samples = np.frombuffer(audio, dtype=np.int16)
+        self.samples_received += len(samples)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        n_frames = len(samples) // self.frame_len
+        self._pending = samples[n_frames * self.frame_len:].copy()
+        if n_frames == 0:
+            return []
+
+        energy_db, zcr = frame_features(samples, self.frame_len)
+        closed = []
+        for i in range(n_frames):
+            frame_start = self.samples_seen
+            self.samples_seen += self.frame_len
+            energy = float(energy_db[i])
+            self._track_minimum(energy)
+            threshold = max(self.noise_floor_db + self.margin_db, ABSOLUTE_FLOOR_DB)
+            loud = energy > threshold + LOUD_MARGIN_DB
+            voiced = energy > threshold and (zcr[i] < MAX_SPEECH_ZCR or loud)
+
+            if voiced:
+                self._speech_run += 1
+                self._silence_run = 0
+            else:
+                self._speech_run = 0
+                self._silence_run += 1
+                # Track background level on non-speech frames: fast down, and slow up
+                # only between segments (pauses inside speech still carry some of it)
+                if energy < self.noise_floor_db:
+                    self.noise_floor_db = energy
+                elif not self.in_speech:
+                    self.noise_floor_db += self.noise_adapt * (energy - self.noise_floor_db)
+
+            if not self.in_speech and self._speech_run >= self.onset_frames:
+                self.in_speech = True
+                self.speech_start = frame_start - (self.onset_frames - 1) * self.frame_len
+            elif self.in_speech and self._silence_run >= self.hangover_frames:
+                end = self.samples_seen - self._silence_run * self.frame_len
+                closed.append((self.speech_start, end))
+                self.in_speech = False
+                self.speech_start = None
+        return closed
+
+    # 📉 Minimum statistics: when no frame in the window was as quiet as the floor and
+    # nothing in it stood out by the speech margin (steady hum, fan, traffic), the
+    # background itself got louder; lift the floor to the quietest recent frame.
+    # Speech, with its syllable peaks and pauses, never looks that steady.
+    def _track_minimum(self, energy: float):
+        if energy < self._block_min:
+            self._block_min = energy
+        if energy > self._block_max:
+            self._block_max = energy
+        self._block_count += 1
+        minimum = min([self._block_min, *(low for low, _ in self._blocks)])
+        maximum = max([self._block_max, *(high for _, high in self._blocks)])
+        if self._block_count == self.block_frames:
+            self._blocks.append((self._block_min, self._block_max))
+            self._block_min, self._block_max = float("inf"), float("-inf")
+            self._block_count = 0
+        if minimum > self.noise_floor_db and maximum - minimum < self.margin_db:
+            self.noise_floor_db = minimum
+
+    # 📋 Convenience for a complete buffer: all speech segments in seconds
+    def segments(self, audio) -> list:
+        self.reset(keep_noise_floor=False)
+        closed = self.process(audio)
+        if self.in_speech:
+            closed.append((self.speech_start, self.samples_seen))
+        return [(start / self.sample_rate, end / self.sample_rate) for start, end in closed]